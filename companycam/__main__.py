@@ -0,0 +1,28 @@
+"""
+Command line tools, see `python -m companycam --help`.
+"""
+
+import argparse
+
+from companycam import bench, export
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(prog="python -m companycam")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    bench_parser = subparsers.add_parser(
+        "bench", help="benchmark the client against a server"
+    )
+    bench.add_arguments(bench_parser)
+    bench_parser.set_defaults(func=bench.main)
+    export_parser = subparsers.add_parser(
+        "export", help="export projects (and their sub-lists) to files"
+    )
+    export.add_arguments(export_parser)
+    export_parser.set_defaults(func=export.main)
+    args = parser.parse_args(argv)
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
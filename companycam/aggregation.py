@@ -0,0 +1,135 @@
+"""
+Count the items of a list path by group, without creating models:
+
+```py
+counts = api.photos.aggregate(group_by=["project_id", "creator_id"], bucket="day")
+for row in counts.rows():
+    print(row)  # {"project_id": "1", "creator_id": "2", "day": "2024-05-01", "count": 12}
+```
+
+Pages are fetched one at a time and decoded to JSON, and only the grouped keys are read
+from each item, so memory use depends on the number of groups rather than the number of
+items. Timestamps are bucketed in UTC.
+"""
+
+import json
+from collections import Counter
+from collections.abc import Callable, Iterable, Iterator, Sequence
+from datetime import datetime, timezone
+from typing import Any
+
+from companycam.pagination import PER_PAGE, page_query
+from companycam.parallel import fetch_content
+from companycam.types import QueryParamTypes
+
+# how each bucket is labelled, and the length (in seconds) of the periods in which all
+# timestamps have the same label, so labels are only formatted once per period
+BUCKETS: dict[str, tuple[str, int]] = {
+    "hour": ("%Y-%m-%dT%H:00", 3600),
+    "day": ("%Y-%m-%d", 86400),
+    "week": ("%G-W%V", 86400),
+    "month": ("%Y-%m", 86400),
+    "year": ("%Y", 86400),
+}
+
+
+def iter_json_pages(
+    method: Callable[..., list],
+    *args: Any,
+    query: QueryParamTypes | None = None,
+    per_page: int = PER_PAGE,
+) -> Iterator[list[dict[str, Any]]]:
+    """Like `companycam.pagination.iter_pages()`, but yields pages of decoded JSON
+    rather than models.
+    """
+    page = 1
+    while True:
+        query_ = page_query(query, page, per_page)
+        items = json.loads(fetch_content(method, *args, query=query_))
+        if items:
+            yield items
+        if len(items) < per_page:
+            return
+        page += 1
+
+
+class Aggregator(object):
+    """Counts items (as decoded JSON) by the values of `group_by` keys and, if
+    `bucket` is set, the period of the timestamp in `bucket_field`.
+
+    **Parameters:**
+
+    * **group_by** - *(optional)* Keys to group by e.g. `["project_id"]`.
+    * **bucket** - *(optional)* "hour", "day", "week", "month" or "year".
+    * **bucket_field** - *(optional)* Key of the timestamp to bucket by.
+    """
+
+    def __init__(
+        self,
+        group_by: Sequence[str] = (),
+        bucket: str | None = None,
+        bucket_field: str = "created_at",
+    ) -> None:
+        if bucket is not None and bucket not in BUCKETS:
+            raise ValueError(f"Unknown bucket '{bucket}', use one of: {list(BUCKETS)}")
+        self.group_by = tuple(group_by)
+        self.bucket = bucket
+        self.bucket_field = bucket_field
+        self.counts: Counter[tuple] = Counter()
+        # bucket label by period number
+        self._labels: dict[int, str] = {}
+
+    @property
+    def columns(self) -> tuple[str, ...]:
+        return self.group_by + ((self.bucket,) if self.bucket else ())
+
+    @property
+    def total(self) -> int:
+        return self.counts.total()
+
+    def label(self, timestamp: Any) -> str | None:
+        if timestamp is None:
+            return None
+        format, period = BUCKETS[self.bucket]  # type: ignore[index]
+        number = int(timestamp) // period
+        if (label := self._labels.get(number)) is None:
+            moment = datetime.fromtimestamp(number * period, timezone.utc)
+            label = self._labels[number] = moment.strftime(format)
+        return label
+
+    def add(self, items: Iterable[dict[str, Any]]) -> None:
+        keys = self.group_by
+        if self.bucket:
+            field = self.bucket_field
+            self.counts.update(
+                (*(item.get(k) for k in keys), self.label(item.get(field)))
+                for item in items
+            )
+        else:
+            self.counts.update(tuple(item.get(k) for k in keys) for item in items)
+
+    def rows(self) -> list[dict[str, Any]]:
+        """Each group's values and `count`, most common first."""
+        columns = self.columns
+        return [
+            {**dict(zip(columns, group, strict=True)), "count": count}
+            for group, count in self.counts.most_common()
+        ]
+
+
+def aggregate(
+    method: Callable[..., list],
+    *args: Any,
+    group_by: Sequence[str] = (),
+    bucket: str | None = None,
+    bucket_field: str = "created_at",
+    query: QueryParamTypes | None = None,
+    per_page: int = PER_PAGE,
+) -> Aggregator:
+    """Count the items of every page of a list path (e.g. `api.photos.list`), see
+    `Aggregator`.
+    """
+    aggregator = Aggregator(group_by, bucket, bucket_field)
+    for items in iter_json_pages(method, *args, query=query, per_page=per_page):
+        aggregator.add(items)
+    return aggregator
@@ -1,11 +1,17 @@
+import copy
 import typing
 from collections.abc import Generator
 
 import httpx
 
 from companycam import v2
-from companycam.client import LazyClient
+from companycam.cache import SQLiteCache
+from companycam.client import DEFAULT_TIMEOUT, LazyClient
 from companycam.exceptions import map_status_codes_to_exceptions
+from companycam.identity import IdentityMap
+from companycam.profiler import Profiler
+from companycam.singleflight import SingleFlight
+from companycam.types import TimeoutTypes
 
 STATUS_CODES_TO_EXCEPTIONS = map_status_codes_to_exceptions()
 SUPPORTED_VERSIONS: list[str] = ["v2"]
@@ -53,6 +59,22 @@ class API(object):
     * **version** - *(optional)* API version e.g. "v2".
     * **server_url** - *(optional)* Specify a server URL if you wish to use something
     other than the default e.g. for testing.
+    * **coalesce_requests** - *(optional)* If `True`, identical GET requests which are
+    in flight at the same time (e.g. from multiple threads) share one HTTP request and
+    one parsed result.
+    * **transport** - *(optional)* An HTTPX transport to send all requests through. The
+    transport is shared between requests and is not closed by the `API` object, e.g.
+    see `companycam.pool.ClientPool`.
+    * **cache** - *(optional)* A `companycam.cache.SQLiteCache` to cache GET responses
+    in.
+    * **identity_map** - *(optional)* A `companycam.identity.IdentityMap` used to
+    deduplicate returned models and intern their repeated strings.
+    * **timeout** - *(optional)* Default timeout for each request, in seconds or as an
+    `httpx.Timeout`. Can be overridden per call e.g.
+    `api.projects.retrieve("12345678", timeout=2)`, and is capped by any deadline (see
+    `companycam.deadlines`).
+    * **profiler** - *(optional)* A `companycam.profiler.Profiler` to time each call
+    phase by phase.
     """
 
     def __init__(
@@ -60,6 +82,12 @@ class API(object):
         token: str,
         version: typing.Literal["v2"] = "v2",
         server_url: str | None = None,
+        coalesce_requests: bool = False,
+        transport: httpx.BaseTransport | None = None,
+        cache: SQLiteCache | None = None,
+        identity_map: IdentityMap | None = None,
+        timeout: TimeoutTypes = DEFAULT_TIMEOUT,
+        profiler: Profiler | None = None,
     ) -> None:
         if version not in SUPPORTED_VERSIONS:
             raise ValueError(
@@ -74,8 +102,18 @@ class API(object):
             headers={"accept": "application/json"},
             event_hooks={"response": [raise_on_4xx_5xx]},
             base_url=(server_url or default_server_url),
+            single_flight=SingleFlight() if coalesce_requests else None,
+            transport=transport,
+            cache=cache,
+            identity_map=identity_map,
+            timeout=timeout,
+            profiler=profiler,
         )
-        if version == "v2":
+        self.version = version
+        self._create_managers()
+
+    def _create_managers(self) -> None:
+        if self.version == "v2":
             self.company = v2.managers.CompanyManager(self.client)
             self.users = v2.managers.UsersManager(self.client)
             self.projects = v2.managers.ProjectsManager(self.client)
@@ -83,3 +121,14 @@ class API(object):
             self.tags = v2.managers.TagsManager(self.client)
             self.groups = v2.managers.GroupsManager(self.client)
             self.webhooks = v2.managers.WebhooksManager(self.client)
+
+    def with_priority(self, priority: str) -> "API":
+        """Get a copy of this object which tags its requests with a priority class (e.g.
+        "interactive"), for `companycam.pool.PriorityTransport`. The copy shares this
+        object's configuration, transport, cache etc.
+        """
+        api = copy.copy(self)
+        api.client = copy.copy(self.client)
+        api.client.priority = priority
+        api._create_managers()
+        return api
@@ -0,0 +1,178 @@
+"""
+Crawl a list path concurrently by splitting a time range into windows, e.g. every photo
+captured in 2024:
+
+```py
+backfill = api.photos.backfill(datetime(2024, 1, 1), datetime(2025, 1, 1))
+for photo in backfill:
+    ...
+```
+
+Paginating one list is a chain of requests (page N+1 follows page N), so it is limited
+to one request at a time. Here the range is split into `max_workers` windows (with the
+`start_date` and `end_date` query parameters) and each window is paginated separately,
+so up to `max_workers` pages are fetched at once.
+
+Windows are split adaptively: when a window returns a full page while a worker is idle,
+the rest of the window is split in two. The list must be ordered newest first (as the
+API's lists of photos are), so the rest of a window is the part older than its oldest
+item so far. Items at that boundary timestamp which were already yielded are skipped
+when the newer half returns them again, so each item is yielded once. Items are
+yielded in the order their pages arrive, not in time order.
+"""
+
+import contextvars
+from collections.abc import Callable, Iterator
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from datetime import datetime
+from operator import attrgetter
+from typing import Any, Generic, TypeVar
+
+from companycam.pagination import PER_PAGE, page_query
+from companycam.types import QueryParamTypes
+
+T = TypeVar("T")
+
+Timestamp = int | float | datetime
+
+
+def to_timestamp(value: Timestamp) -> int:
+    return int(value.timestamp() if isinstance(value, datetime) else value)
+
+
+class Window(object):
+    """A time range (inclusive of both ends, in seconds) paginated on its own."""
+
+    def __init__(self, start: int, end: int, skip: set[Any] | None = None) -> None:
+        self.start = start
+        self.end = end
+        self.page = 1
+        # ids of items at `end` which were yielded before this window was split off (all
+        # of them are at `end`, see `split()`)
+        self.skip = skip or set()
+        # the oldest timestamp so far, and the ids of the items with it
+        self.oldest = end
+        self.oldest_ids: set[Any] = set()
+
+    def observe(self, timestamp: int, id: Any) -> None:
+        if timestamp < self.oldest:
+            self.oldest, self.oldest_ids = timestamp, set()
+        self.oldest_ids.add(id)
+
+    def split(self) -> "tuple[Window, Window] | None":
+        """Split the rest of the window (its items which are older than or as old as
+        its oldest item so far) in two.
+
+        The newer half ends at the oldest timestamp so far, and skips the items with
+        that timestamp which have already been seen, so every id in a window's `skip`
+        has the timestamp `end`. A window is only split once it has seen an item older
+        than `end`, so the newer half always ends before the window does (and the
+        older half starts after the window does) i.e. splitting always progresses. A
+        window whose pages are all at `end` is paginated instead.
+        """
+        if not self.start < self.oldest < self.end:
+            return None
+        middle = (self.start + self.oldest + 1) // 2
+        return (
+            Window(middle, self.oldest, skip=self.oldest_ids),
+            Window(self.start, middle - 1),
+        )
+
+
+class Backfill(Generic[T]):
+    """
+    **Parameters:**
+
+    * **method** - List path to call e.g. `api.photos.list`.
+    * **start** - Start of the time range (a `datetime` or Unix timestamp).
+    * **end** - End of the time range, inclusive.
+    * **args** - *(optional)* Arguments to call `method` with e.g. a project.
+    * **query** - *(optional)* Query parameters for every page.
+    * **per_page** - *(optional)* Items per page requested.
+    * **max_workers** - *(optional)* Number of pages fetched at once.
+    * **timestamp** - *(optional)* Attribute of the items which the time range
+    filters by.
+    * **id** - *(optional)* Attribute of the items which identifies them.
+    """
+
+    def __init__(
+        self,
+        method: Callable[..., list[T]],
+        start: Timestamp,
+        end: Timestamp,
+        args: tuple = (),
+        query: QueryParamTypes | None = None,
+        per_page: int = PER_PAGE,
+        max_workers: int = 8,
+        timestamp: str = "captured_at",
+        id: str = "id",
+    ) -> None:
+        self.method = method
+        self.start = to_timestamp(start)
+        self.end = to_timestamp(end)
+        self.args = tuple(args)
+        self.query = query
+        self.per_page = per_page
+        self.max_workers = max_workers
+        self.timestamp = attrgetter(timestamp)
+        self.id = attrgetter(id)
+        # number of pages requested and windows split, by all iterations
+        self.pages_fetched = 0
+        self.splits = 0
+
+    def windows(self) -> list[Window]:
+        """Split the time range into up to `max_workers` windows of equal length."""
+        length = self.end - self.start + 1
+        count = max(1, min(self.max_workers, length))
+        bounds = [self.start + length * i // count for i in range(count + 1)]
+        return [Window(bounds[i], bounds[i + 1] - 1) for i in range(count)]
+
+    def __iter__(self) -> Iterator[T]:
+        """Crawl the time range, fetching its pages again each time."""
+        futures: dict[Future[list[T]], Window] = {}
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            self._executor = executor
+            try:
+                for window in self.windows():
+                    self._request(futures, window)
+                while futures:
+                    done, _ = wait(futures, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        yield from self._receive(futures, futures.pop(future), future)
+            finally:
+                # stopped early
+                for future in futures:
+                    future.cancel()
+
+    def _request(self, futures: dict, window: Window) -> None:
+        query = page_query(self.query, window.page, self.per_page)
+        query.update(start_date=window.start, end_date=window.end)
+        future = self._executor.submit(
+            contextvars.copy_context().run, self.method, *self.args, query=query
+        )
+        futures[future] = window
+        self.pages_fetched += 1
+
+    def _receive(self, futures: dict, window: Window, future: Future) -> list[T]:
+        page = future.result()
+        items = []
+        for item in page:
+            id = self.id(item)
+            window.observe(self.timestamp(item) or 0, id)
+            if id not in window.skip:
+                items.append(item)
+        if len(page) == self.per_page:
+            self._next(futures, window)
+        return items
+
+    def _next(self, futures: dict, window: Window) -> None:
+        """Request the next page of a window, or split the rest of it if a worker is
+        idle.
+        """
+        if len(futures) + 1 < self.max_workers and (halves := window.split()):
+            self.splits += 1
+            for half in halves:
+                self._request(futures, half)
+            return
+        window.page += 1
+        self._request(futures, window)
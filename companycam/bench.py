@@ -0,0 +1,388 @@
+"""
+Load generation and benchmarking against any server URL, e.g. to size worker pools or
+catch client-side regressions:
+
+```sh
+python -m companycam bench --server-url http://localhost:8000 --token ANY_TOKEN \\
+    --mix list_photos=70,retrieve_photo=20,create_tag=10 --concurrency 16 --duration 30
+python -m companycam bench --stand-in --format json
+```
+
+Each worker repeatedly picks an operation at random (weighted by the mix) and calls it
+through the `API` object, so latencies include the whole client stack (building
+requests, auth, parsing and validation). Workers are threads; with `--client async`
+they are asyncio tasks which call the client with `asyncio.to_thread()`, the way async
+applications use it. Throughput, p50/p95/p99 latency and errors are reported per
+operation, along with the client process' CPU time per request (which includes the
+server's when using `--stand-in`).
+"""
+
+import argparse
+import asyncio
+import contextlib
+import json
+import math
+import os
+import random
+import time
+from collections import Counter, defaultdict
+from collections.abc import Callable
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any
+
+import httpx
+
+from companycam.api import API
+from companycam.profiler import Profiler
+from companycam.v2.models import Comment, Photo, Project, Tag
+
+DEFAULT_MIX = "list_photos=70,retrieve_photo=20,create_tag=10"
+# fields sent by project updates (the write path with the largest body)
+PROJECT_FIELDS = {
+    "name": "Bench",
+    "address": {"street_address_1": "1 Main St", "city": "Columbus", "country": "US"},
+    "coordinates": {"lat": 40.0, "lon": -83.0},
+    "geofence": [{"lat": 40.0, "lon": -83.0}, {"lat": 40.1, "lon": -83.0}],
+}
+
+
+class Sample(object):
+    """IDs of existing objects for operations to pick from."""
+
+    def __init__(self, project_ids: list[str], photo_ids: list[str]) -> None:
+        self.project_ids = project_ids
+        self.photo_ids = photo_ids
+
+    @classmethod
+    def load(cls, api: API, per_page: int = 100) -> "Sample":
+        query = {"per_page": per_page}
+        return cls(
+            project_ids=[p.id for p in api.projects.list(query=query)],
+            photo_ids=[p.id for p in api.photos.list(query=query)],
+        )
+
+
+Operation = Callable[[API, Sample, random.Random], Any]
+
+OPERATIONS: dict[str, Operation] = {
+    "retrieve_company": lambda api, sample, rng: api.company.retrieve(),
+    "list_projects": lambda api, sample, rng: api.projects.list(),
+    "retrieve_project": lambda api, sample, rng: api.projects.retrieve(
+        rng.choice(sample.project_ids)
+    ),
+    "list_project_photos": lambda api, sample, rng: api.projects.list_photos(
+        rng.choice(sample.project_ids)
+    ),
+    "list_photos": lambda api, sample, rng: api.photos.list(),
+    "retrieve_photo": lambda api, sample, rng: api.photos.retrieve(
+        rng.choice(sample.photo_ids)
+    ),
+    "list_photo_tags": lambda api, sample, rng: api.photos.list_tags(
+        rng.choice(sample.photo_ids)
+    ),
+    "list_tags": lambda api, sample, rng: api.tags.list(),
+    "create_tag": lambda api, sample, rng: api.tags.create(
+        Tag(**{"id": "", "display_value": f"bench-{rng.randrange(10**9)}"})
+    ),
+    "update_project": lambda api, sample, rng: api.projects.update(
+        Project(**{**PROJECT_FIELDS, "id": rng.choice(sample.project_ids)})
+    ),
+    "update_photo": lambda api, sample, rng: api.photos.update(
+        Photo(**{"id": rng.choice(sample.photo_ids), "internal": rng.random() < 0.5})
+    ),
+    "create_project_comment": lambda api, sample, rng: api.projects.create_comment(
+        rng.choice(sample.project_ids), Comment(**{"id": "", "content": "bench"})
+    ),
+}
+
+
+def parse_mix(spec: str) -> dict[str, float]:
+    """Parse a workload mix e.g. "list_photos=70,retrieve_photo=30" into weights by
+    operation name.
+    """
+    mix = {}
+    for part in spec.split(","):
+        name, _, weight = part.strip().partition("=")
+        if name not in OPERATIONS:
+            raise ValueError(
+                f"Unknown operation '{name}', expected one of: " + ", ".join(OPERATIONS)
+            )
+        mix[name] = float(weight or 1)
+    if sum(mix.values()) <= 0:
+        raise ValueError("Workload mix weights must add up to more than 0")
+    return mix
+
+
+def percentile(sorted_values: list[float], p: float) -> float:
+    """Nearest-rank percentile of sorted values."""
+    if not sorted_values:
+        return math.nan
+    rank = math.ceil(p / 100 * len(sorted_values))
+    return sorted_values[min(len(sorted_values), max(rank, 1)) - 1]
+
+
+class OperationStats(object):
+    def __init__(self) -> None:
+        self.latencies: list[float] = []
+        self.errors: Counter[str] = Counter()
+
+    @property
+    def requests(self) -> int:
+        return len(self.latencies) + sum(self.errors.values())
+
+    def merge(self, other: "OperationStats") -> None:
+        self.latencies += other.latencies
+        self.errors += other.errors
+
+    def summary(self, elapsed: float) -> dict[str, Any]:
+        latencies = sorted(self.latencies)
+        return {
+            "requests": self.requests,
+            "errors": dict(self.errors),
+            "throughput": self.requests / elapsed if elapsed else math.nan,
+            "p50_ms": percentile(latencies, 50) * 1000,
+            "p95_ms": percentile(latencies, 95) * 1000,
+            "p99_ms": percentile(latencies, 99) * 1000,
+        }
+
+
+Stats = dict[str, OperationStats]
+
+
+class Workload(object):
+    """
+    **Parameters:**
+
+    * **api** - The `API` object to benchmark.
+    * **mix** - Weights by operation name, see `OPERATIONS` and `parse_mix()`.
+    * **sample** - *(optional)* IDs for operations to pick from. Loaded from the API
+    if not given.
+    """
+
+    def __init__(
+        self, api: API, mix: dict[str, float], sample: Sample | None = None
+    ) -> None:
+        self.api = api
+        self.names = list(mix)
+        self.weights = list(mix.values())
+        self.sample = sample if sample is not None else Sample.load(api)
+
+    def call(self, rng: random.Random, stats: Stats) -> None:
+        """Call one operation picked at random, and record its latency or error."""
+        name = rng.choices(self.names, self.weights)[0]
+        start = time.perf_counter()
+        try:
+            OPERATIONS[name](self.api, self.sample, rng)
+        except Exception as exc:
+            stats[name].errors[type(exc).__name__] += 1
+        else:
+            stats[name].latencies.append(time.perf_counter() - start)
+
+    def worker(self, deadline: float, seed: int) -> Stats:
+        rng = random.Random(seed)
+        stats: Stats = defaultdict(OperationStats)
+        while time.monotonic() < deadline:
+            self.call(rng, stats)
+        return stats
+
+    async def async_worker(self, deadline: float, seed: int) -> Stats:
+        rng = random.Random(seed)
+        stats: Stats = defaultdict(OperationStats)
+        while time.monotonic() < deadline:
+            await asyncio.to_thread(self.call, rng, stats)
+        return stats
+
+    def run_threads(self, concurrency: int, deadline: float, seed: int) -> list[Stats]:
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            futures = [
+                executor.submit(self.worker, deadline, seed + i)
+                for i in range(concurrency)
+            ]
+            return [f.result() for f in futures]
+
+    async def run_tasks(
+        self, concurrency: int, deadline: float, seed: int
+    ) -> list[Stats]:
+        # the default executor would otherwise cap concurrency at min(32, CPUs + 4)
+        with ThreadPoolExecutor(max_workers=concurrency) as executor:
+            asyncio.get_running_loop().set_default_executor(executor)
+            return await asyncio.gather(
+                *(self.async_worker(deadline, seed + i) for i in range(concurrency))
+            )
+
+    def run(
+        self,
+        concurrency: int = 8,
+        duration: float = 10.0,
+        client: str = "sync",
+        seed: int = 0,
+    ) -> "Report":
+        """Run `concurrency` workers for `duration` seconds with a sync (thread) or
+        async (asyncio task) client.
+        """
+        start, cpu_start = time.monotonic(), time.process_time()
+        deadline = start + duration
+        if client == "async":
+            results = asyncio.run(self.run_tasks(concurrency, deadline, seed))
+        else:
+            results = self.run_threads(concurrency, deadline, seed)
+        operations: Stats = defaultdict(OperationStats)
+        for stats in results:
+            for name, operation_stats in stats.items():
+                operations[name].merge(operation_stats)
+        return Report(
+            dict(operations),
+            elapsed=time.monotonic() - start,
+            cpu_time=time.process_time() - cpu_start,
+            concurrency=concurrency,
+            client=client,
+        )
+
+
+class Report(object):
+    def __init__(
+        self,
+        operations: Stats,
+        elapsed: float,
+        cpu_time: float,
+        concurrency: int,
+        client: str,
+    ) -> None:
+        self.operations = operations
+        self.elapsed = elapsed
+        self.cpu_time = cpu_time
+        self.concurrency = concurrency
+        self.client = client
+
+    def total(self) -> OperationStats:
+        total = OperationStats()
+        for stats in self.operations.values():
+            total.merge(stats)
+        return total
+
+    def summary(self) -> dict[str, Any]:
+        total = self.total()
+        return {
+            "client": self.client,
+            "concurrency": self.concurrency,
+            "elapsed": self.elapsed,
+            "cpu_ms_per_request": (
+                self.cpu_time / total.requests * 1000 if total.requests else math.nan
+            ),
+            "operations": {
+                name: stats.summary(self.elapsed)
+                for name, stats in sorted(self.operations.items())
+            },
+            "total": total.summary(self.elapsed),
+        }
+
+    def table(self) -> str:
+        summary = self.summary()
+        rows = [*summary["operations"].items(), ("total", summary["total"])]
+        lines = [
+            f"{'operation':<20} {'requests':>9} {'errors':>7} {'req/s':>9} "
+            f"{'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}"
+        ]
+        for name, row in rows:
+            lines.append(
+                f"{name:<20} {row['requests']:>9} {sum(row['errors'].values()):>7} "
+                f"{row['throughput']:>9.1f} {row['p50_ms']:>9.2f} "
+                f"{row['p95_ms']:>9.2f} {row['p99_ms']:>9.2f}"
+            )
+        lines.append(
+            f"\n{summary['client']} client, concurrency {summary['concurrency']}, "
+            f"{summary['elapsed']:.1f}s, "
+            f"{summary['cpu_ms_per_request']:.3f} CPU ms/request"
+        )
+        errors = Counter[str]()
+        for row in summary["operations"].values():
+            errors.update(row["errors"])
+        lines += [f"{count} x {name}" for name, count in errors.most_common()]
+        return "\n".join(lines)
+
+    def json(self) -> str:
+        return json.dumps(self.summary(), indent=2)
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("--server-url", help="e.g. http://localhost:8000")
+    parser.add_argument(
+        "--token",
+        default=os.environ.get("COMPANYCAM_TOKEN"),
+        help="access token (default: $COMPANYCAM_TOKEN)",
+    )
+    parser.add_argument(
+        "--stand-in",
+        action="store_true",
+        help="run against an in-process companycam.v2.server.StandInServer",
+    )
+    parser.add_argument(
+        "--stand-in-latency",
+        type=float,
+        default=0.0,
+        help="seconds added to each stand-in response",
+    )
+    parser.add_argument(
+        "--mix",
+        default=DEFAULT_MIX,
+        help=f"weights by operation (default: {DEFAULT_MIX}), operations: "
+        + ", ".join(OPERATIONS),
+    )
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=10.0, help="seconds")
+    parser.add_argument("--client", choices=["sync", "async"], default="sync")
+    parser.add_argument("--format", choices=["table", "json"], default="table")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="also report client time per manager method and phase",
+    )
+    parser.add_argument(
+        "--trace-allocations",
+        action="store_true",
+        help="with --profile, measure memory allocated per phase (slow)",
+    )
+
+
+def make_transport(args: argparse.Namespace) -> httpx.BaseTransport:
+    if args.stand_in:
+        from companycam.v2.server import StandInServer, Store
+
+        server = StandInServer(Store.generate(), latency=args.stand_in_latency)
+        return httpx.WSGITransport(app=server.wsgi)  # type: ignore[arg-type]
+    # share one connection pool between workers
+    limits = httpx.Limits(
+        max_connections=args.concurrency, max_keepalive_connections=args.concurrency
+    )
+    return httpx.HTTPTransport(limits=limits)
+
+
+def main(args: argparse.Namespace) -> None:
+    mix = parse_mix(args.mix)
+    if not args.stand_in and not (args.server_url and args.token):
+        raise SystemExit("bench: --server-url and --token (or --stand-in) required")
+    transport = make_transport(args)
+    profiler = Profiler(args.trace_allocations) if args.profile else None
+    try:
+        api = API(
+            token=args.token or "ANY_TOKEN",
+            server_url="http://stand-in" if args.stand_in else args.server_url,
+            transport=transport,
+            profiler=profiler,
+        )
+        with profiler or contextlib.nullcontext():
+            report = Workload(api, mix).run(
+                args.concurrency, args.duration, args.client, args.seed
+            )
+    finally:
+        transport.close()
+    if args.format == "json":
+        summary = report.summary()
+        if profiler:
+            summary["profile"] = profiler.summary()
+        print(json.dumps(summary, indent=2))
+    else:
+        print(report.table())
+        if profiler:
+            print(f"\n{profiler.table()}")
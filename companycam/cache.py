@@ -0,0 +1,207 @@
+"""
+Persistent cache for GET responses, which survives restarts and can be shared between
+processes:
+
+```py
+cache = SQLiteCache("companycam.sqlite", ttl=3600, ttls={"/photos": 60})
+api = companycam.API(token="YOUR_ACCESS_TOKEN", cache=cache)
+```
+
+Entries are keyed by access token, method and URL (including query), so API objects
+with different access tokens never share entries. Writes (POST/PUT/DELETE) made
+through an `API` object invalidate cached GET responses for the written URL and its
+parent URLs e.g. `PUT /projects/123` invalidates `GET /projects/123` and
+`GET /projects?page=2`.
+"""
+
+import hashlib
+import sqlite3
+import threading
+import time
+import zlib
+from collections.abc import Mapping
+from os import PathLike
+from typing import Any
+
+import httpx
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    scope TEXT NOT NULL,
+    path TEXT NOT NULL,
+    status_code INTEGER NOT NULL,
+    body BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    expires_at REAL NOT NULL,
+    accessed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS responses_scope_path ON responses (scope, path);
+CREATE INDEX IF NOT EXISTS responses_accessed_at ON responses (accessed_at);
+"""
+
+
+def token_scope(auth: httpx.Auth | None) -> str:
+    """Hash the access token so it isn't stored in the cache."""
+    token = getattr(auth, "token", "")
+    return hashlib.sha256(token.encode()).hexdigest()[:32]
+
+
+def parent_paths(path: str) -> list[str]:
+    """e.g. `/v2/projects/123/notepad` -> `/v2/projects/123/notepad`,
+    `/v2/projects/123`, `/v2/projects`, `/v2`
+    """
+    parts = path.rstrip("/").split("/")
+    return ["/".join(parts[:i]) for i in range(len(parts), 1, -1)]
+
+
+class SQLiteCache(object):
+    """
+    **Parameters:**
+
+    * **path** - Path to the SQLite database file (created if it doesn't exist).
+    * **ttl** - *(optional)* Default number of seconds responses are cached for.
+    * **ttls** - *(optional)* Number of seconds responses are cached for, per endpoint,
+    keyed by the URL used in manager paths e.g. `{"/projects/{project}": 60}`. A TTL of
+    `0` disables caching for that endpoint.
+    * **max_size** - *(optional)* Maximum total size (in bytes) of compressed response
+    bodies. Least recently used entries are evicted first.
+    * **compress_level** - *(optional)* zlib compression level.
+    """
+
+    def __init__(
+        self,
+        path: str | PathLike,
+        ttl: float = 300,
+        ttls: Mapping[str, float] | None = None,
+        max_size: int = 100 * 1024 * 1024,
+        compress_level: int = 6,
+    ) -> None:
+        self.path = path
+        self.ttl = ttl
+        self.ttls = dict(ttls or {})
+        self.max_size = max_size
+        self.compress_level = compress_level
+        self._lock = threading.Lock()
+        self._connection = sqlite3.connect(
+            path, check_same_thread=False, isolation_level=None
+        )
+        self._connection.execute("PRAGMA journal_mode=WAL")
+        self._connection.executescript(SCHEMA)
+
+    def __getstate__(self) -> dict[str, Any]:
+        # a copy in another process opens its own connection to the same database
+        return {
+            "path": self.path,
+            "ttl": self.ttl,
+            "ttls": self.ttls,
+            "max_size": self.max_size,
+            "compress_level": self.compress_level,
+        }
+
+    def __setstate__(self, state: dict[str, Any]) -> None:
+        self.__init__(**state)  # type: ignore[misc]
+
+    def send(
+        self, client: httpx.Client, request: httpx.Request, endpoint: str
+    ) -> httpx.Response:
+        """Send a request with `client`, unless a cached response can be used.
+
+        `endpoint` is the URL used in the manager path e.g. `/projects/{project}`.
+        """
+        scope = token_scope(client.auth)
+        if request.method != "GET":
+            response = client.send(request)
+            self.invalidate(scope, request.url.path)
+            return response
+        key = self.key(scope, request)
+        if cached := self.get(key):
+            status_code, body = cached
+            return httpx.Response(
+                status_code,
+                content=body,
+                headers={"content-type": "application/json"},
+                request=request,
+            )
+        response = client.send(request)
+        ttl = self.ttls.get(endpoint, self.ttl)
+        if response.status_code == 200 and ttl > 0:
+            self.set(key, scope, request.url.path, response, ttl)
+        return response
+
+    def key(self, scope: str, request: httpx.Request) -> str:
+        return hashlib.sha256(
+            f"{scope} {request.method} {request.url}".encode()
+        ).hexdigest()
+
+    def get(self, key: str) -> tuple[int, bytes] | None:
+        now = time.time()
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT status_code, body FROM responses WHERE key = ? AND expires_at > ?",
+                (key, now),
+            ).fetchone()
+            if row is None:
+                return None
+            self._connection.execute(
+                "UPDATE responses SET accessed_at = ? WHERE key = ?", (now, key)
+            )
+        return row[0], zlib.decompress(row[1])
+
+    def set(
+        self, key: str, scope: str, path: str, response: httpx.Response, ttl: float
+    ) -> None:
+        body = zlib.compress(response.content, self.compress_level)
+        now = time.time()
+        with self._lock:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    key,
+                    scope,
+                    path,
+                    response.status_code,
+                    body,
+                    len(body),
+                    now + ttl,
+                    now,
+                ),
+            )
+            self._evict()
+
+    def _evict(self) -> None:
+        (size,) = self._connection.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM responses"
+        ).fetchone()
+        if size <= self.max_size:
+            return
+        rows = self._connection.execute(
+            "SELECT key, size FROM responses ORDER BY accessed_at"
+        ).fetchall()
+        evict = []
+        for key, row_size in rows:
+            if size <= self.max_size:
+                break
+            evict.append((key,))
+            size -= row_size
+        self._connection.executemany("DELETE FROM responses WHERE key = ?", evict)
+
+    def invalidate(self, scope: str, path: str) -> None:
+        with self._lock:
+            self._connection.executemany(
+                "DELETE FROM responses WHERE scope = ? AND path = ?",
+                [(scope, p) for p in parent_paths(path)],
+            )
+
+    def purge_expired(self) -> None:
+        with self._lock:
+            self._connection.execute(
+                "DELETE FROM responses WHERE expires_at <= ?", (time.time(),)
+            )
+
+    def clear(self) -> None:
+        with self._lock:
+            self._connection.execute("DELETE FROM responses")
+
+    def close(self) -> None:
+        self._connection.close()
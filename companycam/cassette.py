@@ -0,0 +1,161 @@
+"""
+Record real API traffic to a cassette file and replay it later without a network, e.g.
+to profile or benchmark the client against realistic traffic:
+
+```py
+# record
+with RecordingTransport("session.ndjson.gz") as transport:
+    api = companycam.API(token="YOUR_ACCESS_TOKEN", transport=transport)
+    ...
+
+# replay (with latencies halved)
+api = companycam.API(
+    token="ANY_TOKEN",
+    transport=ReplayTransport("session.ndjson.gz", latency_scale=0.5),
+)
+```
+
+Cassettes are gzipped NDJSON, one request/response pair per line. Authorization (and
+other sensitive) headers are never recorded. Response bodies are recorded as they were
+sent (e.g. still gzip-encoded), so they match their `content-encoding` header when
+replayed.
+"""
+
+import base64
+import gzip
+import hashlib
+import json
+import threading
+import time
+from collections import defaultdict
+from collections.abc import Iterator
+from os import PathLike
+from types import TracebackType
+
+import httpx
+
+SCRUBBED_HEADERS = {"authorization", "cookie", "set-cookie", "proxy-authorization"}
+
+
+def scrub_headers(headers: httpx.Headers) -> dict[str, str]:
+    return {k: v for k, v in headers.items() if k.lower() not in SCRUBBED_HEADERS}
+
+
+def request_key(method: str, raw_path: str, body: bytes) -> str:
+    """Requests are matched on method, path (with query) and body."""
+    return f"{method} {raw_path} {hashlib.sha256(body).hexdigest()[:16]}"
+
+
+def read_cassette(path: str | PathLike) -> Iterator[dict]:
+    with gzip.open(path, "rt") as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+class CassetteMiss(LookupError):
+    """No recorded response matches the request"""
+
+
+class RecordingTransport(httpx.BaseTransport):
+    """Sends requests through `transport` and records each request/response pair."""
+
+    def __init__(
+        self, path: str | PathLike, transport: httpx.BaseTransport | None = None
+    ) -> None:
+        self.transport = transport or httpx.HTTPTransport()
+        self._file = gzip.open(path, "at")
+        self._lock = threading.Lock()
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        start = time.monotonic()
+        response = self.transport.handle_request(request)
+        # the raw stream rather than `read()`, which would decode the body
+        body = b"".join(response.stream)  # type: ignore[arg-type]
+        response.close()
+        elapsed = time.monotonic() - start
+        entry = {
+            "method": request.method,
+            "url": str(request.url),
+            "raw_path": request.url.raw_path.decode("ascii"),
+            "request_headers": scrub_headers(request.headers),
+            "request_body": base64.b64encode(request.read()).decode("ascii"),
+            "status_code": response.status_code,
+            "headers": scrub_headers(response.headers),
+            "body": base64.b64encode(body).decode("ascii"),
+            "elapsed": elapsed,
+        }
+        with self._lock:
+            self._file.write(json.dumps(entry, separators=(",", ":")) + "\n")
+        # the raw stream has been consumed, so it's replaced by the recorded body
+        return httpx.Response(
+            response.status_code,
+            headers=response.headers,
+            content=body,
+            request=request,
+            extensions=response.extensions,
+        )
+
+    def close(self) -> None:
+        with self._lock:
+            self._file.close()
+        self.transport.close()
+
+    def __enter__(self) -> "RecordingTransport":
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None = None,
+        exc_value: BaseException | None = None,
+        traceback: TracebackType | None = None,
+    ) -> None:
+        self.close()
+
+
+class ReplayTransport(httpx.BaseTransport):
+    """Serves recorded responses instead of sending requests.
+
+    Responses to repeated requests are served in the order they were recorded, then
+    (if `loop` is `True`) from the start again. Each response is delayed by its
+    recorded latency multiplied by `latency_scale` (`0` disables delays).
+    """
+
+    def __init__(
+        self, path: str | PathLike, latency_scale: float = 1.0, loop: bool = True
+    ) -> None:
+        self.latency_scale = latency_scale
+        self.loop = loop
+        self.entries: dict[str, list[dict]] = defaultdict(list)
+        for entry in read_cassette(path):
+            key = request_key(
+                entry["method"],
+                entry["raw_path"],
+                base64.b64decode(entry["request_body"]),
+            )
+            self.entries[key].append(entry)
+        self._positions: dict[str, int] = defaultdict(int)
+        self._lock = threading.Lock()
+
+    def _next_entry(self, key: str) -> dict:
+        with self._lock:
+            entries = self.entries.get(key)
+            position = self._positions[key]
+            if not entries or (position >= len(entries) and not self.loop):
+                raise CassetteMiss(f"No recorded response for '{key}'")
+            self._positions[key] = position + 1
+            return entries[position % len(entries)]
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        key = request_key(
+            request.method, request.url.raw_path.decode("ascii"), request.read()
+        )
+        entry = self._next_entry(key)
+        if delay := entry["elapsed"] * self.latency_scale:
+            time.sleep(delay)
+        return httpx.Response(
+            entry["status_code"],
+            headers=entry["headers"],
+            content=base64.b64decode(entry["body"]),
+            request=request,
+        )
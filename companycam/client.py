@@ -3,9 +3,36 @@ from collections.abc import Callable, Mapping
 
 import httpx
 
+from companycam.cache import SQLiteCache
+from companycam.identity import IdentityMap
+from companycam.profiler import Profiler
+from companycam.singleflight import SingleFlight
+from companycam.types import TimeoutTypes
+
 EventHook = Callable[..., typing.Any]
 EventHooks = Mapping[str, list[EventHook]]
 
+# the same as HTTPX's default
+DEFAULT_TIMEOUT = httpx.Timeout(5.0)
+
+
+class SharedTransport(httpx.BaseTransport):
+    """Allows a transport (and its connection pool) to be shared between clients.
+
+    `httpx.Client` closes its transport when it exits, which would close the
+    connection pool after every request made by `LazyClient`. Closing is instead left
+    to whoever owns the wrapped transport.
+    """
+
+    def __init__(self, transport: httpx.BaseTransport) -> None:
+        self.transport = transport
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        return self.transport.handle_request(request)
+
+    def close(self) -> None:
+        pass
+
 
 class LazyClient(object):
     """Thin wrapper around `httpx.Client`.
@@ -27,11 +54,47 @@ class LazyClient(object):
         headers: Mapping | None = None,
         event_hooks: EventHooks | None = None,
         base_url: str = "",
+        single_flight: SingleFlight | None = None,
+        transport: httpx.BaseTransport | None = None,
+        cache: SQLiteCache | None = None,
+        identity_map: IdentityMap | None = None,
+        timeout: TimeoutTypes = DEFAULT_TIMEOUT,
+        priority: str | None = None,
+        profiler: Profiler | None = None,
     ) -> None:
         self.auth = auth
         self.headers = httpx.Headers(headers) if headers else headers
         self.event_hooks = event_hooks
         self.base_url = httpx.URL(base_url)
+        # if set, identical GET requests which are in flight at the same time share one
+        # HTTP exchange and one parsed result (see `BaseRequest.send()`)
+        self.single_flight = single_flight
+        # if set, all clients send requests through this (shared) transport
+        self.transport = transport
+        # if set, GET responses are cached and writes invalidate cached responses
+        self.cache = cache
+        # if set, models in return data are deduplicated and their strings interned
+        self.identity_map = identity_map
+        # default timeout for each request, which can be overridden per call or capped
+        # by a deadline (see `companycam.deadlines`)
+        self.timeout = timeout
+        # if set, requests are tagged with this priority class (see
+        # `companycam.pool.PriorityTransport`)
+        self.priority = priority
+        # if set, each call to a manager method is timed phase by phase
+        self.profiler = profiler
+
+    def __getstate__(self) -> dict[str, typing.Any]:
+        # when pickled e.g. for another process, the transport can't be shared, so the
+        # copy sends requests through its own connections (and its single flight,
+        # identity map and profiler start empty, see their `__getstate__()`)
+        return {**self.__dict__, "transport": None}
+
+    def __copy__(self) -> "LazyClient":
+        # copies in the same process share the transport
+        client = object.__new__(type(self))
+        client.__dict__.update(self.__dict__)
+        return client
 
     def make_client(self) -> httpx.Client:
         return httpx.Client(
@@ -39,4 +102,6 @@ class LazyClient(object):
             headers=self.headers,
             event_hooks=self.event_hooks,
             base_url=self.base_url,
+            transport=SharedTransport(self.transport) if self.transport else None,
+            timeout=self.timeout,
         )
@@ -0,0 +1,81 @@
+"""
+Deadlines which span several requests, e.g. to keep your own endpoints within an SLA
+when CompanyCam is slow:
+
+```py
+with deadline(2.5):
+    graph = api.projects.hydrate("12345678", paginate=True)
+```
+
+Every request made in the block, including in threads started by
+`companycam.utils.gather()`, has its timeouts capped to the time remaining. Once the
+deadline has passed, requests raise `DeadlineExceeded` without being sent, so the rest
+of the work stops quickly. A request which times out because of the deadline also
+raises `DeadlineExceeded`. Deadlines can be nested, but an inner deadline can't extend
+an outer one.
+
+HTTPX timeouts apply to each phase of a request (connect, write, read and waiting for
+a connection from the pool), so a request which keeps receiving data can run slightly
+past the deadline.
+"""
+
+import contextvars
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+
+import httpx
+
+# time (from `time.monotonic()`) at which the current deadline passes
+DEADLINE: contextvars.ContextVar[float | None] = contextvars.ContextVar(
+    "companycam.deadline", default=None
+)
+
+
+class DeadlineExceeded(httpx.TimeoutException):
+    """The deadline passed before the request completed"""
+
+    def __init__(self, request: httpx.Request) -> None:
+        super().__init__("Deadline exceeded", request=request)
+
+
+@contextmanager
+def deadline(seconds: float) -> Iterator[float]:
+    """Set a deadline `seconds` from now for the requests made in the block. Yields
+    the deadline as a `time.monotonic()` value.
+    """
+    at = time.monotonic() + seconds
+    if (outer := DEADLINE.get()) is not None:
+        at = min(at, outer)
+    token = DEADLINE.set(at)
+    try:
+        yield at
+    finally:
+        DEADLINE.reset(token)
+
+
+def remaining() -> float | None:
+    """Seconds until the current deadline, or `None` if there isn't a deadline."""
+    if (at := DEADLINE.get()) is None:
+        return None
+    return at - time.monotonic()
+
+
+def exceeded() -> bool:
+    seconds = remaining()
+    return seconds is not None and seconds <= 0
+
+
+def apply_deadline(request: httpx.Request) -> None:
+    """Cap a request's timeouts to the time remaining, or raise `DeadlineExceeded` if
+    the deadline has passed.
+    """
+    if (seconds := remaining()) is None:
+        return
+    if seconds <= 0:
+        raise DeadlineExceeded(request)
+    timeout = request.extensions.get("timeout") or httpx.Timeout(None).as_dict()
+    request.extensions["timeout"] = {
+        phase: seconds if value is None else min(value, seconds)
+        for phase, value in timeout.items()
+    }
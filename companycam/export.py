@@ -0,0 +1,686 @@
+"""
+Export all projects, and optionally their sub-lists (e.g. photos, comments), to files:
+
+```sh
+python -m companycam export ./export --token YOUR_ACCESS_TOKEN \\
+    --include photos,comments,documents,labels,assigned_users --concurrency 16
+```
+
+Each resource is written to `<resource>.ndjson.gz` (or with `--format parquet`,
+`<resource>-<part>.parquet` files, which requires pyarrow:
+`python -m pip install "companycam-unofficial[parquet]"`). Records of sub-lists have a
+`project_id` field.
+
+Pages are fetched concurrently and written by a dedicated writer thread. With
+`--processes N`, pages are decoded and validated in `N` worker processes. Pages of each
+list are fetched one at a time until a full page is returned, then several at a time.
+The writer records which pages have been written in `checkpoint.json`, so running the
+same command again resumes an interrupted export without fetching those pages again
+(pages written in the last `--checkpoint-interval` seconds before an interruption,
+even by a process which was killed, are removed and fetched again). Memory use does not depend on the size of the company: only a
+bounded number of pages are in flight or queued for writing at once.
+"""
+
+import argparse
+import contextlib
+import contextvars
+import gzip
+import json
+import os
+import queue
+import sys
+import threading
+import time
+import typing
+from collections.abc import Callable, Iterable
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from pathlib import Path
+from typing import Any, Protocol
+
+import httpx
+
+from companycam.api import API
+from companycam.models import Model
+from companycam.pagination import page_query
+from companycam.parallel import ParallelDecoder, fetch_content
+
+if typing.TYPE_CHECKING:
+    import pyarrow
+
+CHECKPOINT_FILE = "checkpoint.json"
+PROJECTS = "projects"
+
+Record = dict[str, Any]
+
+
+class Checkpoint(object):
+    """Which pages of each list have been written, by list key e.g. "projects" or
+    "12345678/photos" (the photos of project 12345678).
+
+    Once a page of projects and all of its projects' sub-lists have been written, the
+    page is recorded as complete and its sub-lists are forgotten, so the checkpoint
+    stays small. The size of each resource's NDJSON file is recorded too, so a resumed
+    export can remove anything written after the checkpoint.
+    """
+
+    def __init__(self, path: str | os.PathLike, settings: dict[str, Any]) -> None:
+        self.path = Path(path)
+        self.settings = settings
+        self.lists: dict[str, dict[str, Any]] = {}
+        self.complete_project_pages: set[int] = set()
+        self.sizes: dict[str, int] = {}
+        self._lock = threading.Lock()
+        if self.path.exists():
+            self._load()
+
+    def _load(self) -> None:
+        data = json.loads(self.path.read_text())
+        if data["settings"] != self.settings:
+            raise ValueError(
+                f"{self.path} was written by an export with different settings "
+                f"({data['settings']}), use another output directory"
+            )
+        self.lists = data["lists"]
+        self.complete_project_pages = set(data["complete_project_pages"])
+        self.sizes = data["sizes"]
+
+    def written_pages(self, key: str) -> set[int]:
+        with self._lock:
+            return set(self.lists.get(key, {}).get("pages", []))
+
+    def last_page(self, key: str) -> int | None:
+        with self._lock:
+            return self.lists.get(key, {}).get("last_page")
+
+    def is_complete(self, key: str) -> bool:
+        last_page = self.last_page(key)
+        return last_page is not None and self.written_pages(key) >= set(
+            range(1, last_page + 1)
+        )
+
+    def mark_written(self, key: str, page: int, last: bool) -> None:
+        with self._lock:
+            entry = self.lists.setdefault(key, {"pages": [], "last_page": None})
+            entry["pages"].append(page)
+            if last and (entry["last_page"] is None or page < entry["last_page"]):
+                entry["last_page"] = page
+
+    def mark_project_page_complete(self, page: int, keys: Iterable[str]) -> None:
+        with self._lock:
+            self.complete_project_pages.add(page)
+            for key in keys:
+                self.lists.pop(key, None)
+
+    def mark_flushed(self, resource: str, size: int) -> None:
+        with self._lock:
+            self.sizes[resource] = size
+
+    def save(self) -> None:
+        with self._lock:
+            data = {
+                "settings": self.settings,
+                "lists": self.lists,
+                "complete_project_pages": sorted(self.complete_project_pages),
+                "sizes": dict(self.sizes),
+            }
+        # replace atomically so an interruption can't leave a partial checkpoint
+        tmp_path = self.path.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps(data, separators=(",", ":")))
+        os.replace(tmp_path, self.path)
+
+
+class Sink(Protocol):
+    def write(self, records: list[Record]) -> None: ...
+
+    def flush(self) -> int | None:
+        """Make everything written so far durable (called before checkpoints),
+        returning the size of the file to truncate to when resuming, if any.
+        """
+
+    def close(self) -> None: ...
+
+
+class NDJSONSink(object):
+    """Appends records to a gzipped NDJSON file. Each `flush()` finishes a gzip member
+    (gzip readers read consecutive members as one stream) and returns the size of the
+    file. Pass the size saved in the checkpoint as `size` to remove anything written
+    after the checkpoint, e.g. a member left unfinished by a killed process.
+    """
+
+    def __init__(
+        self, path: str | os.PathLike, compress_level: int = 6, size: int = 0
+    ) -> None:
+        self.compress_level = compress_level
+        self._file = open(path, "a+b")
+        self._file.truncate(size)
+        self._member: gzip.GzipFile | None = None
+
+    def write(self, records: list[Record]) -> None:
+        if self._member is None:
+            self._member = gzip.GzipFile(
+                fileobj=self._file, mode="wb", compresslevel=self.compress_level
+            )
+        self._member.write(
+            "".join(
+                json.dumps(r, separators=(",", ":")) + "\n" for r in records
+            ).encode()
+        )
+
+    def flush(self) -> int:
+        if self._member is not None:
+            # only closes the member, not the file
+            self._member.close()
+            self._member = None
+        self._file.flush()
+        return self._file.seek(0, os.SEEK_END)
+
+    def close(self) -> None:
+        try:
+            if self._member is not None:
+                self._member.close()
+        finally:
+            self._file.close()
+
+
+def import_pyarrow() -> Any:
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError as exc:
+        raise ImportError(
+            "Parquet exports require pyarrow: "
+            "python -m pip install 'companycam-unofficial[parquet]'"
+        ) from exc
+    return pyarrow
+
+
+ARROW_TYPES = {
+    "string": "string",
+    "integer": "int64",
+    "number": "float64",
+    "boolean": "bool_",
+}
+
+
+def arrow_schema(model: type[Model]) -> "pyarrow.Schema":
+    """Columns for a model's fields (and `project_id`). Nested models and lists are
+    stored as JSON strings.
+    """
+    pa = import_pyarrow()
+    properties = model.model_json_schema()["properties"]
+    properties.setdefault("project_id", {"type": "string"})
+    fields = []
+    for name, schema in properties.items():
+        types = {s.get("type") for s in schema.get("anyOf", [schema])} - {"null"}
+        type_name = ARROW_TYPES.get(types.pop()) if len(types) == 1 else None
+        fields.append(pa.field(name, getattr(pa, type_name or "string")()))
+    return pa.schema(fields)
+
+
+class ParquetSink(object):
+    """Writes records to numbered Parquet files, starting a new file after each
+    `flush()` (a Parquet file can only be read once it has been closed). Files are
+    written under a temporary name and renamed once complete.
+    """
+
+    def __init__(
+        self,
+        directory: str | os.PathLike,
+        resource: str,
+        model: type[Model],
+        row_group_size: int = 10_000,
+    ) -> None:
+        self.pa = import_pyarrow()
+        self.directory = Path(directory)
+        self.resource = resource
+        self.schema = arrow_schema(model)
+        self.row_group_size = row_group_size
+        self.rows: list[Record] = []
+        self._writer: Any = None
+        self._path: Path | None = None
+
+    def _next_path(self) -> Path:
+        parts = self.directory.glob(f"{self.resource}-*.parquet")
+        numbers = [int(p.stem.rsplit("-", 1)[1]) for p in parts]
+        return (
+            self.directory
+            / f"{self.resource}-{max(numbers, default=0) + 1:05d}.parquet"
+        )
+
+    def write(self, records: list[Record]) -> None:
+        self.rows += (
+            {
+                k: json.dumps(v) if isinstance(v, (dict, list)) else v
+                for k, v in record.items()
+            }
+            for record in records
+        )
+        if len(self.rows) >= self.row_group_size:
+            self._write_rows()
+
+    def _write_rows(self) -> None:
+        if not self.rows:
+            return
+        if self._writer is None:
+            self._path = self._next_path()
+            self._writer = self.pa.parquet.ParquetWriter(
+                self._path.with_suffix(".tmp"), self.schema
+            )
+        self._writer.write_table(
+            self.pa.Table.from_pylist(self.rows, schema=self.schema)
+        )
+        self.rows = []
+
+    def flush(self) -> None:
+        self._write_rows()
+        if self._writer is not None and self._path is not None:
+            self._writer.close()
+            os.replace(self._path.with_suffix(".tmp"), self._path)
+            self._writer = None
+
+    def close(self) -> None:
+        self.flush()
+
+
+class Writer(object):
+    """Writes records from a bounded queue in a dedicated thread, then runs the
+    callback queued with them (e.g. to update the checkpoint). Sinks are flushed and
+    the checkpoint saved every `checkpoint_interval` seconds.
+    """
+
+    def __init__(
+        self,
+        sinks: dict[str, Sink],
+        checkpoint: Checkpoint,
+        checkpoint_interval: float = 10.0,
+        max_queued: int = 64,
+    ) -> None:
+        self.sinks = sinks
+        self.checkpoint = checkpoint
+        self.checkpoint_interval = checkpoint_interval
+        self.counts = dict.fromkeys(sinks, 0)
+        self.error: BaseException | None = None
+        self._queue: queue.Queue = queue.Queue(maxsize=max_queued)
+        self._saved_at = time.monotonic()
+        self._thread = threading.Thread(
+            target=self._run, name="companycam-export-writer", daemon=True
+        )
+        self._thread.start()
+
+    def put(
+        self,
+        resource: str | None,
+        records: list[Record],
+        done: Callable[[], None] | None = None,
+    ) -> None:
+        """Queue records to write (blocking while the queue is full)."""
+        if self.error is not None:
+            raise self.error
+        self._queue.put((resource, records, done))
+
+    def _run(self) -> None:
+        while (item := self._queue.get()) is not None:
+            # after an error keep draining the queue, so producers never block
+            if self.error is None:
+                try:
+                    self._write(*item)
+                except BaseException as exc:
+                    self.error = exc
+
+    def _write(
+        self,
+        resource: str | None,
+        records: list[Record],
+        done: Callable[[], None] | None,
+    ) -> None:
+        if resource is not None and records:
+            self.sinks[resource].write(records)
+            self.counts[resource] += len(records)
+        if done is not None:
+            done()
+        if time.monotonic() - self._saved_at >= self.checkpoint_interval:
+            self.save()
+
+    def save(self) -> None:
+        for resource, sink in self.sinks.items():
+            if (size := sink.flush()) is not None:
+                self.checkpoint.mark_flushed(resource, size)
+        self.checkpoint.save()
+        self._saved_at = time.monotonic()
+
+    def close(self) -> None:
+        """Write everything queued, save the checkpoint and close the sinks."""
+        self._queue.put(None)
+        self._thread.join()
+        try:
+            if self.error is None:
+                self.save()
+        finally:
+            for sink in self.sinks.values():
+                sink.close()
+        if self.error is not None:
+            raise self.error
+
+
+class PagedList(object):
+    """The pages of one list path, e.g. the photos of one project. Pages after the
+    first short page are never fetched.
+    """
+
+    def __init__(
+        self,
+        key: str,
+        resource: str,
+        method: Callable[..., list],
+        args: tuple = (),
+        skip_pages: Iterable[int] = (),
+        last_page: int | None = None,
+        project_page: int | None = None,
+    ) -> None:
+        self.key = key
+        self.resource = resource
+        self.method = method
+        self.args = args
+        self.skip_pages = set(skip_pages)
+        self.last_page = last_page
+        # the page of projects which this sub-list belongs to
+        self.project_page = project_page
+        self.next_page = 1
+        self.in_flight = 0
+        # fetch one page at a time until a full page is returned
+        self.window = 1
+
+    def _skip(self) -> None:
+        while self.next_page in self.skip_pages:
+            self.next_page += 1
+
+    def take_page(self) -> int | None:
+        """The next page to fetch, if any can be fetched now."""
+        self._skip()
+        if self.in_flight >= self.window or self.exhausted:
+            return None
+        self.in_flight += 1
+        self.next_page += 1
+        return self.next_page - 1
+
+    def page_fetched(self, page: int, full: bool, window: int) -> bool:
+        """Record that a page was fetched. Returns `False` if the page is past the
+        end of the list (pages are fetched speculatively, so it will be empty).
+        """
+        self.in_flight -= 1
+        if full:
+            self.window = window
+        elif self.last_page is None or page < self.last_page:
+            self.last_page = page
+        return self.last_page is None or page <= self.last_page
+
+    @property
+    def exhausted(self) -> bool:
+        self._skip()
+        return self.last_page is not None and self.next_page > self.last_page
+
+    @property
+    def finished(self) -> bool:
+        return self.exhausted and self.in_flight == 0
+
+
+def list_resource_model(method: Callable[..., list]) -> type[Model]:
+    """The model returned in lists by a manager method e.g. `Photo` for
+    `api.projects.list_photos`.
+    """
+    return typing.get_args(method._decorated_by.return_type)[0]  # type: ignore[attr-defined]
+
+
+class Exporter(object):
+    """
+    **Parameters:**
+
+    * **api** - The `API` object to export with.
+    * **directory** - Output directory (created if it doesn't exist).
+    * **include** - *(optional)* Sub-lists of each project to export, see
+    `ProjectsManager.hydrate_include`.
+    * **format** - *(optional)* "ndjson" or "parquet".
+    * **per_page** - *(optional)* Items per page requested.
+    * **max_workers** - *(optional)* Number of pages fetched at once.
+    * **window** - *(optional)* Number of pages of one list fetched at once.
+    * **checkpoint_interval** - *(optional)* Seconds between checkpoints.
+    * **compress_level** - *(optional)* gzip compression level for NDJSON.
+    * **decoder** - *(optional)* A `companycam.parallel.ParallelDecoder` to decode and
+    validate pages in worker processes.
+    """
+
+    def __init__(
+        self,
+        api: API,
+        directory: str | os.PathLike,
+        include: Iterable[str] = (),
+        format: typing.Literal["ndjson", "parquet"] = "ndjson",
+        per_page: int = 100,
+        max_workers: int = 8,
+        window: int = 4,
+        checkpoint_interval: float = 10.0,
+        compress_level: int = 6,
+        decoder: ParallelDecoder | None = None,
+    ) -> None:
+        self.api = api
+        self.directory = Path(directory)
+        self.include = sorted(set(include))
+        if unknown := set(self.include) - api.projects.hydrate_include.keys():
+            raise ValueError(f"Cannot include: {', '.join(sorted(unknown))}")
+        self.format = format
+        self.per_page = per_page
+        self.max_workers = max_workers
+        self.window = window
+        self.checkpoint_interval = checkpoint_interval
+        self.compress_level = compress_level
+        self.decoder = decoder
+
+    def make_sink(self, resource: str, method: Callable[..., list]) -> Sink:
+        if self.format == "parquet":
+            return ParquetSink(self.directory, resource, list_resource_model(method))
+        return NDJSONSink(
+            self.directory / f"{resource}.ndjson.gz",
+            self.compress_level,
+            self.checkpoint.sizes.get(resource, 0),
+        )
+
+    def sublist_method(self, resource: str) -> Callable[..., list]:
+        return getattr(self.api.projects, self.api.projects.hydrate_include[resource])
+
+    def fetch(self, paged_list: PagedList, page: int) -> list[Record]:
+        query = page_query(None, page, self.per_page)
+        if self.decoder:
+            # decoded and validated in a worker, which sends back only the records
+            content = fetch_content(paged_list.method, *paged_list.args, query=query)
+            return_type = paged_list.method._decorated_by.return_type  # type: ignore[attr-defined]
+            future = self.decoder.submit(return_type, content, records=True)
+            records = future.result()
+        else:
+            items = paged_list.method(*paged_list.args, query=query)
+            records = [item.model_dump() for item in items]
+        if paged_list.key != PROJECTS:
+            for record in records:
+                record.setdefault("project_id", paged_list.args[0])
+        return records
+
+    def run(self) -> dict[str, int]:
+        """Export everything not already exported, returning the number of records
+        written by resource.
+        """
+        self.directory.mkdir(parents=True, exist_ok=True)
+        settings = {
+            "format": self.format,
+            "include": self.include,
+            "per_page": self.per_page,
+        }
+        self.checkpoint = Checkpoint(self.directory / CHECKPOINT_FILE, settings)
+        sinks = {
+            PROJECTS: self.make_sink(PROJECTS, self.api.projects.list),
+            **{r: self.make_sink(r, self.sublist_method(r)) for r in self.include},
+        }
+        self.writer = Writer(sinks, self.checkpoint, self.checkpoint_interval)
+        # sub-lists being fetched, and their keys by page of projects
+        self.sublists: list[PagedList] = []
+        self.pending_children: dict[int, set[str]] = {}
+        self.children: dict[int, list[str]] = {}
+        self.projects = PagedList(
+            PROJECTS,
+            PROJECTS,
+            self.api.projects.list,
+            skip_pages=self.checkpoint.complete_project_pages,
+            last_page=self.checkpoint.last_page(PROJECTS),
+        )
+        # pages of projects which were written but whose sub-lists weren't finished
+        # are fetched again (for the project IDs), but not written again
+        self.written_project_pages = self.checkpoint.written_pages(PROJECTS)
+        try:
+            self._fetch_all()
+        finally:
+            self.writer.close()
+        return self.writer.counts
+
+    def _fetch_all(self) -> None:
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures: dict[Future, tuple[PagedList, int]] = {}
+            try:
+                while self._submit(executor, futures) or futures:
+                    done, _ = wait(futures, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        paged_list, page = futures.pop(future)
+                        self._on_page(paged_list, page, future.result())
+            finally:
+                for future in futures:
+                    future.cancel()
+
+    def _submit(
+        self, executor: ThreadPoolExecutor, futures: dict[Future, tuple[PagedList, int]]
+    ) -> bool:
+        """Submit pages to fetch, preferring sub-lists of projects already fetched so
+        the number of sub-lists in progress stays bounded.
+        """
+        lists = self.sublists
+        if len(self.sublists) < self.max_workers * self.window:
+            lists = [*self.sublists, self.projects]
+        submitted = False
+        for paged_list in lists:
+            while len(futures) < 2 * self.max_workers and (
+                page := paged_list.take_page()
+            ):
+                # in a copy of the context, so a deadline applies to every page
+                future = executor.submit(
+                    contextvars.copy_context().run, self.fetch, paged_list, page
+                )
+                futures[future] = (paged_list, page)
+                submitted = True
+        return submitted
+
+    def _on_page(self, paged_list: PagedList, page: int, records: list[Record]) -> None:
+        if paged_list.page_fetched(page, len(records) == self.per_page, self.window):
+            if paged_list is self.projects:
+                self._on_projects_page(page, records)
+            else:
+                last = len(records) < self.per_page
+                mark_written = self._mark_written(paged_list.key, page, last)
+                self.writer.put(paged_list.resource, records, mark_written)
+        if paged_list is not self.projects and paged_list.finished:
+            self._on_sublist_finished(paged_list)
+
+    def _mark_written(self, key: str, page: int, last: bool) -> Callable[[], None]:
+        return lambda: self.checkpoint.mark_written(key, page, last)
+
+    def _on_projects_page(self, page: int, records: list[Record]) -> None:
+        if page not in self.written_project_pages:
+            last = len(records) < self.per_page
+            self.writer.put(PROJECTS, records, self._mark_written(PROJECTS, page, last))
+        keys = [f"{r['id']}/{resource}" for r in records for resource in self.include]
+        pending = {key for key in keys if not self.checkpoint.is_complete(key)}
+        for key in pending:
+            project_id, resource = key.split("/")
+            self.sublists.append(
+                PagedList(
+                    key,
+                    resource,
+                    self.sublist_method(resource),
+                    (project_id,),
+                    skip_pages=self.checkpoint.written_pages(key),
+                    last_page=self.checkpoint.last_page(key),
+                    project_page=page,
+                )
+            )
+        self.children[page] = keys
+        self.pending_children[page] = pending
+        self._complete_project_page_if_done(page)
+
+    def _on_sublist_finished(self, paged_list: PagedList) -> None:
+        self.sublists.remove(paged_list)
+        if (page := paged_list.project_page) is not None:
+            self.pending_children[page].discard(paged_list.key)
+            self._complete_project_page_if_done(page)
+
+    def _complete_project_page_if_done(self, page: int) -> None:
+        if not self.pending_children[page]:
+            del self.pending_children[page]
+            keys = self.children.pop(page)
+            self.writer.put(
+                None,
+                [],
+                lambda: self.checkpoint.mark_project_page_complete(page, keys),
+            )
+
+
+def add_arguments(parser: argparse.ArgumentParser) -> None:
+    parser.add_argument("directory", help="output directory")
+    parser.add_argument(
+        "--token",
+        default=os.environ.get("COMPANYCAM_TOKEN"),
+        help="access token (default: $COMPANYCAM_TOKEN)",
+    )
+    parser.add_argument("--server-url")
+    parser.add_argument(
+        "--include",
+        default="",
+        help="comma separated sub-lists of each project to export: "
+        "photos, assigned_users, labels, documents, comments, collaborators, "
+        "invitations (or 'all')",
+    )
+    parser.add_argument("--format", choices=["ndjson", "parquet"], default="ndjson")
+    parser.add_argument("--per-page", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--checkpoint-interval", type=float, default=10.0)
+    parser.add_argument("--compress-level", type=int, default=6)
+    parser.add_argument(
+        "--processes",
+        type=int,
+        default=0,
+        help="number of worker processes to decode and validate pages in "
+        "(default: decode in the fetching threads)",
+    )
+
+
+def main(args: argparse.Namespace) -> None:
+    if not args.token:
+        raise SystemExit("export: --token (or $COMPANYCAM_TOKEN) required")
+    decoder = ParallelDecoder(args.processes) if args.processes else None
+    with (
+        httpx.HTTPTransport(
+            limits=httpx.Limits(max_connections=args.concurrency)
+        ) as transport,
+        decoder or contextlib.nullcontext(),
+    ):
+        api = API(token=args.token, server_url=args.server_url, transport=transport)
+        include = [r.strip() for r in args.include.split(",") if r.strip()]
+        if include == ["all"]:
+            include = list(api.projects.hydrate_include)
+        counts = Exporter(
+            api,
+            args.directory,
+            include=include,
+            format=args.format,
+            per_page=args.per_page,
+            max_workers=args.concurrency,
+            checkpoint_interval=args.checkpoint_interval,
+            compress_level=args.compress_level,
+            decoder=decoder,
+        ).run()
+    for resource, count in counts.items():
+        print(f"{resource}: {count} records written", file=sys.stderr)
@@ -0,0 +1,94 @@
+"""
+Reduce the memory used by long-running crawls, in which the same entities and strings
+are returned again and again:
+
+```py
+api = companycam.API(token="YOUR_ACCESS_TOKEN", identity_map=IdentityMap())
+```
+
+Models returned by an `API` object with an identity map are deduplicated: any model
+with the same type, `id` and `updated_at` as one which is still referenced is replaced
+by that instance (including nested models e.g. `Group.users`), so `is` can be used to
+compare them. Repeated reference and enum strings (e.g. `company_id`, `creator_type`,
+`status`) are interned, so each distinct value is only stored once. Models' own `id`s
+aren't, since every `id` which was ever returned would then be kept.
+
+Since instances are shared, modifying a model modifies it everywhere it was returned.
+"""
+
+import threading
+import weakref
+from typing import Any
+
+import pydantic
+
+from companycam.models import ModelWithRequiredID
+
+INTERNED_FIELDS = {"status", "processing_status", "type", "creator_name"}
+INTERNED_FIELD_SUFFIXES = ("_id", "_type")
+
+
+def should_intern(field_name: str) -> bool:
+    return field_name in INTERNED_FIELDS or field_name.endswith(INTERNED_FIELD_SUFFIXES)
+
+
+class IdentityMap(object):
+    def __init__(self) -> None:
+        self.strings: dict[str, str] = {}
+        # instances are only kept while they are referenced elsewhere
+        self.instances: weakref.WeakValueDictionary[tuple, ModelWithRequiredID] = (
+            weakref.WeakValueDictionary()
+        )
+        self._lock = threading.RLock()
+
+    def __getstate__(self) -> dict[str, Any]:
+        # instances are only deduplicated within a process
+        return {}
+
+    def __setstate__(self, state: dict[str, Any]) -> None:
+        self.__init__()  # type: ignore[misc]
+
+    def intern(self, value: str) -> str:
+        return self.strings.setdefault(value, value)
+
+    def apply(self, data: Any) -> Any:
+        """Deduplicate models (in lists or nested in other models) and intern their
+        strings. Returns `data` with any duplicate models replaced.
+        """
+        with self._lock:
+            return self._apply(data)
+
+    def _apply(self, data: Any) -> Any:
+        if isinstance(data, list):
+            return [self._apply(item) for item in data]
+        elif isinstance(data, pydantic.BaseModel):
+            return self._apply_model(data)
+        return data
+
+    def _apply_model(self, model: pydantic.BaseModel) -> pydantic.BaseModel:
+        key = self.key(model)
+        if key and (existing := self.instances.get(key)) is not None:
+            return existing
+        self._apply_fields(model)
+        if key:
+            self.instances[key] = model  # type: ignore[assignment]
+        return model
+
+    def _apply_fields(self, model: pydantic.BaseModel) -> None:
+        # update `__dict__` directly so fields aren't validated (or marked as changed)
+        fields = model.__dict__
+        for name, value in list(fields.items()):
+            if isinstance(value, str) and should_intern(name):
+                fields[name] = self.intern(value)
+            elif isinstance(value, (list, pydantic.BaseModel)):
+                fields[name] = self._apply(value)
+
+    def key(self, model: pydantic.BaseModel) -> tuple | None:
+        if isinstance(model, ModelWithRequiredID) and model.id is not None:
+            return (type(model), model.id, getattr(model, "updated_at", None))
+        return None
+
+    def clear(self) -> None:
+        with self._lock:
+            self.strings.clear()
+            self.instances.clear()
@@ -2,6 +2,7 @@ import functools
 import inspect
 import logging
 from collections.abc import Callable
+from contextlib import AbstractContextManager, nullcontext
 from string import Formatter
 from typing import Any, Literal
 
@@ -9,11 +10,22 @@ import httpx
 from pydantic import BaseModel, ValidationError
 
 from companycam.client import LazyClient
+from companycam.deadlines import DeadlineExceeded, apply_deadline, exceeded
+from companycam.models import track_changes
 from companycam.utils import parse_obj_as
 
 formatter = Formatter()
 logger = logging.getLogger(__name__)
 
+# key in `httpx.Request.extensions` used to tell transports which manager path sent the
+# request e.g. "GET /projects/{project}"
+ENDPOINT_EXTENSION = "companycam.endpoint"
+# key in `httpx.Request.extensions` for the priority class of a request, see
+# `API.with_priority()`
+PRIORITY_EXTENSION = "companycam.priority"
+# used in place of a profiler's context managers when the client has no profiler
+NOT_PROFILED = nullcontext()
+
 
 class BaseManager(object):
     client: LazyClient
@@ -49,6 +61,13 @@ def format_url(url: str, kwargs: dict) -> str:
     return url.format(**url_kwargs)
 
 
+def request_endpoint(request: httpx.Request) -> str:
+    """Get the manager path which sent a request (falls back to the URL path)."""
+    return request.extensions.get(
+        ENDPOINT_EXTENSION, f"{request.method} {request.url.path}"
+    )
+
+
 def request(**request_dict):
     """All keyword arguments get passed to `httpx.Client.build_request()`.
 
@@ -59,6 +78,19 @@ def request(**request_dict):
     return request_dict
 
 
+class NoRequest(object):
+    def __init__(self, result: Any) -> None:
+        self.result = result
+
+
+def no_request(result: Any) -> Any:
+    """Returned by a manager method instead of `request()` when there is no need to
+    send a request, e.g. an update with nothing to change. `result` is returned to the
+    caller as is.
+    """
+    return NoRequest(result)
+
+
 class BaseRequest(object):
     method: Literal["get", "post", "put", "delete"]
     return_type: type
@@ -71,32 +103,119 @@ class BaseRequest(object):
     def __call__(self, decorated_method: Callable[..., Any]) -> Callable[..., Any]:
         # store decorator object for introspection of decorated_method (e.g. unit tests)
         decorated_method._decorated_by = self  # type: ignore[attr-defined]
+        self.decorated_method = decorated_method
         # store return_type
         self.return_type = decorated_method.__annotations__.get("return")  # type: ignore[assignment]
 
+        # e.g. "ProjectsManager.retrieve"
+        self.name = decorated_method.__qualname__
+
         @functools.wraps(decorated_method)
-        def wrapper(obj, *args, **kwargs):
-            # Call method
-            request_dict = decorated_method(obj, *args, **kwargs)
-            if "url" not in request_dict:
-                # Convert any args to kwargs for format_url
-                url_kwargs = inspect.getcallargs(decorated_method, obj, *args, **kwargs)
-                request_dict["url"] = format_url(self.url, url_kwargs)
-            # Send request
-            with obj.client.make_client() as client:
-                request = client.build_request(self.method, **request_dict)
-                response = client.send(request)
-            # Convert response to return data
-            return self.response_to_return_data(response)
+        def wrapper(obj, *args, timeout=httpx.USE_CLIENT_DEFAULT, **kwargs):
+            profiler = obj.client.profiler
+            with profiler.call(self.name) if profiler else NOT_PROFILED:
+                request_dict = self.build_request_dict(obj, *args, **kwargs)
+                if isinstance(request_dict, NoRequest):
+                    return request_dict.result
+                return self.send(obj.client, request_dict, timeout=timeout)
 
         return wrapper
 
-    def response_to_return_data(self, response: httpx.Response) -> Any:
-        if response.status_code in [200, 201]:
+    def fetch(
+        self, obj: BaseManager, *args, timeout: Any = httpx.USE_CLIENT_DEFAULT, **kwargs
+    ) -> httpx.Response:
+        """Call the decorated method and return the response, without converting it to
+        the return type (e.g. so it can be converted in another process, see
+        `companycam.parallel`).
+        """
+        request_dict = self.build_request_dict(obj, *args, **kwargs)
+        return self.send(obj.client, request_dict, timeout=timeout, convert=False)
+
+    def phase(
+        self, lazy_client: LazyClient | None, phase: str
+    ) -> AbstractContextManager[None]:
+        """Time a phase of a call if the client has a profiler."""
+        if lazy_client is None or lazy_client.profiler is None:
+            return NOT_PROFILED
+        return lazy_client.profiler.phase(self.name, phase)
+
+    def build_request_dict(self, obj: BaseManager, *args, **kwargs) -> Any:
+        # Call method
+        with self.phase(obj.client, "serialize"):
+            request_dict = self.decorated_method(obj, *args, **kwargs)
+        if isinstance(request_dict, NoRequest):
+            return request_dict
+        if "url" not in request_dict:
+            with self.phase(obj.client, "url"):
+                # Convert any args to kwargs for format_url
+                url_kwargs = inspect.getcallargs(
+                    self.decorated_method, obj, *args, **kwargs
+                )
+                request_dict["url"] = format_url(self.url, url_kwargs)
+        return request_dict
+
+    def send(
+        self,
+        lazy_client: LazyClient,
+        request_dict: dict,
+        timeout: Any = httpx.USE_CLIENT_DEFAULT,
+        convert: bool = True,
+    ) -> Any:
+        with lazy_client.make_client() as client:
+            request = client.build_request(self.method, timeout=timeout, **request_dict)
+            request.extensions[ENDPOINT_EXTENSION] = f"{request.method} {self.url}"
+            if lazy_client.priority:
+                request.extensions[PRIORITY_EXTENSION] = lazy_client.priority
+            apply_deadline(request)
             try:
-                return parse_obj_as(self.return_type, response.json())
-            except ValidationError:
-                return response.json()
+                if self.method == "get" and lazy_client.single_flight:
+                    return lazy_client.single_flight.do(
+                        # responses and converted results aren't shared
+                        (request.method, str(request.url), convert),
+                        lambda: self.send_request(
+                            lazy_client, client, request, convert
+                        ),
+                    )
+                return self.send_request(lazy_client, client, request, convert)
+            except httpx.TimeoutException as exc:
+                if exceeded() and not isinstance(exc, DeadlineExceeded):
+                    raise DeadlineExceeded(request) from exc
+                raise
+
+    def send_request(
+        self,
+        lazy_client: LazyClient,
+        client: httpx.Client,
+        request: httpx.Request,
+        convert: bool = True,
+    ) -> Any:
+        with self.phase(lazy_client, "network"):
+            if lazy_client.cache:
+                response = lazy_client.cache.send(client, request, endpoint=self.url)
+            else:
+                response = client.send(request)
+        if not convert:
+            return response
+        # Convert response to return data
+        data = self.response_to_return_data(response, lazy_client)
+        if lazy_client.identity_map:
+            data = lazy_client.identity_map.apply(data)
+        # models start clean (once deduplicated and interned, so the values they're
+        # compared with are the same objects), so only fields changed after this are
+        # dirty
+        return track_changes(data)
+
+    def response_to_return_data(
+        self, response: httpx.Response, lazy_client: LazyClient | None = None
+    ) -> Any:
+        if response.status_code in [200, 201]:
+            with self.phase(lazy_client, "decode"):
+                data = response.json()
+            with self.phase(lazy_client, "validate"):
+                try:
+                    return parse_obj_as(self.return_type, data)
+                except ValidationError:
+                    return data
         elif response.status_code == 204:
             return True
 
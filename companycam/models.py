@@ -2,7 +2,19 @@ from typing import Any
 
 import pydantic
 
-from companycam.utils import PYDANTIC_VERSION
+from companycam.utils import PYDANTIC_VERSION, model_fields_set
+
+# Config is fixed when a class is defined, so aliases are looked up once per class
+# rather than on every attribute access
+ASSIGNMENT_ALIASES: dict[type, dict[str, str]] = {}
+
+
+def get_assignment_aliases(cls: type[pydantic.BaseModel]) -> dict[str, str]:
+    if PYDANTIC_VERSION >= (2, 0, 0):
+        if aliases := cls.model_config.get("assignment_aliases"):
+            return aliases  # type: ignore[return-value]
+        return getattr(getattr(cls, "Config", None), "assignment_aliases", {})
+    return getattr(cls.__config__, "assignment_aliases", {})  # type: ignore[attr-defined]
 
 
 class Model(pydantic.BaseModel):
@@ -12,23 +24,31 @@ class Model(pydantic.BaseModel):
 
     Cannot simply use @property setters with pydantic, see
     https://github.com/pydantic/pydantic/issues/1577.
+
+    Also tracks which fields have been changed since the model was returned by the API
+    (see `dirty_fields`), so updates only send those fields.
     """
 
+    # the values of fields when they were first read or assigned after the model was
+    # marked clean (with lists and dicts copied, so changing them in place is a change).
+    # Other fields can't have changed, so models are marked clean without copying
+    # anything. None if the model never was (i.e. it wasn't returned by the API), in
+    # which case every field which was set is dirty
+    _snapshot: dict[str, Any] | None = pydantic.PrivateAttr(default=None)
+    # objects which the model references by id (e.g. a photo's creator) by relation
+    # name, once resolved by `companycam.v2.relations.Resolver`. Private attributes are
+    # only declared here (not in mixins), since V1 makes each of them a slot and a class
+    # can't have several bases with slots
+    _relations: dict[str, Any] | None = pydantic.PrivateAttr(default=None)
+
     @property
     def _assignment_aliases(self) -> dict:
-        if PYDANTIC_VERSION >= (2, 0, 0):
-            config = super().__getattribute__("model_config")
-            if aliases := config.get("assignment_aliases"):
-                return aliases
-            else:
-                try:
-                    configCls = super().__getattribute__("Config")
-                    return getattr(configCls, "assignment_aliases", {})
-                except AttributeError:
-                    return {}
-        else:
-            config = super().__getattribute__("__config__")
-            return getattr(config, "assignment_aliases", {})
+        # `type()` rather than `self.__class__`, which would recurse via
+        # `__getattribute__`
+        cls = type(self)
+        if (aliases := ASSIGNMENT_ALIASES.get(cls)) is None:
+            aliases = ASSIGNMENT_ALIASES[cls] = get_assignment_aliases(cls)
+        return aliases
 
     def __init__(self, *args, **kwargs) -> None:
         assignment_aliases = super().__getattribute__("_assignment_aliases")
@@ -41,28 +61,177 @@ class Model(pydantic.BaseModel):
         assignment_aliases = super().__getattribute__("_assignment_aliases")
         if name in assignment_aliases:
             name = assignment_aliases[name]
-        return super().__getattribute__(name)
+        value = super().__getattribute__(name)
+        # lists, dicts and models can be changed in place once they have been read
+        if type(value) not in SCALARS and name in super().__getattribute__("__dict__"):
+            record_original(self, name, value)
+        return value
 
     def __setattr__(self, name: str, value: Any) -> None:
         assignment_aliases = super().__getattribute__("_assignment_aliases")
         if name in assignment_aliases:
             name = assignment_aliases[name]
+        if name in (fields := super().__getattribute__("__dict__")):
+            record_original(self, name, fields[name])
         return super().__setattr__(name, value)
 
-    def model_dump(self, *, exclude_none: bool = True, **kwargs) -> dict[str, Any]:
-        if PYDANTIC_VERSION >= (2, 0, 0):
-            return super().model_dump(exclude_none=exclude_none, **kwargs)
-        return super().dict(exclude_none=exclude_none, **kwargs)
+    @property
+    def tracks_changes(self) -> bool:
+        """Whether the model has been marked clean (e.g. it was returned by the API), so
+        only fields which have changed since then are dirty.
+        """
+        return get_snapshot(self) is not None
 
-    @classmethod
-    def model_json_schema(cls, *args, **kwargs) -> dict[str, Any]:
-        if PYDANTIC_VERSION >= (2, 0, 0):
-            return super().model_json_schema(*args, **kwargs)
-        return super().schema(*args, **kwargs)
+    @property
+    def dirty_fields(self) -> set[str]:
+        """Fields which have changed since the model was returned by the API (whether
+        assigned or changed in place), including fields with nested models (or lists of
+        models) which have changed. Every field which was set is dirty if the model
+        wasn't returned by the API.
+        """
+        if (snapshot := get_snapshot(self)) is None:
+            return set(model_fields_set(self))
+        fields = self.__dict__
+        return {
+            name
+            for name, original in snapshot.items()
+            if fields[name] != original or is_dirty(fields[name])
+        }
+
+    def mark_clean(self) -> None:
+        """Mark the model (and any nested models) as unchanged."""
+        fields = self.__dict__
+        # nested models which haven't been read since can't have changed
+        for name in get_snapshot(self) or ():
+            mark_clean(fields[name])
+        set_snapshot(self, {})
 
+    # the Pydantic version is checked once, when the class is defined, rather than on
+    # every call
     if PYDANTIC_VERSION >= (2, 0, 0):
         model_config = pydantic.ConfigDict(coerce_numbers_to_str=True)
 
+        def model_dump(self, *, exclude_none: bool = True, **kwargs) -> dict[str, Any]:
+            return super().model_dump(exclude_none=exclude_none, **kwargs)
+
+        @classmethod
+        def model_json_schema(cls, *args, **kwargs) -> dict[str, Any]:
+            return super().model_json_schema(*args, **kwargs)
+
+        def __eq__(self, other: Any) -> bool:
+            # V2 compares private attributes, but whether fields are dirty or references
+            # have been resolved shouldn't affect equality
+            if not isinstance(other, Model):
+                return super().__eq__(other)
+            return (
+                type(self) is type(other)
+                and self.__dict__ == other.__dict__
+                and compared_private(self) == compared_private(other)
+                and self.__pydantic_extra__ == other.__pydantic_extra__
+            )
+
+    else:
+        # V1 models (unlike V2) can't be weakly referenced without this e.g. by
+        # `companycam.identity.IdentityMap`
+        __slots__ = ("__weakref__",)
+
+        def model_dump(self, *, exclude_none: bool = True, **kwargs) -> dict[str, Any]:
+            return super().dict(exclude_none=exclude_none, **kwargs)
+
+        @classmethod
+        def model_json_schema(cls, *args, **kwargs) -> dict[str, Any]:
+            return super().schema(*args, **kwargs)
+
+
+# field values which can't be changed in place
+SCALARS = frozenset({str, int, float, bool, type(None)})
+
+# `_snapshot` is read and written directly (rather than by attribute access, which goes
+# through `Model.__getattribute__()` and Pydantic's `__getattr__()`/`__setattr__()`),
+# since it's used whenever a field is read
+if PYDANTIC_VERSION >= (2, 0, 0):
+
+    def get_snapshot(model: Model) -> dict[str, Any] | None:
+        return object.__getattribute__(model, "__pydantic_private__")["_snapshot"]
+
+    def set_snapshot(model: Model, snapshot: dict[str, Any]) -> None:
+        object.__getattribute__(model, "__pydantic_private__")["_snapshot"] = snapshot
+
+else:
+
+    def get_snapshot(model: Model) -> dict[str, Any] | None:
+        return object.__getattribute__(model, "_snapshot")
+
+    def set_snapshot(model: Model, snapshot: dict[str, Any]) -> None:
+        object.__setattr__(model, "_snapshot", snapshot)
+
+
+def record_original(model: Model, name: str, value: Any) -> None:
+    """Record the value of a field before it can be changed, if the model tracks
+    changes and it hasn't been recorded yet.
+    """
+    snapshot = get_snapshot(model)
+    if snapshot is not None and name not in snapshot:
+        # a new dict, since copies of the model share the old one
+        set_snapshot(model, {**snapshot, name: copy_containers(value)})
+        track_changes(value)
+
+
+def copy_containers(value: Any) -> Any:
+    """Copy lists and dicts (and those in them), but not the models in them, which
+    track their own changes.
+    """
+    if isinstance(value, list):
+        return [copy_containers(v) for v in value]
+    elif isinstance(value, dict):
+        return {k: copy_containers(v) for k, v in value.items()}
+    return value
+
+
+def mark_clean(data: Any) -> Any:
+    """Mark models (in lists or nested in other models) as unchanged, returning
+    `data`.
+    """
+    if isinstance(data, Model):
+        data.mark_clean()
+    elif isinstance(data, list):
+        for item in data:
+            mark_clean(item)
+    return data
+
+
+def track_changes(data: Any) -> Any:
+    """Mark models (in lists or nested in other models) which don't track changes yet
+    as unchanged, returning `data`. Unlike `mark_clean()`, models which already track
+    changes (e.g. instances shared by an identity map) keep them.
+    """
+    if isinstance(data, Model):
+        if not data.tracks_changes:
+            data.mark_clean()
+    elif isinstance(data, list):
+        for item in data:
+            track_changes(item)
+    return data
+
+
+# private attributes of `Model` which are state kept alongside the data, so aren't
+# compared by `__eq__()`
+UNCOMPARED = frozenset({"_snapshot", "_relations"})
+
+
+def compared_private(model: Model) -> dict[str, Any]:
+    """Private attributes of a V2 model other than those in `UNCOMPARED`."""
+    private = model.__pydantic_private__ or {}
+    return {k: v for k, v in private.items() if k not in UNCOMPARED}
+
+
+def is_dirty(data: Any) -> bool:
+    if isinstance(data, Model):
+        return bool(data.dirty_fields)
+    elif isinstance(data, list):
+        return any(is_dirty(item) for item in data)
+    return False
+
 
 class ModelWithRequiredID(Model):
     # 'id' is a required field in most models where it is a field, but we want users to
@@ -0,0 +1,90 @@
+"""
+Helpers for list paths which are paginated with `page` and `per_page` query parameters
+e.g.
+
+```py
+for photo in paginate(api.projects.list_photos, "12345678", per_page=100):
+    ...
+```
+
+Pass `decoder=` (a `companycam.parallel.ParallelDecoder`) to decode and validate pages
+in worker processes while the next pages are fetched.
+"""
+
+import typing
+from collections.abc import Callable, Iterator
+from typing import Any, TypeVar
+
+import httpx
+
+from companycam.types import QueryParamTypes
+
+if typing.TYPE_CHECKING:
+    from companycam.parallel import ParallelDecoder
+
+T = TypeVar("T")
+
+PER_PAGE = 50
+
+
+def page_query(query: QueryParamTypes | None, page: int, per_page: int) -> dict:
+    params = httpx.QueryParams(query or {}).merge({"page": page, "per_page": per_page})
+    return dict(params.multi_items())
+
+
+def iter_pages(
+    method: Callable[..., list[T]],
+    *args: Any,
+    query: QueryParamTypes | None = None,
+    per_page: int = PER_PAGE,
+    start_page: int = 1,
+    decoder: "ParallelDecoder | None" = None,
+) -> Iterator[list[T]]:
+    """Call a list path (e.g. `api.photos.list`) for each page in turn and yield the
+    pages, stopping after the first page with fewer than `per_page` items.
+    """
+    if decoder:
+        yield from decoder.iter_pages(
+            method, *args, query=query, per_page=per_page, start_page=start_page
+        )
+        return
+    page = start_page
+    while True:
+        items = method(*args, query=page_query(query, page, per_page))
+        if items:
+            yield items
+        if len(items) < per_page:
+            return
+        page += 1
+
+
+def paginate(
+    method: Callable[..., list[T]],
+    *args: Any,
+    query: QueryParamTypes | None = None,
+    per_page: int = PER_PAGE,
+    start_page: int = 1,
+    decoder: "ParallelDecoder | None" = None,
+) -> Iterator[T]:
+    """Like `iter_pages()` but yields items rather than pages."""
+    for page in iter_pages(
+        method,
+        *args,
+        query=query,
+        per_page=per_page,
+        start_page=start_page,
+        decoder=decoder,
+    ):
+        yield from page
+
+
+def list_all(
+    method: Callable[..., list[T]],
+    *args: Any,
+    query: QueryParamTypes | None = None,
+    per_page: int = PER_PAGE,
+    decoder: "ParallelDecoder | None" = None,
+) -> list[T]:
+    return list(
+        paginate(method, *args, query=query, per_page=per_page, decoder=decoder)
+    )
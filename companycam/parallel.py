@@ -0,0 +1,174 @@
+"""
+Decode and validate responses in a pool of worker processes, so a large crawl isn't
+limited to what one core can validate:
+
+```py
+with ParallelDecoder(max_workers=4) as decoder:
+    for photo in paginate(api.photos.list, decoder=decoder):
+        ...
+```
+
+Pages are fetched by the calling thread and their raw response bodies are sent to the
+workers, which decode the JSON and validate it into models. Results come back in page
+order. On free-threaded builds of Python (where threads can run Python code in
+parallel) a thread pool is used instead of processes.
+
+Only the response body and return type are sent to workers, and the models (or with
+`records=True`, plain dicts, which are cheaper to send back) are returned. `API` objects
+can also be pickled e.g. to use them in worker processes, though each copy sends
+requests through its own connections.
+"""
+
+import json
+import sys
+from collections import deque
+from collections.abc import Callable, Iterator
+from concurrent.futures import Executor, Future, ProcessPoolExecutor, ThreadPoolExecutor
+from itertools import islice
+from types import TracebackType
+from typing import Any, TypeVar
+
+from pydantic import ValidationError
+
+from companycam.models import track_changes
+from companycam.pagination import PER_PAGE, page_query
+from companycam.types import QueryParamTypes
+from companycam.utils import parse_obj_as
+
+T = TypeVar("T")
+
+
+def free_threaded() -> bool:
+    """Whether the GIL is disabled (Python 3.13+ free-threaded builds)."""
+    return not getattr(sys, "_is_gil_enabled", lambda: True)()
+
+
+def decode(return_type: Any, content: bytes, records: bool = False) -> Any:
+    """Decode and validate a response body, like a manager method (runs in a
+    worker).
+    """
+    data = json.loads(content)
+    try:
+        models = parse_obj_as(return_type, data)
+    except ValidationError:
+        return data
+    if records:
+        return [item.model_dump() for item in models]
+    return models
+
+
+def fetch_content(method: Callable, *args: Any, **kwargs: Any) -> bytes:
+    """Call a manager method (e.g. `api.photos.list`) and return the response body
+    without decoding it.
+    """
+    return method._decorated_by.fetch(  # type: ignore[attr-defined]
+        method.__self__, *args, **kwargs  # type: ignore[attr-defined]
+    ).content
+
+
+def is_empty_list(content: bytes) -> bool:
+    return len(content) < 16 and b"".join(content.split()) == b"[]"
+
+
+class ParallelDecoder(object):
+    """
+    **Parameters:**
+
+    * **max_workers** - *(optional)* Number of worker processes (or threads).
+    * **executor** - *(optional)* Executor to use instead of creating one. It isn't
+    shut down by the decoder.
+    """
+
+    def __init__(
+        self, max_workers: int | None = None, executor: Executor | None = None
+    ) -> None:
+        self._owns_executor = executor is None
+        if executor is None:
+            pool = ThreadPoolExecutor if free_threaded() else ProcessPoolExecutor
+            executor = pool(max_workers=max_workers)
+        self.executor = executor
+        # also the number of pages fetched ahead of the page being returned
+        self.max_workers = max_workers or getattr(executor, "_max_workers", 4)
+
+    def submit(
+        self, return_type: Any, content: bytes, records: bool = False
+    ) -> "Future[Any]":
+        """Decode and validate a response body in a worker."""
+        return self.executor.submit(decode, return_type, content, records)
+
+    def call(self, method: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        """Call a manager method (e.g. `api.photos.list`), decoding and validating the
+        response in a worker.
+        """
+        content = fetch_content(method, *args, **kwargs)
+        return_type = method._decorated_by.return_type  # type: ignore[attr-defined]
+        return self.returned(method, self.submit(return_type, content).result())
+
+    def iter_pages(
+        self,
+        method: Callable[..., list[T]],
+        *args: Any,
+        query: QueryParamTypes | None = None,
+        per_page: int = PER_PAGE,
+        start_page: int = 1,
+        records: bool = False,
+    ) -> Iterator[list[Any]]:
+        """Like `companycam.pagination.iter_pages()`, but up to `max_workers` pages are
+        fetched ahead and decoded in workers while the next pages are fetched. With
+        `records=True`, pages of dicts (like `model_dump()`) are yielded instead of
+        models.
+        """
+        futures = self._decode_pages(method, args, query, per_page, start_page, records)
+        pending = deque(islice(futures, self.max_workers))
+        try:
+            while pending:
+                items = pending.popleft().result()
+                if items:
+                    yield self.returned(method, items)
+                if len(items) < per_page:
+                    return
+                pending.extend(islice(futures, 1))
+        finally:
+            for future in pending:
+                future.cancel()
+
+    def _decode_pages(
+        self,
+        method: Callable,
+        args: tuple,
+        query: QueryParamTypes | None,
+        per_page: int,
+        page: int,
+        records: bool,
+    ) -> Iterator["Future[Any]"]:
+        """Fetch each page in turn (until an empty page) and submit it to be decoded."""
+        return_type = method._decorated_by.return_type  # type: ignore[attr-defined]
+        while True:
+            query_ = page_query(query, page, per_page)
+            content = fetch_content(method, *args, query=query_)
+            if is_empty_list(content):
+                return
+            yield self.submit(return_type, content, records)
+            page += 1
+
+    def returned(self, method: Callable, data: Any) -> Any:
+        """Apply the client's identity map (if any) to models decoded by a worker, then
+        start tracking their changes, as a manager method does.
+        """
+        identity_map = method.__self__.client.identity_map  # type: ignore[attr-defined]
+        return track_changes(identity_map.apply(data) if identity_map else data)
+
+    def close(self) -> None:
+        if self._owns_executor:
+            self.executor.shutdown(cancel_futures=True)
+
+    def __enter__(self) -> "ParallelDecoder":
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None = None,
+        exc_value: BaseException | None = None,
+        traceback: TracebackType | None = None,
+    ) -> None:
+        self.close()
@@ -0,0 +1,429 @@
+"""
+Share one connection pool between many access tokens e.g. when syncing many
+CompanyCam companies from one process:
+
+```py
+with ClientPool(max_connections=50, max_concurrency=20) as pool:
+    api = pool.api(token="COMPANY_TOKEN", max_concurrency=5, rate_limit=4)
+    api.projects.list()
+```
+
+Each `API` object handed out by the pool has its own auth, but all requests are sent
+through one transport. Requests from each tenant (access token) are limited by the
+tenant's own concurrency and rate budgets, and the pool's concurrency slots are handed
+out to tenants in turn so a busy tenant cannot starve the others.
+
+Requests from one access token can also be prioritised, e.g. so interactive lookups
+aren't stuck behind a background backfill:
+
+```py
+scheduler = PriorityScheduler(rate_limit=4, weights={"interactive": 10, "bulk": 1})
+api = companycam.API(
+    token="YOUR_ACCESS_TOKEN",
+    transport=PriorityTransport(httpx.HTTPTransport(), scheduler),
+)
+interactive_api = api.with_priority("interactive")
+```
+
+Requests share one token bucket. When requests of several priority classes are
+waiting, each class gets a share of the rate in proportion to its weight, so
+interactive requests jump ahead while the backfill still makes progress.
+"""
+
+import threading
+import time
+from collections import deque
+from collections.abc import Mapping
+from types import TracebackType
+
+import httpx
+
+from companycam.api import API
+from companycam.deadlines import DeadlineExceeded, remaining
+from companycam.manager import PRIORITY_EXTENSION
+
+
+class TokenBucket(object):
+    """Blocking token bucket which allows `rate` acquisitions per second on average
+    and bursts of up to `capacity` acquisitions.
+    """
+
+    def __init__(self, rate: float, capacity: float | None = None) -> None:
+        if rate <= 0:
+            raise ValueError("rate must be greater than 0")
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(rate, 1.0)
+        self._tokens = self.capacity
+        self._updated_at = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self._tokens = min(
+            self.capacity, self._tokens + (now - self._updated_at) * self.rate
+        )
+        self._updated_at = now
+
+    def try_acquire(self, tokens: float = 1.0) -> float:
+        """Take tokens if available and return 0, otherwise return the number of
+        seconds to wait before trying again.
+        """
+        with self._lock:
+            self._refill()
+            if self._tokens >= tokens:
+                self._tokens -= tokens
+                return 0.0
+            return (tokens - self._tokens) / self.rate
+
+    def acquire(self, tokens: float = 1.0, timeout: float | None = None) -> bool:
+        """Wait until tokens are taken, returning `False` (straight away) if they
+        wouldn't be available within `timeout` seconds.
+        """
+        until = None if timeout is None else time.monotonic() + timeout
+        while wait := self.try_acquire(tokens):
+            if until is not None and time.monotonic() + wait > until:
+                return False
+            time.sleep(wait)
+        return True
+
+
+class Tenant(object):
+    def __init__(
+        self,
+        name: str,
+        max_concurrency: int | None = None,
+        rate_limit: float | None = None,
+        burst: float | None = None,
+    ) -> None:
+        self.name = name
+        self.max_concurrency = max_concurrency
+        self.bucket = TokenBucket(rate_limit, burst) if rate_limit else None
+        self.in_flight = 0
+        self.waiting: deque[threading.Event] = deque()
+
+    @property
+    def has_capacity(self) -> bool:
+        return self.max_concurrency is None or self.in_flight < self.max_concurrency
+
+
+class FairScheduler(object):
+    """Hands out a fixed number of concurrency slots to tenants in round-robin order.
+
+    Each tenant queues its own waiting requests (FIFO), and when a slot is free the
+    next tenant in turn with a waiting request (and spare concurrency of its own) is
+    granted it.
+    """
+
+    def __init__(self, max_concurrency: int) -> None:
+        self.max_concurrency = max_concurrency
+        self.in_flight = 0
+        self._turns: deque[Tenant] = deque()
+        self._lock = threading.Lock()
+
+    def acquire(self, tenant: Tenant, timeout: float | None = None) -> bool:
+        """Wait until the tenant is granted a slot, returning `False` if `timeout`
+        seconds pass first.
+        """
+        granted = threading.Event()
+        with self._lock:
+            tenant.waiting.append(granted)
+            if tenant not in self._turns:
+                self._turns.append(tenant)
+            self._dispatch()
+        try:
+            in_time = granted.wait(timeout)
+        except BaseException:
+            # interrupted, so the slot is given back if it was granted meanwhile
+            if not self._withdraw(tenant, granted):
+                self.release(tenant)
+            raise
+        # the slot may have been granted just after the timeout
+        return in_time or not self._withdraw(tenant, granted)
+
+    def _withdraw(self, tenant: Tenant, granted: threading.Event) -> bool:
+        """Remove a waiting request, returning `False` if it was already granted."""
+        with self._lock:
+            if granted.is_set():
+                return False
+            tenant.waiting.remove(granted)
+            if not tenant.waiting and tenant in self._turns:
+                self._turns.remove(tenant)
+            return True
+
+    def release(self, tenant: Tenant) -> None:
+        with self._lock:
+            self.in_flight -= 1
+            tenant.in_flight -= 1
+            if tenant.waiting and tenant not in self._turns:
+                self._turns.append(tenant)
+            self._dispatch()
+
+    def _dispatch(self) -> None:
+        # tenants without spare concurrency are dropped from the rotation until they
+        # release a slot
+        while self.in_flight < self.max_concurrency and self._turns:
+            tenant = self._turns.popleft()
+            if not tenant.has_capacity:
+                continue
+            self.in_flight += 1
+            tenant.in_flight += 1
+            tenant.waiting.popleft().set()
+            if tenant.waiting:
+                self._turns.append(tenant)
+
+
+class TenantTransport(httpx.BaseTransport):
+    """Sends a tenant's requests through a shared transport, within the tenant's rate
+    and concurrency budgets.
+    """
+
+    def __init__(
+        self, transport: httpx.BaseTransport, scheduler: FairScheduler, tenant: Tenant
+    ) -> None:
+        self.transport = transport
+        self.scheduler = scheduler
+        self.tenant = tenant
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        # waiting for the budgets is bounded by the deadline (see
+        # `companycam.deadlines`)
+        if self.tenant.bucket and not self.tenant.bucket.acquire(timeout=remaining()):
+            raise DeadlineExceeded(request)
+        if not self.scheduler.acquire(self.tenant, timeout=remaining()):
+            raise DeadlineExceeded(request)
+        try:
+            response = self.transport.handle_request(request)
+            # read the body while holding the slot, which also returns the connection
+            # to the pool
+            response.read()
+            return response
+        finally:
+            self.scheduler.release(self.tenant)
+
+
+class ClientPool(object):
+    """
+    **Parameters:**
+
+    * **max_connections** - *(optional)* Maximum number of connections in the shared
+    connection pool.
+    * **max_concurrency** - *(optional)* Maximum number of requests in flight across
+    all tenants.
+    * **server_url** - *(optional)* Passed to each `API` object.
+    * **transport** - *(optional)* Transport to share instead of creating an
+    `httpx.HTTPTransport`. It will be closed with the pool.
+    """
+
+    def __init__(
+        self,
+        max_connections: int = 100,
+        max_concurrency: int | None = None,
+        server_url: str | None = None,
+        transport: httpx.BaseTransport | None = None,
+    ) -> None:
+        self.transport = transport or httpx.HTTPTransport(
+            limits=httpx.Limits(max_connections=max_connections)
+        )
+        self.scheduler = FairScheduler(max_concurrency or max_connections)
+        self.server_url = server_url
+        self.tenants: dict[str, Tenant] = {}
+        self._apis: dict[str, API] = {}
+        self._lock = threading.Lock()
+
+    def api(
+        self,
+        token: str,
+        max_concurrency: int | None = None,
+        rate_limit: float | None = None,
+        burst: float | None = None,
+        name: str | None = None,
+    ) -> API:
+        """Get the `API` object for an access token, creating it if necessary.
+
+        `rate_limit` is in requests per second and `burst` is the number of requests
+        allowed in a burst. Budgets are only applied when the `API` object is created.
+        """
+        with self._lock:
+            if token not in self._apis:
+                name = name or f"tenant-{len(self.tenants) + 1}"
+                tenant = Tenant(name, max_concurrency, rate_limit, burst)
+                self.tenants[tenant.name] = tenant
+                self._apis[token] = API(
+                    token=token,
+                    server_url=self.server_url,
+                    transport=TenantTransport(self.transport, self.scheduler, tenant),
+                )
+            return self._apis[token]
+
+    def close(self) -> None:
+        self.transport.close()
+
+    def __enter__(self) -> "ClientPool":
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None = None,
+        exc_value: BaseException | None = None,
+        traceback: TracebackType | None = None,
+    ) -> None:
+        self.close()
+
+
+class PriorityClass(object):
+    def __init__(self, name: str, weight: float) -> None:
+        if weight <= 0:
+            raise ValueError("weight must be greater than 0")
+        self.name = name
+        self.weight = weight
+        # waiting requests (FIFO)
+        self.waiting: deque[object] = deque()
+        # virtual time, which advances by `1 / weight` each time the class is served
+        # so classes are served in proportion to their weights
+        self.pass_ = 0.0
+        self.granted = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    @property
+    def queue_depth(self) -> int:
+        return len(self.waiting)
+
+    @property
+    def average_wait(self) -> float:
+        return self.total_wait / self.granted if self.granted else 0.0
+
+    def stats(self) -> dict[str, float]:
+        return {
+            "queue_depth": self.queue_depth,
+            "granted": self.granted,
+            "average_wait": self.average_wait,
+            "max_wait": self.max_wait,
+        }
+
+
+class PriorityScheduler(object):
+    """Grants requests tokens from a shared token bucket by priority class, using
+    weighted fair queueing between classes which have waiting requests, and FIFO within
+    each class.
+
+    **Parameters:**
+
+    * **rate_limit** - Requests per second shared by all classes.
+    * **burst** - *(optional)* Number of requests allowed in a burst.
+    * **weights** - *(optional)* Weight of each priority class.
+    * **default** - *(optional)* Class of requests without a priority.
+    """
+
+    def __init__(
+        self,
+        rate_limit: float,
+        burst: float | None = None,
+        weights: Mapping[str, float] | None = None,
+        default: str = "bulk",
+    ) -> None:
+        weights = weights or {"interactive": 10, "bulk": 1}
+        if default not in weights:
+            raise ValueError(f"No weight for the default class '{default}'")
+        self.bucket = TokenBucket(rate_limit, burst)
+        self.classes = {name: PriorityClass(name, w) for name, w in weights.items()}
+        self.default = default
+        self.virtual_time = 0.0
+        self._condition = threading.Condition()
+
+    def priority_class(self, name: str | None) -> PriorityClass:
+        try:
+            return self.classes[name or self.default]
+        except KeyError:
+            raise ValueError(f"Unknown priority class '{name}'") from None
+
+    def acquire(self, name: str | None = None, timeout: float | None = None) -> bool:
+        """Wait until a request of this priority class may be sent, returning `False`
+        if `timeout` seconds pass first.
+        """
+        priority_class = self.priority_class(name)
+        waiter = object()
+        enqueued_at = time.monotonic()
+        until = None if timeout is None else enqueued_at + timeout
+        with self._condition:
+            if not priority_class.waiting:
+                # a class which was idle doesn't get credit for the time it was idle
+                priority_class.pass_ = max(priority_class.pass_, self.virtual_time)
+            priority_class.waiting.append(waiter)
+            granted = False
+            try:
+                granted = self._wait_turn(priority_class, waiter, until)
+            finally:
+                if granted:
+                    self._grant(priority_class, time.monotonic() - enqueued_at)
+                else:
+                    # timed out or interrupted, so the turn passes to the next waiter
+                    priority_class.waiting.remove(waiter)
+                self._condition.notify_all()
+        return granted
+
+    def _wait_turn(
+        self, priority_class: PriorityClass, waiter: object, until: float | None
+    ) -> bool:
+        """Wait until it's the waiter's turn and a token is taken from the bucket,
+        returning `False` if `until` passes first.
+        """
+        while (wait := self._take_turn(priority_class, waiter)) != 0:
+            if until is not None:
+                if (left := until - time.monotonic()) <= 0:
+                    return False
+                wait = min(wait or left, left)
+            self._condition.wait(wait)
+        return True
+
+    def _take_turn(self, priority_class: PriorityClass, waiter: object) -> float | None:
+        """If it's the waiter's turn, try to take a token, returning 0 if one was
+        taken or the seconds until one is available. Returns None if it isn't the
+        waiter's turn.
+        """
+        if self._next() is priority_class and priority_class.waiting[0] is waiter:
+            return self.bucket.try_acquire()
+        return None
+
+    def _next(self) -> PriorityClass | None:
+        """The class which is served next."""
+        waiting = [c for c in self.classes.values() if c.waiting]
+        # by the virtual time at which its next request would finish being served
+        return min(waiting, key=lambda c: c.pass_ + 1 / c.weight, default=None)
+
+    def _grant(self, priority_class: PriorityClass, wait: float) -> None:
+        priority_class.waiting.popleft()
+        self.virtual_time = priority_class.pass_
+        priority_class.pass_ += 1 / priority_class.weight
+        priority_class.granted += 1
+        priority_class.total_wait += wait
+        priority_class.max_wait = max(priority_class.max_wait, wait)
+
+    def stats(self) -> dict[str, dict[str, float]]:
+        """Queue depth, number of requests granted and wait times (in seconds) of
+        each class.
+        """
+        with self._condition:
+            return {name: c.stats() for name, c in self.classes.items()}
+
+
+class PriorityTransport(httpx.BaseTransport):
+    """Sends requests through a transport once the scheduler grants them, see
+    `API.with_priority()`.
+    """
+
+    def __init__(
+        self, transport: httpx.BaseTransport, scheduler: PriorityScheduler
+    ) -> None:
+        self.transport = transport
+        self.scheduler = scheduler
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        # waiting for a turn is bounded by the deadline (see `companycam.deadlines`)
+        priority = request.extensions.get(PRIORITY_EXTENSION)
+        if not self.scheduler.acquire(priority, timeout=remaining()):
+            raise DeadlineExceeded(request)
+        return self.transport.handle_request(request)
+
+    def close(self) -> None:
+        self.transport.close()
@@ -0,0 +1,206 @@
+"""
+Find where the time (and memory) goes in each call to a manager method:
+
+```py
+profiler = Profiler(trace_allocations=True)
+api = companycam.API(token="YOUR_ACCESS_TOKEN", profiler=profiler)
+with profiler:
+    ...  # make some calls
+print(profiler.table())
+```
+
+Each call is broken down into phases:
+
+* **serialize** - calling the manager method, which builds the request body.
+* **url** - matching arguments to the path's parameters and formatting the URL.
+* **network** - sending the request and receiving the response (or reading it from
+the cache).
+* **decode** - decoding the JSON response.
+* **validate** - converting the JSON to models with Pydantic.
+* **other** - the rest of the call, e.g. creating the HTTPX client and request.
+
+With `trace_allocations=True` the memory allocated by each phase is measured with
+`tracemalloc` (which slows everything down). `tracemalloc` measures the whole process,
+so allocations are only attributed accurately when calls are made from one thread at a
+time. Timings are accurate from any number of threads.
+"""
+
+import json
+import threading
+import time
+import tracemalloc
+from collections.abc import Iterator
+from contextlib import contextmanager
+from types import TracebackType
+from typing import Any
+
+PHASES = ["serialize", "url", "network", "decode", "validate", "other"]
+
+
+class PhaseStats(object):
+    def __init__(self) -> None:
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        # bytes above the memory in use when the phase started, at its peak and at its
+        # end
+        self.allocated = 0
+        self.retained = 0
+
+    def add(self, elapsed: float, allocated: int = 0, retained: int = 0) -> None:
+        self.count += 1
+        self.total += elapsed
+        self.max = max(self.max, elapsed)
+        self.allocated += allocated
+        self.retained += retained
+
+    def summary(self, calls: int) -> dict[str, Any]:
+        return {
+            "count": self.count,
+            "total_ms": self.total * 1000,
+            "mean_us": self.total / calls * 1e6 if calls else 0.0,
+            "max_ms": self.max * 1000,
+            "allocated_kb_per_call": self.allocated / calls / 1024 if calls else 0.0,
+            "retained_kb_per_call": self.retained / calls / 1024 if calls else 0.0,
+        }
+
+
+class MethodStats(object):
+    def __init__(self) -> None:
+        self.calls = PhaseStats()
+        self.phases = {phase: PhaseStats() for phase in PHASES}
+
+    def summary(self) -> dict[str, Any]:
+        calls = self.calls.count
+        phases = {
+            phase: stats.summary(calls)
+            for phase, stats in self.phases.items()
+            if stats.count
+        }
+        return {
+            "calls": calls,
+            "total_ms": self.calls.total * 1000,
+            "mean_us": self.calls.total / calls * 1e6 if calls else 0.0,
+            "phases": phases,
+        }
+
+
+class Profiler(object):
+    """
+    **Parameters:**
+
+    * **trace_allocations** - *(optional)* If `True`, measure memory allocated by each
+    phase with `tracemalloc` while the profiler is started.
+    """
+
+    def __init__(self, trace_allocations: bool = False) -> None:
+        self.trace_allocations = trace_allocations
+        self.methods: dict[str, MethodStats] = {}
+        self._started_tracemalloc = False
+        # time spent in phases of the current call, by thread
+        self._local = threading.local()
+        self._lock = threading.Lock()
+
+    def __getstate__(self) -> dict[str, Any]:
+        # a copy in another process starts without stats
+        return {"trace_allocations": self.trace_allocations}
+
+    def __setstate__(self, state: dict[str, Any]) -> None:
+        self.__init__(**state)  # type: ignore[misc]
+
+    def start(self) -> None:
+        if self.trace_allocations and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            self._started_tracemalloc = True
+
+    def stop(self) -> None:
+        if self._started_tracemalloc:
+            tracemalloc.stop()
+            self._started_tracemalloc = False
+
+    def __enter__(self) -> "Profiler":
+        self.start()
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None = None,
+        exc_value: BaseException | None = None,
+        traceback: TracebackType | None = None,
+    ) -> None:
+        self.stop()
+
+    def _method(self, method: str) -> MethodStats:
+        if (stats := self.methods.get(method)) is None:
+            stats = self.methods.setdefault(method, MethodStats())
+        return stats
+
+    @contextmanager
+    def call(self, method: str) -> Iterator[None]:
+        """Time a whole call to a manager method e.g. "ProjectsManager.retrieve"."""
+        self._local.in_phases = 0.0
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                stats = self._method(method)
+                stats.calls.add(elapsed)
+                stats.phases["other"].add(max(0.0, elapsed - self._local.in_phases))
+
+    @contextmanager
+    def phase(self, method: str, phase: str) -> Iterator[None]:
+        """Time one phase of a call (phases must not be nested)."""
+        tracing = self.trace_allocations and tracemalloc.is_tracing()
+        if tracing:
+            tracemalloc.reset_peak()
+            memory_at_start = tracemalloc.get_traced_memory()[0]
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            self._local.in_phases = getattr(self._local, "in_phases", 0.0) + elapsed
+            allocated = retained = 0
+            if tracing:
+                current, peak = tracemalloc.get_traced_memory()
+                allocated = max(0, peak - memory_at_start)
+                retained = current - memory_at_start
+            with self._lock:
+                self._method(method).phases[phase].add(elapsed, allocated, retained)
+
+    def reset(self) -> None:
+        with self._lock:
+            self.methods.clear()
+
+    def summary(self) -> dict[str, Any]:
+        """Stats for each method, ranked by total time."""
+        with self._lock:
+            summaries = {name: s.summary() for name, s in self.methods.items()}
+        ranked = sorted(summaries.items(), key=lambda item: -item[1]["total_ms"])
+        return dict(ranked)
+
+    def table(self) -> str:
+        """Each phase of each method, ranked by total time."""
+        rows = [
+            (method, phase, summary, stats)
+            for method, summary in self.summary().items()
+            for phase, stats in summary["phases"].items()
+        ]
+        rows.sort(key=lambda row: -row[3]["total_ms"])
+        lines = [
+            f"{'method':<36} {'phase':<9} {'calls':>7} {'total ms':>10} "
+            f"{'% call':>7} {'mean us':>9} {'max ms':>8} {'alloc KB':>9}"
+        ]
+        for method, phase, summary, stats in rows:
+            share = stats["total_ms"] / (summary["total_ms"] or 1) * 100
+            lines.append(
+                f"{method:<36} {phase:<9} {summary['calls']:>7} "
+                f"{stats['total_ms']:>10.2f} {share:>7.1f} {stats['mean_us']:>9.1f} "
+                f"{stats['max_ms']:>8.2f} {stats['allocated_kb_per_call']:>9.1f}"
+            )
+        return "\n".join(lines)
+
+    def json(self) -> str:
+        return json.dumps(self.summary(), indent=2)
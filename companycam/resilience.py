@@ -0,0 +1,459 @@
+"""
+Transports which protect CompanyCam (and your own latency) when the API degrades:
+
+```py
+limiter = AdaptiveLimiter(initial_limit=10, max_limit=50)
+breaker = CircuitBreaker(failure_threshold=5, reset_timeout=30)
+api = companycam.API(
+    token="YOUR_ACCESS_TOKEN",
+    transport=CircuitBreakerTransport(
+        AdaptiveConcurrencyTransport(httpx.HTTPTransport(), limiter), breaker
+    ),
+)
+```
+
+`AdaptiveLimiter` limits the number of requests in flight using AIMD (additive
+increase, multiplicative decrease): the limit shrinks when requests fail (5xx, 429 or
+transport errors) or latency rises well above its average, and grows back slowly while
+requests are healthy. Average latencies are kept per manager path, so slow lists aren't
+spikes compared with fast retrieves.
+
+`CircuitBreaker` tracks failures per manager path (e.g. "GET /projects/{project}").
+After `failure_threshold` consecutive failures the circuit opens and requests raise
+`CircuitOpen` without being sent, until `reset_timeout` seconds have passed and a trial
+request succeeds. Check `CircuitBreaker.state()` or `AdaptiveLimiter.available` to shed
+load before making requests.
+
+`HedgingTransport` reduces tail latency for GET requests. If a response hasn't arrived
+within the `percentile` latency of recent requests to the same endpoint, a duplicate
+request is sent (on another pooled connection) and whichever response arrives first is
+used. The other response is closed, or the duplicate is not sent at all if it hasn't
+started yet. Hedges are limited to a `budget` fraction of requests:
+
+```py
+hedger = Hedger(percentile=0.95, budget=0.05)
+api = companycam.API(
+    token="YOUR_ACCESS_TOKEN",
+    transport=HedgingTransport(httpx.HTTPTransport(), hedger),
+)
+api.photos.retrieve("4782987471")
+print(hedger.requests, hedger.hedges_sent, hedger.hedges_won)
+```
+"""
+
+import threading
+import time
+from collections import deque
+from collections.abc import Collection, Iterator
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from contextlib import contextmanager
+from typing import Literal, TypeVar
+
+import httpx
+
+from companycam.manager import request_endpoint
+
+CircuitState = Literal["closed", "open", "half_open"]
+T = TypeVar("T")
+
+
+def is_failure(response: httpx.Response) -> bool:
+    return response.status_code >= 500
+
+
+def is_overload(response: httpx.Response) -> bool:
+    return response.status_code == 429 or is_failure(response)
+
+
+class CircuitOpen(Exception):
+    """The circuit for this endpoint is open, so the request was not sent"""
+
+    def __init__(self, endpoint: str, retry_after: float) -> None:
+        super().__init__(
+            f"Circuit open for '{endpoint}', retry after {retry_after:.1f} seconds"
+        )
+        self.endpoint = endpoint
+        self.retry_after = retry_after
+
+
+class AdaptiveLimiter(object):
+    """
+    **Parameters:**
+
+    * **initial_limit** - *(optional)* Starting concurrency limit.
+    * **min_limit** - *(optional)* The limit never shrinks below this.
+    * **max_limit** - *(optional)* The limit never grows above this.
+    * **backoff** - *(optional)* Factor the limit is multiplied by on a failure or
+    latency spike.
+    * **latency_tolerance** - *(optional)* Latency spikes are requests which take this
+    many times longer than the average latency of their endpoint.
+    * **smoothing** - *(optional)* Weight of each new sample (spikes included) in the
+    average latency.
+    """
+
+    def __init__(
+        self,
+        initial_limit: int = 10,
+        min_limit: int = 1,
+        max_limit: int = 100,
+        backoff: float = 0.5,
+        latency_tolerance: float = 2.0,
+        smoothing: float = 0.1,
+    ) -> None:
+        self.limit = float(initial_limit)
+        self.min_limit = min_limit
+        self.max_limit = max_limit
+        self.backoff = backoff
+        self.latency_tolerance = latency_tolerance
+        self.smoothing = smoothing
+        self.in_flight = 0
+        # by manager path e.g. "GET /projects/{project}"
+        self.average_latencies: dict[str | None, float] = {}
+        self._last_decrease = 0.0
+        self._condition = threading.Condition()
+
+    @property
+    def available(self) -> int:
+        """Number of requests which can be sent without waiting."""
+        return max(0, int(self.limit) - self.in_flight)
+
+    def acquire(self) -> None:
+        with self._condition:
+            self._condition.wait_for(lambda: self.in_flight < int(self.limit))
+            self.in_flight += 1
+
+    def release(
+        self, latency: float, overloaded: bool, endpoint: str | None = None
+    ) -> None:
+        with self._condition:
+            self.in_flight -= 1
+            average = self.average_latencies.get(endpoint)
+            spike = average is not None and latency > self.latency_tolerance * average
+            if overloaded or spike:
+                self._decrease(latency)
+            else:
+                self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+            self._update_average_latency(endpoint, latency)
+            self._condition.notify_all()
+
+    def _decrease(self, latency: float) -> None:
+        # decrease at most once per round trip, since requests which were in flight
+        # together are likely to fail together
+        now = time.monotonic()
+        if now - self._last_decrease >= latency:
+            self.limit = max(self.min_limit, self.limit * self.backoff)
+            self._last_decrease = now
+
+    def _update_average_latency(self, endpoint: str | None, latency: float) -> None:
+        # spikes are included, so the average follows a lasting change in latency
+        # (otherwise every request after it would be a spike)
+        average = self.average_latencies.get(endpoint, latency)
+        self.average_latencies[endpoint] = average + self.smoothing * (
+            latency - average
+        )
+
+    @contextmanager
+    def slot(self, endpoint: str | None = None) -> Iterator[list[bool]]:
+        """Acquire a slot for one request (to `endpoint`, a manager path). Set
+        `overloaded[0] = True` from inside the context if the request was overloaded
+        without raising an exception.
+        """
+        overloaded = [False]
+        self.acquire()
+        start = time.monotonic()
+        try:
+            yield overloaded
+        except httpx.TransportError:
+            overloaded[0] = True
+            raise
+        finally:
+            self.release(time.monotonic() - start, overloaded[0], endpoint)
+
+
+class Circuit(object):
+    def __init__(self) -> None:
+        self.state: CircuitState = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self.trial_in_flight = False
+
+
+class CircuitBreaker(object):
+    """
+    **Parameters:**
+
+    * **failure_threshold** - *(optional)* Number of consecutive failures which open
+    the circuit for an endpoint.
+    * **reset_timeout** - *(optional)* Number of seconds the circuit stays open before
+    a trial request is allowed.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30) -> None:
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.circuits: dict[str, Circuit] = {}
+        self._lock = threading.Lock()
+
+    def state(self, endpoint: str) -> CircuitState:
+        with self._lock:
+            circuit = self.circuits.get(endpoint)
+            if circuit is None:
+                return "closed"
+            self._refresh(circuit)
+            return circuit.state
+
+    def states(self) -> dict[str, CircuitState]:
+        return {endpoint: self.state(endpoint) for endpoint in list(self.circuits)}
+
+    def _refresh(self, circuit: Circuit) -> None:
+        if circuit.state == "open" and self._retry_after(circuit) <= 0:
+            circuit.state = "half_open"
+
+    def _retry_after(self, circuit: Circuit) -> float:
+        return circuit.opened_at + self.reset_timeout - time.monotonic()
+
+    def before_request(self, endpoint: str) -> None:
+        """Raise `CircuitOpen` if a request to `endpoint` should not be sent."""
+        with self._lock:
+            circuit = self.circuits.setdefault(endpoint, Circuit())
+            self._refresh(circuit)
+            if circuit.state == "open" or (
+                circuit.state == "half_open" and circuit.trial_in_flight
+            ):
+                raise CircuitOpen(endpoint, max(0.0, self._retry_after(circuit)))
+            circuit.trial_in_flight = circuit.state == "half_open"
+
+    def record(self, endpoint: str, failed: bool | None) -> None:
+        """Record the outcome of a request. If `failed` is None (e.g. the request was
+        interrupted) nothing is recorded, but a trial request is no longer in flight.
+        """
+        with self._lock:
+            circuit = self.circuits.setdefault(endpoint, Circuit())
+            circuit.trial_in_flight = False
+            if failed is None:
+                return
+            if not failed:
+                circuit.state, circuit.failures = "closed", 0
+                return
+            circuit.failures += 1
+            if (
+                circuit.state == "half_open"
+                or circuit.failures >= self.failure_threshold
+            ):
+                circuit.state, circuit.opened_at = "open", time.monotonic()
+
+
+class AdaptiveConcurrencyTransport(httpx.BaseTransport):
+    def __init__(
+        self,
+        transport: httpx.BaseTransport | None = None,
+        limiter: AdaptiveLimiter | None = None,
+    ) -> None:
+        self.transport = transport or httpx.HTTPTransport()
+        self.limiter = limiter or AdaptiveLimiter()
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        with self.limiter.slot(request_endpoint(request)) as overloaded:
+            response = self.transport.handle_request(request)
+            # include the body in the measured latency
+            response.read()
+            overloaded[0] = is_overload(response)
+        return response
+
+    def close(self) -> None:
+        self.transport.close()
+
+
+class CircuitBreakerTransport(httpx.BaseTransport):
+    def __init__(
+        self,
+        transport: httpx.BaseTransport | None = None,
+        breaker: CircuitBreaker | None = None,
+    ) -> None:
+        self.transport = transport or httpx.HTTPTransport()
+        self.breaker = breaker or CircuitBreaker()
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        endpoint = request_endpoint(request)
+        self.breaker.before_request(endpoint)
+        # left as None by e.g. `KeyboardInterrupt`, which isn't a failure of the
+        # endpoint, but still ends a trial request (or the circuit would never close)
+        failed: bool | None = None
+        try:
+            response = self.transport.handle_request(request)
+            failed = is_failure(response)
+        except Exception:
+            failed = True
+            raise
+        finally:
+            self.breaker.record(endpoint, failed)
+        return response
+
+    def close(self) -> None:
+        self.transport.close()
+
+
+class Hedger(object):
+    """
+    **Parameters:**
+
+    * **percentile** - *(optional)* A duplicate request is sent if a response hasn't
+    arrived within this percentile (between 0 and 1) of recent latencies.
+    * **budget** - *(optional)* Maximum fraction of requests which are hedged.
+    * **min_delay** - *(optional)* Minimum number of seconds to wait before hedging.
+    * **min_samples** - *(optional)* Requests to an endpoint aren't hedged until this
+    many latencies have been measured for it.
+    * **window** - *(optional)* Number of recent latencies kept for each endpoint.
+    * **endpoints** - *(optional)* Manager paths (e.g. "GET /photos/{photo}") to
+    hedge. By default all GET requests are hedged.
+    """
+
+    def __init__(
+        self,
+        percentile: float = 0.95,
+        budget: float = 0.05,
+        min_delay: float = 0.0,
+        min_samples: int = 20,
+        window: int = 1000,
+        endpoints: Collection[str] | None = None,
+    ) -> None:
+        if not 0 < percentile < 1:
+            raise ValueError("percentile must be between 0 and 1")
+        self.percentile = percentile
+        self.budget = budget
+        self.min_delay = min_delay
+        self.min_samples = min_samples
+        self.window = window
+        self.endpoints = endpoints
+        self.latencies: dict[str, deque[float]] = {}
+        self.requests = 0
+        self.hedges_sent = 0
+        self.hedges_won = 0
+        self._lock = threading.Lock()
+
+    def should_hedge(self, request: httpx.Request) -> bool:
+        return request.method == "GET" and (
+            self.endpoints is None or request_endpoint(request) in self.endpoints
+        )
+
+    def delay(self, endpoint: str) -> float | None:
+        """Seconds to wait before hedging a request, or `None` if it shouldn't be
+        hedged.
+        """
+        with self._lock:
+            self.requests += 1
+            latencies = self.latencies.get(endpoint)
+            if latencies is None or len(latencies) < self.min_samples:
+                return None
+            if self.hedges_sent + 1 > self.budget * self.requests:
+                return None
+            ordered = sorted(latencies)
+            # nearest-rank percentile
+            delay = ordered[max(0, int(self.percentile * len(ordered) + 0.5) - 1)]
+        return max(self.min_delay, delay)
+
+    def acquire_hedge(self) -> bool:
+        """Count a hedge, unless it would go over budget."""
+        with self._lock:
+            if self.hedges_sent + 1 > self.budget * self.requests:
+                return False
+            self.hedges_sent += 1
+            return True
+
+    def record(self, endpoint: str, latency: float) -> None:
+        with self._lock:
+            latencies = self.latencies.get(endpoint)
+            if latencies is None:
+                latencies = self.latencies[endpoint] = deque(maxlen=self.window)
+            latencies.append(latency)
+
+    def record_win(self) -> None:
+        with self._lock:
+            self.hedges_won += 1
+
+
+def close_response(future: Future[httpx.Response]) -> None:
+    if not future.cancelled() and future.exception() is None:
+        future.result().close()
+
+
+def first_successful(*futures: Future[T]) -> Future[T] | None:
+    """Wait for the first future which doesn't raise (preferring earlier futures if
+    several finish together). Returns `None` if they all raise.
+    """
+    pending = set(futures)
+    while pending:
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        for future in futures:
+            if future in done and future.exception() is None:
+                return future
+    return None
+
+
+class HedgingTransport(httpx.BaseTransport):
+    """
+    **Parameters:**
+
+    * **transport** - *(optional)* Transport which requests (and their duplicates) are
+    sent through. It should have a connection pool, e.g. `httpx.HTTPTransport`.
+    * **hedger** - *(optional)* A `Hedger`, which can be shared between transports.
+    * **max_workers** - *(optional)* Maximum number of threads sending requests which
+    may be hedged.
+    """
+
+    def __init__(
+        self,
+        transport: httpx.BaseTransport | None = None,
+        hedger: Hedger | None = None,
+        max_workers: int = 64,
+    ) -> None:
+        self.transport = transport or httpx.HTTPTransport()
+        self.hedger = hedger or Hedger()
+        self.executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="companycam-hedge"
+        )
+
+    def handle_request(self, request: httpx.Request) -> httpx.Response:
+        if not self.hedger.should_hedge(request):
+            return self.transport.handle_request(request)
+        endpoint = request_endpoint(request)
+        delay = self.hedger.delay(endpoint)
+        if delay is None:
+            return self._send(request, endpoint)
+        primary = self.executor.submit(self._send, request, endpoint)
+        done, _ = wait([primary], timeout=delay)
+        if done or not self.hedger.acquire_hedge():
+            return primary.result()
+        hedge = self.executor.submit(self._send, request, endpoint)
+        return self._first(primary, hedge)
+
+    def _send(self, request: httpx.Request, endpoint: str) -> httpx.Response:
+        start = time.monotonic()
+        response = self.transport.handle_request(request)
+        try:
+            # include the body in the measured latency
+            response.read()
+        except BaseException:
+            response.close()
+            raise
+        self.hedger.record(endpoint, time.monotonic() - start)
+        return response
+
+    def _first(
+        self, primary: Future[httpx.Response], hedge: Future[httpx.Response]
+    ) -> httpx.Response:
+        """Return the first successful response, and close the other one."""
+        winner = first_successful(primary, hedge)
+        if winner is None:
+            # both failed
+            return primary.result()
+        for future in {primary, hedge} - {winner}:
+            if not future.cancel():
+                future.add_done_callback(close_response)
+        if winner is hedge:
+            self.hedger.record_win()
+        return winner.result()
+
+    def close(self) -> None:
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        self.transport.close()
@@ -0,0 +1,86 @@
+"""
+Request bodies for write paths, e.g. `{"tag": {"display_value": "Roof"}}`.
+
+A `Serializer` is built once per manager method (with that method's include set and
+envelope) rather than on every call, and reads fields directly instead of going through
+`Model.model_dump(include=...)`. The result is the same as:
+
+```py
+body = model.model_dump(include=include)  # None values are excluded
+body = {envelope: body} if envelope else body
+```
+"""
+
+from collections.abc import Callable, Iterable, Mapping
+from typing import Any
+
+import pydantic
+
+from companycam.models import Model
+from companycam.utils import model_field_names
+
+
+def dump(value: Any) -> Any:
+    """Like `Model.model_dump()` (excluding None values) for any field value."""
+    if isinstance(value, pydantic.BaseModel):
+        return {k: dump(v) for k, v in value.__dict__.items() if v is not None}
+    elif isinstance(value, list):
+        return [dump(v) for v in value]
+    return value
+
+
+class Serializer(object):
+    """
+    **Parameters:**
+
+    * **model** - Model class which is serialized.
+    * **include** - Fields to include in the body.
+    * **envelope** - *(optional)* Key to wrap the body in e.g. "photo".
+    * **transforms** - *(optional)* Functions by field name which are called with the
+    field's value (if it isn't None) and return the value to send instead. If a
+    transform returns None the field is left out.
+    """
+
+    def __init__(
+        self,
+        model: type[pydantic.BaseModel],
+        include: Iterable[str],
+        envelope: str | None = None,
+        transforms: Mapping[str, Callable[[Any], Any]] | None = None,
+    ) -> None:
+        include = set(include)
+        # in the order fields are defined, like `model_dump()`
+        self.include = tuple(f for f in model_field_names(model) if f in include)
+        self.envelope = envelope
+        self.transforms = dict(transforms or {})
+
+    def __call__(
+        self,
+        model: pydantic.BaseModel,
+        include: Iterable[str] | None = None,
+        nulls: bool = False,
+    ) -> dict[str, Any]:
+        """The body for `model`. If `nulls` is `True`, fields which are None are sent
+        as null (e.g. to clear them) rather than left out.
+        """
+        fields = model.__dict__
+        body = {}
+        for name in self.include if include is None else include:
+            value = fields.get(name)
+            if value is not None and name in self.transforms:
+                value = self.transforms[name](value)
+            if value is not None:
+                body[name] = dump(value)
+            elif nulls and fields.get(name) is None:
+                body[name] = None
+        return {self.envelope: body} if self.envelope else body
+
+    def changes(self, model: Model) -> dict[str, Any] | None:
+        """The body with only the included fields which are dirty (see
+        `Model.dirty_fields`), or None if none of them are. Fields which have been
+        changed to None are sent as null, so they are cleared.
+        """
+        dirty = model.dirty_fields
+        if not (include := [name for name in self.include if name in dirty]):
+            return None
+        return self(model, include, nulls=model.tracks_changes)
@@ -0,0 +1,50 @@
+import threading
+from collections.abc import Callable, Hashable
+from concurrent.futures import Future
+from typing import Any
+
+
+class SingleFlight(object):
+    """Coalesce identical calls which are in flight at the same time.
+
+    The first caller for a given key (the "leader") runs the function, and any callers
+    which arrive with the same key before it finishes wait for, and share, the
+    leader's result (or exception). Once the leader finishes the key is forgotten, so
+    this is not a cache.
+
+    Calls are coalesced across threads. Since manager methods are blocking, async code
+    should run them in threads (e.g. `await asyncio.to_thread(api.company.retrieve)`)
+    and concurrent tasks will be coalesced in the same way.
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._calls: dict[Hashable, Future] = {}
+
+    def __getstate__(self) -> dict[str, Any]:
+        # calls are only coalesced within a process
+        return {}
+
+    def __setstate__(self, state: dict[str, Any]) -> None:
+        self.__init__()  # type: ignore[misc]
+
+    def do(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if future is None:
+                future = self._calls[key] = Future()
+        if not leader:
+            return future.result()
+        try:
+            future.set_result(fn())
+        except BaseException as exc:
+            future.set_exception(exc)
+        finally:
+            with self._lock:
+                del self._calls[key]
+        return future.result()
+
+    def in_flight(self) -> int:
+        with self._lock:
+            return len(self._calls)
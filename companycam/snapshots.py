@@ -0,0 +1,228 @@
+"""
+Keep list results on disk and read single records back by ID without loading the rest:
+
+```py
+with SnapshotStore("photos.ndjson", Photo) as photos:
+    photos.extend(paginate(api.photos.list))
+    photo = photos.get("12345678")
+    for photo in photos:
+        ...
+```
+
+Records are appended to the file as compact JSON, one per line, and the byte offset of
+each record is appended to a side index (`<path>.idx`, with lines of
+`<id>\\t<offset>\\t<length>`). The index is loaded into memory when the store is opened
+and the file is read through `mmap`, so a lookup by ID reads and decodes only that
+record, and iterating over the store decodes one record at a time.
+
+Records are never rewritten: adding a record with an ID which is already stored
+appends it, and lookups and scans then see only the latest copy.
+
+If a previous run was interrupted mid-write, a partially written record at the end of
+the file is removed and records missing from the index are indexed when the store is
+opened.
+"""
+
+import json
+import mmap
+import os
+import threading
+from collections.abc import Iterable, Iterator
+from pathlib import Path
+from types import TracebackType
+from typing import Any, Generic, TypeVar
+
+from companycam.models import Model, mark_clean
+from companycam.utils import parse_obj_as
+
+M = TypeVar("M", bound=Model)
+
+INDEX_SUFFIX = ".idx"
+
+
+class SnapshotStore(Generic[M]):
+    """
+    **Parameters:**
+
+    * **path** - NDJSON file to store records in. It is created if it doesn't exist.
+    * **model** - Model class of the records e.g. `companycam.v2.models.Photo`.
+    """
+
+    def __init__(self, path: str | os.PathLike, model: type[M]) -> None:
+        self.path = Path(path)
+        self.index_path = Path(f"{self.path}{INDEX_SUFFIX}")
+        self.model = model
+        # id -> (offset, length) of the latest copy of the record
+        self.offsets: dict[str, tuple[int, int]] = {}
+        self._size = 0
+        self._mmap: mmap.mmap | None = None
+        self._lock = threading.Lock()
+        self.path.touch()
+        self._open()
+
+    def _open(self) -> None:
+        indexed_to = self._load_index()
+        self._size = self._truncate_partial_record()
+        if indexed_to == self._size and self.index_path.exists():
+            return
+        # the index is behind (or ahead of) the data: index whatever wasn't indexed,
+        # and rewrite the index without entries for removed records
+        self.offsets = {
+            id_: (offset, length)
+            for id_, (offset, length) in self.offsets.items()
+            if offset + length < self._size
+        }
+        mapped, size = self._map()
+        if mapped is not None:
+            start = max(0, min(indexed_to, size))
+            for offset, line in _lines(mapped, start, size):
+                if (id_ := json.loads(line).get("id")) is not None:
+                    self.offsets[str(id_)] = (offset, len(line))
+        self.index_path.write_text(
+            "".join(_index_line(id_, *entry) for id_, entry in self.offsets.items())
+        )
+
+    def _truncate_partial_record(self) -> int:
+        """Remove a record which was only partly written, returning the file size."""
+        with self.path.open("r+b") as f:
+            size = f.seek(0, os.SEEK_END)
+            if not size:
+                return 0
+            with mmap.mmap(f.fileno(), size, access=mmap.ACCESS_READ) as mapped:
+                end = mapped.rfind(b"\n") + 1
+            if end < size:
+                f.truncate(end)
+        return end
+
+    def _load_index(self) -> int:
+        """Load the index, returning the offset of the end of the last indexed record."""
+        if not self.index_path.exists():
+            return 0
+        indexed_to = 0
+        with self.index_path.open("r") as f:
+            for line in f:
+                if not line.endswith("\n"):
+                    # partly written, so the whole file is indexed again
+                    return -1
+                id_, offset, length = line.rstrip("\n").split("\t")
+                self.offsets[id_] = (int(offset), int(length))
+                indexed_to = max(indexed_to, int(offset) + int(length) + 1)
+        return indexed_to
+
+    def extend(self, models: Iterable[M]) -> int:
+        """Append records, returning the number appended."""
+        models = list(models)
+        lines = [
+            json.dumps(model.model_dump(), separators=(",", ":")).encode()
+            for model in models
+        ]
+        with self._lock:
+            offsets = {}
+            offset = self._size
+            for model, line in zip(models, lines, strict=True):
+                if (id_ := getattr(model, "id", None)) is not None:
+                    offsets[str(id_)] = (offset, len(line))
+                offset += len(line) + 1
+            # the data is written before the index, so the index never points past the
+            # end of the data
+            with self.path.open("ab") as f:
+                f.write(b"".join(line + b"\n" for line in lines))
+            with self.index_path.open("a") as f:
+                f.write("".join(_index_line(id_, *e) for id_, e in offsets.items()))
+            self.offsets.update(offsets)
+            self._size = offset
+            # mapped again on the next read; scans in progress keep their own mapping
+            self._mmap = None
+        return len(lines)
+
+    def add(self, model: M) -> None:
+        self.extend([model])
+
+    def _map(self) -> tuple[mmap.mmap | None, int]:
+        with self._lock:
+            if self._mmap is None and self._size:
+                with self.path.open("rb") as f:
+                    self._mmap = mmap.mmap(
+                        f.fileno(), self._size, access=mmap.ACCESS_READ
+                    )
+            return self._mmap, self._size
+
+    def get_json(self, id_: str) -> dict[str, Any] | None:
+        """Get a record by ID as JSON, or `None` if it isn't stored."""
+        if (entry := self.offsets.get(str(id_))) is None:
+            return None
+        mapped, _ = self._map()
+        offset, length = entry
+        return json.loads(mapped[offset : offset + length])  # type: ignore[index]
+
+    def get(self, id_: str) -> M | None:
+        """Get a record by ID, or `None` if it isn't stored."""
+        if (record := self.get_json(id_)) is None:
+            return None
+        return mark_clean(parse_obj_as(self.model, record))
+
+    def __getitem__(self, id_: str) -> M:
+        if (model := self.get(id_)) is None:
+            raise KeyError(id_)
+        return model
+
+    def iter_json(self) -> Iterator[dict[str, Any]]:
+        """Iterate over the latest copy of each record as JSON, in the order the copies
+        were added.
+
+        Records added during iteration are not included.
+        """
+        mapped, size = self._map()
+        if mapped is None:
+            return
+        for offset, line in _lines(mapped, 0, size):
+            record = json.loads(line)
+            id_ = record.get("id")
+            # skip records which have been superseded
+            if id_ is None or self.offsets.get(str(id_), (offset,))[0] == offset:
+                yield record
+
+    def __iter__(self) -> Iterator[M]:
+        for record in self.iter_json():
+            yield mark_clean(parse_obj_as(self.model, record))
+
+    def __contains__(self, id_: str) -> bool:
+        return str(id_) in self.offsets
+
+    def __len__(self) -> int:
+        """The number of stored IDs."""
+        return len(self.offsets)
+
+    def close(self) -> None:
+        with self._lock:
+            if self._mmap is not None:
+                self._mmap.close()
+                self._mmap = None
+
+    def __enter__(self) -> "SnapshotStore[M]":
+        return self
+
+    def __exit__(
+        self,
+        exc_type: type[BaseException] | None = None,
+        exc_value: BaseException | None = None,
+        traceback: TracebackType | None = None,
+    ) -> None:
+        self.close()
+
+
+def _lines(
+    data: bytes | mmap.mmap, start: int, end: int
+) -> Iterator[tuple[int, bytes]]:
+    """Each line of `data[start:end]` (without its newline) and its offset."""
+    offset = start
+    while offset < end:
+        newline = data.find(b"\n", offset, end)
+        if newline == -1:
+            newline = end
+        yield offset, data[offset:newline]
+        offset = newline + 1
+
+
+def _index_line(id_: str, offset: int, length: int) -> str:
+    return f"{id_}\t{offset}\t{length}\n"
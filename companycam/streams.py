@@ -0,0 +1,161 @@
+"""
+Merge many paginated lists, each ordered newest first, into one stream ordered newest
+first, e.g. the latest photos across many projects:
+
+```py
+stream = MergedStream(api.projects.list_photos, [(p,) for p in project_ids])
+latest = list(itertools.islice(stream, 100))
+```
+
+The first page of every list is fetched concurrently, then the lists are merged with a
+heap. Later pages of a list are only fetched once the merge reaches them (with
+`prefetch=True`, when half of the list's current page has been taken), so a top-N
+query only fetches a fraction of each list.
+
+The merge relies on each list being ordered newest first by the sort key, as the API's
+lists of photos are (by `captured_at`). Nothing checks this, so merging by any other key
+gives a stream which isn't ordered.
+"""
+
+import contextvars
+import heapq
+from collections import deque
+from collections.abc import Callable, Iterable, Iterator
+from concurrent.futures import Future, ThreadPoolExecutor
+from operator import attrgetter
+from typing import Any, Generic, TypeVar
+
+from companycam.pagination import PER_PAGE, page_query
+from companycam.types import QueryParamTypes
+
+T = TypeVar("T")
+
+
+class Source(Generic[T]):
+    """One of the lists being merged."""
+
+    def __init__(self, index: int, args: tuple) -> None:
+        self.index = index
+        self.args = args
+        # items of fetched pages which haven't been merged yet
+        self.items: deque[T] = deque()
+        self.next_page = 1
+        self.exhausted = False
+        self.pending: "Future[list[T]] | None" = None
+
+
+class Descending(object):
+    """Wraps a sort key to reverse its ordering, e.g. so a min-heap pops the newest
+    item first. Missing (None) values are ordered last.
+    """
+
+    __slots__ = ("value",)
+
+    def __init__(self, value: Any) -> None:
+        self.value = (value is not None, value)
+
+    def __lt__(self, other: "Descending") -> bool:
+        return other.value < self.value
+
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, Descending) and self.value == other.value
+
+
+class MergedStream(Generic[T]):
+    """
+    **Parameters:**
+
+    * **method** - List path to call for each list e.g. `api.projects.list_photos`.
+    * **sources** - Arguments to call `method` with for each list e.g.
+    `[("12345678",), ("23456789",)]`.
+    * **key** - *(optional)* Attribute (or function of an item) to order by, which
+    every list must be ordered by (newest first). Any comparable values can be used.
+    * **query** - *(optional)* Query parameters for every page.
+    * **per_page** - *(optional)* Items per page requested.
+    * **max_workers** - *(optional)* Number of pages fetched at once.
+    * **prefetch** - *(optional)* If `True`, fetch the next page of a list once half
+    of its current page has been merged, rather than when all of it has.
+    """
+
+    def __init__(
+        self,
+        method: Callable[..., list[T]],
+        sources: Iterable[tuple],
+        key: str | Callable[[T], Any] = "captured_at",
+        query: QueryParamTypes | None = None,
+        per_page: int = PER_PAGE,
+        max_workers: int = 8,
+        prefetch: bool = True,
+    ) -> None:
+        self.method = method
+        self.sources = [tuple(args) for args in sources]
+        self.key = attrgetter(key) if isinstance(key, str) else key
+        self.query = query
+        self.per_page = per_page
+        self.max_workers = max_workers
+        self.prefetch = prefetch
+        # number of pages requested, by all iterations
+        self.pages_fetched = 0
+
+    def __iter__(self) -> Iterator[T]:
+        """Merge the lists, fetching their pages again each time."""
+        sources = [Source[T](i, args) for i, args in enumerate(self.sources)]
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            self._executor = executor
+            try:
+                yield from self._merge(sources)
+            finally:
+                # stopped early e.g. after taking the top N
+                for source in sources:
+                    if source.pending is not None:
+                        source.pending.cancel()
+
+    def _merge(self, sources: list[Source[T]]) -> Iterator[T]:
+        for source in sources:
+            self._request(source)
+        heap: list[tuple[Any, int, T, Source[T]]] = []
+        for source in sources:
+            self._push(heap, source)
+        while heap:
+            *_, item, source = heapq.heappop(heap)
+            yield item
+            self._push(heap, source)
+
+    def _push(self, heap: list, source: Source[T]) -> None:
+        """Push the next item of a list onto the heap (newest first, and by the list's
+        position to break ties so items themselves are never compared).
+        """
+        if (item := self._next_item(source)) is not None:
+            heapq.heappush(
+                heap, (Descending(self.key(item)), source.index, item, source)
+            )
+
+    def _next_item(self, source: Source[T]) -> T | None:
+        if not source.items:
+            self._receive(source)
+        if not source.items:
+            return None
+        item = source.items.popleft()
+        if self.prefetch and len(source.items) < self.per_page // 2:
+            self._request(source)
+        return item
+
+    def _request(self, source: Source[T]) -> None:
+        if source.exhausted or source.pending is not None:
+            return
+        query = page_query(self.query, source.next_page, self.per_page)
+        source.pending = self._executor.submit(
+            contextvars.copy_context().run, self.method, *source.args, query=query
+        )
+        source.next_page += 1
+        self.pages_fetched += 1
+
+    def _receive(self, source: Source[T]) -> None:
+        """Wait for the next page of a list (requesting it if necessary)."""
+        self._request(source)
+        if source.pending is None:
+            return
+        page = source.pending.result()
+        source.pending = None
+        source.items.extend(page)
+        source.exhausted = len(page) < self.per_page
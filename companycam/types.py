@@ -1,7 +1,7 @@
 from typing import TYPE_CHECKING, List, Mapping, Optional, Sequence, Tuple, Union
 
 if TYPE_CHECKING:
-    from httpx import QueryParams
+    from httpx import QueryParams, Timeout
 
 # Copied from httpx._types. They are copied and not used directly since they are not part of HTTPX's API
 # (i.e. module begins with an underscore) and could change unexpectedly.
@@ -16,3 +16,9 @@ QueryParamTypes = Union[
     str,
     bytes,
 ]
+
+TimeoutTypes = Union[
+    Optional[float],
+    Tuple[Optional[float], Optional[float], Optional[float], Optional[float]],
+    "Timeout",
+]
@@ -1,7 +1,11 @@
+import contextvars
+from collections.abc import Callable, Hashable, Mapping
+from concurrent.futures import Future, ThreadPoolExecutor
 from typing import Any, TypeVar
 
 import pydantic
 
+K = TypeVar("K", bound=Hashable)
 T = TypeVar("T")
 
 
@@ -20,3 +24,58 @@ def parse_obj_as(type_: type[T], obj: Any) -> T:
     else:
         # parse_obj_as deprecated in V2, removed in V3
         return pydantic.parse_obj_as(type_, obj)
+
+
+def model_field_names(model: type[pydantic.BaseModel]) -> list[str]:
+    if PYDANTIC_VERSION >= (2, 0, 0):
+        return list(model.model_fields)
+    # `__fields__` is a deprecated property in V2, which mypy sees as a method
+    return list(model.__fields__)  # type: ignore[call-overload]
+
+
+def model_fields_set(model: pydantic.BaseModel) -> set[str]:
+    if PYDANTIC_VERSION >= (2, 0, 0):
+        return model.model_fields_set
+    return model.__fields_set__
+
+
+def gather(
+    calls: Mapping[K, Callable[[], T]], max_workers: int | None = None
+) -> dict[K, T]:
+    """Run callables concurrently in threads and return their results by key.
+
+    Each callable runs in a copy of the caller's context, so context variables (e.g.
+    deadlines) apply to every call. If any call raises, the first exception (in key
+    order) is raised once all calls have finished.
+    """
+    futures = run_concurrently(calls, max_workers)
+    return {key: future.result() for key, future in futures.items()}
+
+
+def gather_outcomes(
+    calls: Mapping[K, Callable[[], T]], max_workers: int | None = None
+) -> dict[K, T | Exception]:
+    """Like `gather()`, but an exception raised by a call is returned as its result,
+    so one failed call doesn't discard the results of the others.
+    """
+    outcomes: dict[K, T | Exception] = {}
+    for key, future in run_concurrently(calls, max_workers).items():
+        exception = future.exception()
+        # e.g. `KeyboardInterrupt` is still raised
+        outcomes[key] = (
+            exception if isinstance(exception, Exception) else future.result()
+        )
+    return outcomes
+
+
+def run_concurrently(
+    calls: Mapping[K, Callable[[], T]], max_workers: int | None = None
+) -> dict[K, "Future[T]"]:
+    """Run callables in threads (each in a copy of the caller's context) and return
+    their futures once all of them have finished.
+    """
+    with ThreadPoolExecutor(max_workers=max_workers or len(calls) or 1) as executor:
+        return {
+            key: executor.submit(contextvars.copy_context().run, call)
+            for key, call in calls.items()
+        }
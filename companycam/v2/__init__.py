@@ -1,6 +1,7 @@
-from . import defaults, managers, models
+from . import aggregates, defaults, managers, models
 
 __all__ = [
+    "aggregates",
     "defaults",
     "managers",
     "models",
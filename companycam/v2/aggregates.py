@@ -0,0 +1,52 @@
+"""
+Models (and other results) which aggregate the results of several API paths. Unlike
+`companycam.v2.models` these are not components in the OpenAPI spec.
+"""
+
+from companycam.models import Model
+from companycam.v2.models import (
+    Comment,
+    Document,
+    Photo,
+    Project,
+    ProjectCollaborator,
+    ProjectInvitation,
+    Tag,
+    User,
+)
+
+
+class ProjectGraph(Model):
+    """A project and its sub-lists, see `ProjectsManager.hydrate()`. Sub-lists which
+    were not included are `None`.
+    """
+
+    project: Project
+    photos: list[Photo] | None = None
+    assigned_users: list[User] | None = None
+    labels: list[Tag] | None = None
+    documents: list[Document] | None = None
+    comments: list[Comment] | None = None
+    collaborators: list[ProjectCollaborator] | None = None
+    invitations: list[ProjectInvitation] | None = None
+
+
+class BulkTagResult(object):
+    """The outcome of `PhotosManager.bulk_tag()` for each photo, by its ID: the tags
+    created for photos which were tagged, and the exception raised for photos which
+    couldn't be.
+    """
+
+    def __init__(self, outcomes: dict[str, list[Tag] | Exception]) -> None:
+        self.created: dict[str, list[Tag]] = {}
+        self.errors: dict[str, Exception] = {}
+        for photo, outcome in outcomes.items():
+            if isinstance(outcome, Exception):
+                self.errors[photo] = outcome
+            else:
+                self.created[photo] = outcome
+
+    def raise_for_errors(self) -> None:
+        """Raise the first exception, if any photo couldn't be tagged."""
+        for error in self.errors.values():
+            raise error
@@ -0,0 +1,227 @@
+"""
+Spatial queries over projects and photos. Requires NumPy, which can be installed with:
+
+```sh
+python -m pip install "companycam-unofficial[geo]"
+```
+
+Usage:
+```py
+>>> index = SpatialIndex.from_manager(api.projects)
+>>> index.nearest(lat=40.71, lon=-74.0, n=5)
+[(Project(id='12345678', ...), 1520.3), ...]
+>>> index.containing(lat=40.71, lon=-74.0)
+[Project(id='12345678', ...)]
+>>> index.assign(api.photos.list())
+{'4782987471': Project(id='12345678', ...), ...}
+```
+
+Project coordinates are bucketed into a grid of `cell_size` degrees, so nearest
+neighbour queries only compute distances for points in nearby cells. Distances are
+great-circle distances in meters. The grid does not wrap around the antimeridian.
+"""
+
+import math
+import typing
+from collections import defaultdict
+from collections.abc import Iterable, Iterator
+
+from companycam.pagination import PER_PAGE, paginate
+from companycam.types import QueryParamTypes
+from companycam.v2.models import Coordinate, Photo, Project
+
+if typing.TYPE_CHECKING:
+    from companycam.v2.managers import ProjectsManager
+
+try:
+    import numpy as np
+except ImportError as exc:  # pragma: no cover
+    raise ImportError(
+        "companycam.v2.geo requires NumPy: "
+        "python -m pip install 'companycam-unofficial[geo]'"
+    ) from exc
+
+EARTH_RADIUS = 6_371_008.8  # meters (mean radius)
+METERS_PER_DEGREE = math.pi * EARTH_RADIUS / 180
+
+
+def haversine(lat: float, lon: float, lats: np.ndarray, lons: np.ndarray) -> np.ndarray:
+    """Great-circle distances (in meters) from one point to arrays of points."""
+    lat_r, lon_r = math.radians(lat), math.radians(lon)
+    lats_r, lons_r = np.radians(lats), np.radians(lons)
+    a = (
+        np.sin((lats_r - lat_r) / 2) ** 2
+        + math.cos(lat_r) * np.cos(lats_r) * np.sin((lons_r - lon_r) / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS * np.arcsin(np.sqrt(np.clip(a, 0, 1)))
+
+
+def polygon_contains(
+    lats: np.ndarray, lons: np.ndarray, lat: float, lon: float
+) -> bool:
+    """Ray casting test for whether a polygon (arrays of vertices) contains a point."""
+    next_lats, next_lons = np.roll(lats, -1), np.roll(lons, -1)
+    crosses = (lats > lat) != (next_lats > lat)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        lon_at_lat = lons + (lat - lats) * (next_lons - lons) / (next_lats - lats)
+    return bool(np.count_nonzero(crosses & (lon < lon_at_lat)) % 2)
+
+
+def coordinate_arrays(
+    coordinates: Iterable[Coordinate],
+) -> tuple[np.ndarray, np.ndarray]:
+    """Convert coordinates to arrays of latitudes and longitudes."""
+    lat_lons = np.array([(c.lat, c.lon) for c in coordinates], dtype=np.float64)
+    lat_lons = lat_lons.reshape(-1, 2)
+    return lat_lons[:, 0], lat_lons[:, 1]
+
+
+def ring_cells(i: int, j: int, ring: int) -> Iterator[tuple[int, int]]:
+    """Cells on the edge of the square of cells `ring` cells away from `(i, j)`."""
+    if ring == 0:
+        yield i, j
+        return
+    for dj in range(-ring, ring + 1):
+        yield i - ring, j + dj
+        yield i + ring, j + dj
+    for di in range(-ring + 1, ring):
+        yield i + di, j - ring
+        yield i + di, j + ring
+
+
+class SpatialIndex(object):
+    """
+    **Parameters:**
+
+    * **projects** - Projects to index. Projects without `coordinates` are only used
+    for geofence lookups, and projects without a `geofence` (of at least 3 points)
+    are only used for nearest neighbour lookups.
+    * **cell_size** - *(optional)* Size of grid cells in degrees.
+    """
+
+    def __init__(self, projects: Iterable[Project], cell_size: float = 0.1) -> None:
+        projects = list(projects)
+        self.cell_size = cell_size
+        self.projects = [p for p in projects if p.coordinates]
+        self.lats, self.lons = coordinate_arrays(
+            p.coordinates for p in self.projects if p.coordinates
+        )
+        self.grid = self._build_grid()
+        self.fenced = [p for p in projects if p.geofence and len(p.geofence) >= 3]
+        self.fences = [coordinate_arrays(p.geofence or []) for p in self.fenced]
+        self.fence_bounds = np.array(
+            [[la.min(), la.max(), lo.min(), lo.max()] for la, lo in self.fences],
+            dtype=np.float64,
+        ).reshape(-1, 4)
+
+    @classmethod
+    def from_manager(
+        cls,
+        manager: "ProjectsManager",
+        query: QueryParamTypes | None = None,
+        per_page: int = PER_PAGE,
+        cell_size: float = 0.1,
+    ) -> "SpatialIndex":
+        """Build an index from every page of `manager.list()` e.g. `api.projects`."""
+        return cls(
+            paginate(manager.list, query=query, per_page=per_page), cell_size=cell_size
+        )
+
+    def cell(self, lat: float, lon: float) -> tuple[int, int]:
+        return math.floor(lat / self.cell_size), math.floor(lon / self.cell_size)
+
+    def _build_grid(self) -> dict[tuple[int, int], np.ndarray]:
+        cells: dict[tuple[int, int], list[int]] = defaultdict(list)
+        for i, (lat, lon) in enumerate(zip(self.lats, self.lons, strict=True)):
+            cells[self.cell(lat, lon)].append(i)
+        return {cell: np.array(indices) for cell, indices in cells.items()}
+
+    def _covered_distance(self, lat: float, ring: int) -> float:
+        """Minimum distance from a point to any cell more than `ring` cells away."""
+        max_lat = min(89.999, abs(lat) + (ring + 1) * self.cell_size)
+        return (
+            ring * self.cell_size * METERS_PER_DEGREE * math.cos(math.radians(max_lat))
+        )
+
+    def _candidates(self, lat: float, lon: float, n: int) -> np.ndarray:
+        """Indices of points which include the `n` nearest to a point."""
+        i, j = self.cell(lat, lon)
+        found: list[np.ndarray] = []
+        ring = 0
+        # stop searching rings once there would be more ring cells than occupied cells
+        while 8 * ring <= len(self.grid):
+            found += [self.grid[c] for c in ring_cells(i, j, ring) if c in self.grid]
+            candidates = np.concatenate(found) if found else np.array([], dtype=int)
+            if len(candidates) >= n:
+                distances = haversine(
+                    lat, lon, self.lats[candidates], self.lons[candidates]
+                )
+                if np.partition(distances, n - 1)[n - 1] <= self._covered_distance(
+                    lat, ring
+                ):
+                    return candidates
+            ring += 1
+        return np.arange(len(self.projects))
+
+    def nearest(
+        self, lat: float, lon: float, n: int = 1, max_distance: float | None = None
+    ) -> list[tuple[Project, float]]:
+        """The `n` nearest projects to a point, and their distances in meters, nearest
+        first.
+        """
+        if not self.projects or n < 1:
+            return []
+        candidates = self._candidates(lat, lon, n)
+        distances = haversine(lat, lon, self.lats[candidates], self.lons[candidates])
+        order = np.argsort(distances)[:n]
+        return [
+            (self.projects[candidates[k]], float(distances[k]))
+            for k in order
+            if max_distance is None or distances[k] <= max_distance
+        ]
+
+    def containing(self, lat: float, lon: float) -> list[Project]:
+        """Projects with a geofence which contains a point."""
+        bounds = self.fence_bounds
+        in_bounds = np.flatnonzero(
+            (bounds[:, 0] <= lat)
+            & (lat <= bounds[:, 1])
+            & (bounds[:, 2] <= lon)
+            & (lon <= bounds[:, 3])
+        )
+        return [
+            self.fenced[k]
+            for k in in_bounds
+            if polygon_contains(*self.fences[k], lat, lon)
+        ]
+
+    def assign_coordinate(
+        self, coordinate: Coordinate, max_distance: float | None = None
+    ) -> Project | None:
+        """The first project with a geofence which contains a coordinate, otherwise
+        (if `max_distance` is set) the nearest project within `max_distance` meters.
+        """
+        if containing := self.containing(coordinate.lat, coordinate.lon):
+            return containing[0]
+        if max_distance is not None:
+            nearest = self.nearest(
+                coordinate.lat, coordinate.lon, max_distance=max_distance
+            )
+            return nearest[0][0] if nearest else None
+        return None
+
+    def assign(
+        self, photos: Iterable[Photo], max_distance: float | None = None
+    ) -> dict[str, Project | None]:
+        """Assign photos to projects by their (first) coordinates, see
+        `assign_coordinate()`. Returns projects by photo ID.
+        """
+        return {
+            photo.id: (
+                self.assign_coordinate(photo.coordinates[0], max_distance)
+                if photo.coordinates
+                else None
+            )
+            for photo in photos
+            if photo.id
+        }
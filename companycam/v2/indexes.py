@@ -0,0 +1,249 @@
+"""
+Local indexes built from API results, so lookups don't need a request each time.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+import typing
+from collections.abc import Iterable
+from os import PathLike
+from pathlib import Path
+
+from companycam.pagination import PER_PAGE, iter_pages, paginate
+from companycam.v2.models import Photo, Project, Tag
+
+if typing.TYPE_CHECKING:
+    from companycam.v2.managers import ProjectsManager, TagsManager
+
+
+def normalize_tag(value: str) -> str:
+    """Normalize case and whitespace e.g. `" Front  Side"` -> `"front side"`."""
+    return " ".join(value.casefold().split())
+
+
+class TagIndex(object):
+    """Case-normalized lookup of tags by `Tag.display_value` and `Tag.value`.
+
+    Usage:
+    ```py
+    >>> tags = TagIndex(api.tags)
+    >>> tags.get("front side")
+    Tag(id='48892885', display_value='Front Side', ...)
+    ```
+
+    The index is filled the first time it is used. On a miss it is refreshed, at most
+    once every `refresh_interval` seconds, and only tags which are new or have been
+    updated since they were indexed are replaced.
+
+    Tags are listed oldest first, so a refresh resumes from the last page the previous
+    refresh listed (which wasn't full) rather than listing every tag again. Tags
+    which are renamed or deleted elsewhere (which moves later tags to earlier pages)
+    are only seen by `refresh(full=True)`.
+    """
+
+    def __init__(
+        self,
+        manager: "TagsManager",
+        refresh_interval: float = 60,
+        per_page: int = PER_PAGE,
+    ) -> None:
+        self.manager = manager
+        self.refresh_interval = refresh_interval
+        self.per_page = per_page
+        self.tags: dict[str, Tag] = {}
+        self.refreshed_at: float | None = None
+        # the page the next refresh starts from
+        self.page = 1
+        self._lock = threading.RLock()
+
+    def refresh(self, full: bool = False) -> None:
+        """List tags which are new since the last refresh, or every tag if `full` is
+        `True`.
+        """
+        with self._lock:
+            start = 1 if full else self.page
+            pages = iter_pages(
+                self.manager.list, per_page=self.per_page, start_page=start
+            )
+            for page, tags in enumerate(pages, start=start):
+                for tag in tags:
+                    self.add(tag)
+                # a full page can't gain tags, so the next refresh starts after it
+                self.page = page + 1 if len(tags) == self.per_page else page
+            self.refreshed_at = time.monotonic()
+
+    def add(self, tag: Tag) -> None:
+        """Add or update a tag, unless the indexed tag is newer."""
+        with self._lock:
+            for key in {tag.display_value, tag.value} - {None}:
+                key = normalize_tag(key)  # type: ignore[arg-type]
+                indexed = self.tags.get(key)
+                if indexed is None or (indexed.updated_at or 0) <= (
+                    tag.updated_at or 0
+                ):
+                    self.tags[key] = tag
+
+    def _should_refresh(self) -> bool:
+        return (
+            self.refreshed_at is None
+            or time.monotonic() - self.refreshed_at >= self.refresh_interval
+        )
+
+    def get(self, name: str) -> Tag | None:
+        with self._lock:
+            if self.refreshed_at is None:
+                self.refresh()
+            tag = self.tags.get(normalize_tag(name))
+            if tag is None and self._should_refresh():
+                self.refresh()
+                tag = self.tags.get(normalize_tag(name))
+            return tag
+
+    def canonical_name(self, name: str) -> str:
+        """Get the display value of an existing tag with this name, so that tagging
+        with a different case or spacing doesn't create a new tag.
+        """
+        tag = self.get(name)
+        return tag.display_value if tag and tag.display_value else name
+
+    def __contains__(self, name: str) -> bool:
+        return self.get(name) is not None
+
+    def __len__(self) -> int:
+        return len({id(tag) for tag in self.tags.values()})
+
+
+def hash_content(content: bytes) -> str:
+    """Hash image content the same way as `Photo.hash` (an MD5 hex digest)."""
+    return hashlib.md5(content, usedforsecurity=False).hexdigest()
+
+
+def photo_entries(
+    photos: Iterable[Photo],
+) -> dict[str, tuple[str | None, str | None]]:
+    """The IDs of each photo (and its project) by hash, keeping the first photo with
+    each hash.
+    """
+    entries: dict[str, tuple[str | None, str | None]] = {}
+    for photo in photos:
+        if photo.hash and photo.hash not in entries:
+            entries[photo.hash] = (photo.id, photo.project_id)
+    return entries
+
+
+def write_entries(
+    path: Path, entries: dict[str, tuple[str | None, str | None]], mode: str
+) -> None:
+    with path.open(mode) as f:
+        for hash_, (photo_id, project_id) in entries.items():
+            entry = {"hash": hash_, "photo_id": photo_id, "project_id": project_id}
+            f.write(json.dumps(entry) + "\n")
+
+
+class PhotoHashIndex(object):
+    """Lookup of existing photos by `Photo.hash`, so duplicate uploads can be skipped.
+
+    Usage:
+    ```py
+    >>> photos = PhotoHashIndex("photo_hashes.ndjson")
+    >>> photos.build(api.projects, ["12345678"])
+    >>> if not photos.contains_content(image_bytes):
+            photo = api.projects.create_photo("12345678", uri, captured_at)
+            photos.add(photo)
+    ```
+
+    If `path` is set, the index is loaded from that file and new entries are appended
+    to it as they are added, so the index persists between runs.
+    """
+
+    def __init__(self, path: str | PathLike | None = None) -> None:
+        self.path = Path(path) if path else None
+        # hash -> (photo ID, project ID)
+        self.photos: dict[str, tuple[str | None, str | None]] = {}
+        self._lock = threading.Lock()
+        if self.path and self.path.exists():
+            self._load(self.path)
+
+    def _load(self, path: Path) -> None:
+        with path.open("r+b") as f:
+            end = 0
+            for line in f:
+                if not line.endswith(b"\n"):
+                    # partly written by an interrupted append, so it's removed
+                    f.truncate(end)
+                    break
+                end += len(line)
+                if line.strip():
+                    entry = json.loads(line)
+                    self.photos[entry["hash"]] = (
+                        entry["photo_id"],
+                        entry["project_id"],
+                    )
+
+    def add(self, photo: Photo) -> bool:
+        """Add a photo, returning `True` if its hash was not already indexed."""
+        return self.update([photo]) == 1
+
+    def update(self, photos: Iterable[Photo]) -> int:
+        """Add photos, returning the number of hashes which were not already indexed."""
+        # `photos` may be fetched as it's iterated, so it's read before locking
+        entries = photo_entries(photos)
+        with self._lock:
+            new = {h: e for h, e in entries.items() if h not in self.photos}
+            self._append(new)
+            self.photos.update(new)
+        return len(new)
+
+    def _append(self, entries: dict[str, tuple[str | None, str | None]]) -> None:
+        if self.path and entries:
+            write_entries(self.path, entries, "a")
+
+    def _replace(self, photos: dict[str, tuple[str | None, str | None]]) -> None:
+        """Replace the whole index (and its file, atomically), so neither is ever
+        partly updated.
+        """
+        if self.path:
+            temporary = self.path.with_name(self.path.name + ".tmp")
+            write_entries(temporary, photos, "w")
+            os.replace(temporary, self.path)
+        self.photos = photos
+
+    def build(
+        self,
+        manager: "ProjectsManager",
+        projects: Iterable[Project | str],
+        per_page: int = PER_PAGE,
+    ) -> int:
+        """Add every photo in the given projects (e.g. `manager=api.projects`),
+        returning the number of new hashes.
+
+        The projects are crawled without locking the index, so lookups aren't blocked
+        meanwhile, and the new hashes are only added (to the index and its file) once
+        every project has been crawled. If the crawl fails, the index is unchanged.
+        """
+        crawled: dict[str, tuple[str | None, str | None]] = {}
+        for project in projects:
+            photos = paginate(manager.list_photos, project, per_page=per_page)
+            for hash_, entry in photo_entries(photos).items():
+                crawled.setdefault(hash_, entry)
+        with self._lock:
+            new = {h: e for h, e in crawled.items() if h not in self.photos}
+            if new:
+                self._replace({**self.photos, **new})
+        return len(new)
+
+    def get(self, hash_: str) -> tuple[str | None, str | None] | None:
+        """Get the IDs of the photo (and its project) with this hash."""
+        return self.photos.get(hash_)
+
+    def contains_content(self, content: bytes) -> bool:
+        return hash_content(content) in self.photos
+
+    def __contains__(self, hash_: str) -> bool:
+        return hash_ in self.photos
+
+    def __len__(self) -> int:
+        return len(self.photos)
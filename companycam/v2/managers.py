@@ -1,9 +1,28 @@
 import base64
+import functools
 import io
-
-from companycam.manager import BaseManager, get, post, put, request
+import time
+from collections.abc import Iterable, Sequence
+
+from companycam.aggregation import Aggregator, aggregate
+from companycam.backfill import Backfill, Timestamp
+from companycam.manager import (
+    BaseManager,
+    get,
+    get_string_from_object,
+    no_request,
+    post,
+    put,
+    request,
+)
 from companycam.manager import delete as delete_
+from companycam.pagination import PER_PAGE, list_all
+from companycam.serializers import Serializer, dump
+from companycam.streams import MergedStream
 from companycam.types import QueryParamTypes
+from companycam.utils import gather, gather_outcomes
+from companycam.v2.aggregates import BulkTagResult, ProjectGraph
+from companycam.v2.indexes import TagIndex, normalize_tag
 from companycam.v2.models import (
     Comment,
     Company,
@@ -34,6 +53,7 @@ class UsersManager(BaseManager):
     # manually so it's closer to the path definitions and not invoked in any non-API
     # usage of `BaseModel.model_dump()` (formerly `BaseModel.dict()`)
     include = {"first_name", "last_name", "email_address", "phone_number", "password"}
+    serializer = Serializer(User, include)
 
     @get("/users/current")
     def retrieve_current(self) -> User:
@@ -45,7 +65,7 @@ class UsersManager(BaseManager):
 
     @post("/users")
     def create(self, user: User) -> User:
-        return request(json=user.model_dump(include=self.include))
+        return request(json=self.serializer(user))
 
     @get("/users/{user}")
     def retrieve(self, user: User | str) -> User:
@@ -53,7 +73,9 @@ class UsersManager(BaseManager):
 
     @put("/users/{user}")
     def update(self, user: User) -> User:
-        return request(json=user.model_dump(include=self.include))
+        if (body := self.serializer.changes(user)) is None:
+            return no_request(user)
+        return request(json=body)
 
     @delete_("/users/{user}")
     def delete(self, user: User | str) -> bool:
@@ -62,10 +84,24 @@ class UsersManager(BaseManager):
 
 class ProjectsManager(BaseManager):
     include = {"name", "address", "coordinates", "geofence", "primary_contact"}
+    serializer = Serializer(Project, include)
+    update_serializer = Serializer(Project, include - {"primary_contact"})
+    notepad_serializer = Serializer(Project, {"notepad"})
+    comment_serializer = Serializer(Comment, {"content"}, envelope="comment")
+    # sub-lists which can be included by `hydrate()` and the paths which list them
+    hydrate_include = {
+        "photos": "list_photos",
+        "assigned_users": "list_assigned_users",
+        "labels": "list_labels",
+        "documents": "list_documents",
+        "comments": "list_comments",
+        "collaborators": "list_collaborators",
+        "invitations": "list_invitations",
+    }
 
     @post("/projects")
     def create(self, project: Project) -> Project:
-        return request(json=project.model_dump(include=self.include))
+        return request(json=self.serializer(project))
 
     @get("/projects/{project}")
     def retrieve(self, project: Project | str) -> Project:
@@ -73,9 +109,9 @@ class ProjectsManager(BaseManager):
 
     @put("/projects/{project}")
     def update(self, project: Project) -> Project:
-        include = self.include.copy()
-        include.remove("primary_contact")
-        return request(json=project.model_dump(include=include))
+        if (body := self.update_serializer.changes(project)) is None:
+            return no_request(project)
+        return request(json=body)
 
     @delete_("/projects/{project}")
     def delete(self, project: Project | str) -> bool:
@@ -91,6 +127,27 @@ class ProjectsManager(BaseManager):
     ) -> list[Photo]:
         return request(params=query)
 
+    def stream_photos(
+        self,
+        projects: Iterable[Project | str],
+        query: QueryTypes = None,
+        per_page: int = PER_PAGE,
+        max_workers: int = 8,
+    ) -> MergedStream[Photo]:
+        """Stream the photos of many projects, newest first by `captured_at` (which
+        each project's photos are listed by), fetching pages only as the stream
+        reaches them, see `companycam.streams`. E.g. the latest 100 photos:
+        `itertools.islice(api.projects.stream_photos(projects), 100)`.
+        """
+        return MergedStream(
+            self.list_photos,
+            [(project,) for project in projects],
+            key="captured_at",
+            query=query,
+            per_page=per_page,
+            max_workers=max_workers,
+        )
+
     @post("/projects/{project}/photos")
     def create_photo(
         self,
@@ -101,7 +158,7 @@ class ProjectsManager(BaseManager):
     ) -> Photo:
         photo_dict = {"captured_at": captured_at, "uri": uri}
         if coordinates:
-            photo_dict["coordinates"] = coordinates.model_dump()
+            photo_dict["coordinates"] = dump(coordinates)
         return request(json={"photo": photo_dict})
 
     @get("/projects/{project}/assigned_users")
@@ -122,7 +179,7 @@ class ProjectsManager(BaseManager):
 
     @put("/projects/{project}/notepad")
     def update_notepad(self, project: Project) -> ProjectNotepad:
-        return request(json=project.model_dump(include={"notepad"}))
+        return request(json=self.notepad_serializer(project))
 
     @get("/projects/{project}/collaborators")
     def list_collaborators(
@@ -178,21 +235,72 @@ class ProjectsManager(BaseManager):
 
     @post("/projects/{project}/comments")
     def create_comment(self, project: Project | str, comment: Comment) -> Comment:
-        return request(json={"comment": comment.model_dump(include={"content"})})
+        return request(json=self.comment_serializer(comment))
 
     @get("/projects")
     def list(self, query: QueryTypes = None) -> list[Project]:
         return request(params=query)
 
+    def aggregate(
+        self,
+        group_by: Sequence[str] = (),
+        bucket: str | None = None,
+        bucket_field: str = "created_at",
+        query: QueryTypes = None,
+        per_page: int = PER_PAGE,
+    ) -> Aggregator:
+        """Count projects by group without creating models, e.g. projects per status
+        with `group_by=["status"]`, see `companycam.aggregation`.
+        """
+        return aggregate(
+            self.list,
+            group_by=group_by,
+            bucket=bucket,
+            bucket_field=bucket_field,
+            query=query,
+            per_page=per_page,
+        )
+
+    def hydrate(
+        self,
+        project: Project | str,
+        include: Iterable[str] | None = None,
+        paginate: bool = False,
+        per_page: int = PER_PAGE,
+        max_workers: int | None = None,
+    ) -> ProjectGraph:
+        """Retrieve a project and its sub-lists (by default all of those in
+        `hydrate_include`) with concurrent requests. If `paginate` is `True` every page
+        of each sub-list is fetched.
+        """
+        include = set(self.hydrate_include if include is None else include)
+        if unknown := include - self.hydrate_include.keys():
+            raise ValueError(f"Cannot include: {', '.join(sorted(unknown))}")
+        calls = {"project": functools.partial(self.retrieve, project)}
+        for name in include:
+            method = getattr(self, self.hydrate_include[name])
+            if paginate:
+                calls[name] = functools.partial(
+                    list_all, method, project, per_page=per_page
+                )
+            else:
+                calls[name] = functools.partial(method, project)
+        return ProjectGraph(**gather(calls, max_workers=max_workers))
+
 
 class PhotosManager(BaseManager):
+    serializer = Serializer(Photo, {"internal"}, envelope="photo")
+    comment_serializer = Serializer(Comment, {"content"}, envelope="comment")
+
     @get("/photos/{photo}")
     def retrieve(self, photo: Photo | str) -> Photo:
         return request()
 
     @put("/photos/{photo}")
     def update(self, photo: Photo) -> Photo:
-        return request(json={"photo": photo.model_dump(include={"internal"})})
+        if (body := self.serializer.changes(photo)) is None:
+            return no_request(photo)
+        return request(json=body)
 
     @delete_("/photos/{photo}")
     def delete(self, photo: Photo | str) -> bool:
@@ -214,17 +322,108 @@ class PhotosManager(BaseManager):
 
     @post("/photos/{photo}/comments")
     def create_comment(self, photo: Photo | str, comment: Comment) -> Comment:
-        return request(json={"comment": comment.model_dump(include={"content"})})
+        return request(json=self.comment_serializer(comment))
+
+    def bulk_tag(
+        self,
+        photos: Iterable[Photo | str],
+        tags: Iterable[str],
+        max_workers: int = 8,
+        skip_existing: bool = True,
+        index: TagIndex | None = None,
+    ) -> BulkTagResult:
+        """Tag many photos with concurrent requests, returning the tags created for
+        each photo by its ID, and the exception raised for each photo which couldn't be
+        tagged (so a failure doesn't hide which photos were tagged).
+
+        If `skip_existing` is `True` each photo's tags are listed first, and tags
+        which the photo already has are not created again. If a `TagIndex` is given,
+        tag names are replaced by the display value of matching existing tags, and
+        created tags are added to the index.
+        """
+        tags = [index.canonical_name(t) if index is not None else t for t in tags]
+        calls = {
+            get_string_from_object(photo): functools.partial(
+                self._tag_photo, photo, tags, skip_existing, index
+            )
+            for photo in photos
+        }
+        return BulkTagResult(gather_outcomes(calls, max_workers=max_workers))
+
+    def _tag_photo(
+        self,
+        photo: Photo | str,
+        tags: list[str],
+        skip_existing: bool,
+        index: TagIndex | None,
+    ) -> list[Tag]:
+        if skip_existing:
+            existing = {
+                normalize_tag(t.display_value or t.value or "")
+                for t in list_all(self.list_tags, photo)
+            }
+            tags = [t for t in tags if normalize_tag(t) not in existing]
+        if not tags:
+            return []
+        created = self.create_tags(photo, *tags)
+        if index is not None:
+            for tag in created:
+                index.add(tag)
+        return created
 
     @get("/photos")
     def list(self, query: QueryTypes = None) -> list[Photo]:
         return request(params=query)
 
+    def aggregate(
+        self,
+        group_by: Sequence[str] = (),
+        bucket: str | None = None,
+        bucket_field: str = "captured_at",
+        query: QueryTypes = None,
+        per_page: int = PER_PAGE,
+    ) -> Aggregator:
+        """Count photos by group without creating models, e.g. photos per creator per
+        day with `group_by=["creator_id"], bucket="day"`, see
+        `companycam.aggregation`.
+        """
+        return aggregate(
+            self.list,
+            group_by=group_by,
+            bucket=bucket,
+            bucket_field=bucket_field,
+            query=query,
+            per_page=per_page,
+        )
+
+    def backfill(
+        self,
+        start: Timestamp,
+        end: Timestamp | None = None,
+        query: QueryTypes = None,
+        per_page: int = PER_PAGE,
+        max_workers: int = 8,
+    ) -> Backfill[Photo]:
+        """Crawl the photos captured from `start` to `end` (by default, now) by
+        paginating time windows concurrently, see `companycam.backfill`. Photos are
+        yielded as their pages arrive, not in order.
+        """
+        return Backfill(
+            self.list,
+            start,
+            time.time() if end is None else end,
+            query=query,
+            per_page=per_page,
+            max_workers=max_workers,
+        )
+
 
 class TagsManager(BaseManager):
+    serializer = Serializer(Tag, {"display_value"}, envelope="tag")
+
     @post("/tags")
     def create(self, tag: Tag) -> Tag:
-        return request(json={"tag": tag.model_dump(include={"display_value"})})
+        return request(json=self.serializer(tag))
 
     @get("/tags/{tag}")
     def retrieve(self, tag: Tag | str) -> Tag:
@@ -232,7 +431,9 @@ class TagsManager(BaseManager):
 
     @put("/tags/{tag}")
     def update(self, tag: Tag) -> Tag:
-        return request(json={"tag": tag.model_dump(include={"display_value"})})
+        if (body := self.serializer.changes(tag)) is None:
+            return no_request(tag)
+        return request(json=body)
 
     @delete_("/tags/{tag}")
     def delete(self, tag: Tag | str) -> bool:
@@ -243,13 +444,19 @@ class TagsManager(BaseManager):
         return request(params=query)
 
 
+def user_ids(users: list[User]) -> list[str] | None:
+    """Groups are sent with a list of user IDs, rather than users."""
+    return [u.id for u in users if u.id is not None] if users else None
+
+
 class GroupsManager(BaseManager):
+    serializer = Serializer(
+        Group, {"name", "users"}, envelope="group", transforms={"users": user_ids}
+    )
+
     @post("/groups")
     def create(self, group: Group) -> Group:
-        group_dict = group.model_dump(include={"name", "users"})
-        if users := group_dict.pop("users", None):
-            group_dict["users"] = [u["id"] for u in users if "id" in u]
-        return request(json={"group": group_dict})
+        return request(json=self.serializer(group))
 
     @get("/groups/{group}")
     def retrieve(self, group: Group | str) -> Group:
@@ -257,10 +464,9 @@ class GroupsManager(BaseManager):
 
     @put("/groups/{group}")
     def update(self, group: Group) -> Group:
-        group_dict = group.model_dump(include={"name", "users"})
-        if users := group_dict.pop("users", None):
-            group_dict["users"] = [u["id"] for u in users if "id" in u]
-        return request(json={"group": group_dict})
+        if (body := self.serializer.changes(group)) is None:
+            return no_request(group)
+        return request(json=body)
 
     @delete_("/groups/{group}")
     def delete(self, group: Group | str) -> bool:
@@ -272,11 +478,11 @@ class GroupsManager(BaseManager):
 
 
 class WebhooksManager(BaseManager):
+    serializer = Serializer(Webhook, {"url", "scopes", "enabled", "token"})
+
     @post("/webhooks")
     def create(self, webhook: Webhook) -> Webhook:
-        return request(
-            json=webhook.model_dump(include={"url", "scopes", "enabled", "token"})
-        )
+        return request(json=self.serializer(webhook))
 
     @get("/webhooks/{webhook}")
     def retrieve(self, webhook: Webhook | str) -> Webhook:
@@ -284,9 +490,9 @@ class WebhooksManager(BaseManager):
 
     @put("/webhooks/{webhook}")
     def update(self, webhook: Webhook) -> Webhook:
-        return request(
-            json=webhook.model_dump(include={"url", "scopes", "enabled", "token"})
-        )
+        if (body := self.serializer.changes(webhook)) is None:
+            return no_request(webhook)
+        return request(json=body)
 
     @delete_("/webhooks/{webhook}")
     def delete(self, webhook: Webhook | str) -> bool:
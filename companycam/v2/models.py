@@ -14,6 +14,29 @@ else:
     OptionalStr = str | None  # type: ignore[misc]
 
 
+# Objects referenced by id, which are `None` until resolved by
+# `companycam.v2.relations.Resolver`. They are kept in the private `Model._relations`,
+# so they are not fields and are never sent in request bodies.
+
+
+class HasCompany(Model):
+    @property
+    def company(self) -> "Company | None":
+        return (self._relations or {}).get("company")
+
+
+class HasCreator(Model):
+    @property
+    def creator(self) -> "User | None":
+        return (self._relations or {}).get("creator")
+
+
+class HasProject(Model):
+    @property
+    def project(self) -> "Project | None":
+        return (self._relations or {}).get("project")
+
+
 # Components which don't reference other components, alphabetical
 
 
@@ -26,7 +49,7 @@ class Address(Model):
     country: OptionalStr
 
 
-class Comment(ModelWithRequiredID):
+class Comment(ModelWithRequiredID, HasCreator):
     creator_id: OptionalStr
     creator_type: OptionalStr
     creator_name: OptionalStr
@@ -43,7 +66,7 @@ class Coordinate(Model):
     lon: float
 
 
-class Document(ModelWithRequiredID):
+class Document(ModelWithRequiredID, HasCreator, HasProject):
     creator_id: OptionalStr
     creator_type: OptionalStr
     creator_name: OptionalStr
@@ -68,7 +91,7 @@ class ImageURI(Model):
         assignment_aliases = {"url": "uri"}
 
 
-class ProjectCollaborator(Model):
+class ProjectCollaborator(HasProject):
     id: OptionalStr
     company_id: OptionalStr
     project_id: OptionalStr
@@ -84,7 +107,7 @@ class ProjectContactRequest(Model):
     phone_number: OptionalStr
 
 
-class ProjectContactResponse(Model):
+class ProjectContactResponse(HasProject):
     id: OptionalStr
     project_id: OptionalStr
     name: OptionalStr
@@ -94,7 +117,7 @@ class ProjectContactResponse(Model):
     updated_at: OptionalInt
 
 
-class ProjectInvitation(Model):
+class ProjectInvitation(HasCreator, HasProject):
     id: OptionalStr
     project_id: OptionalStr
     invite_url: OptionalStr
@@ -116,7 +139,7 @@ class ProjectNotepad(Model):
     notepad: str
 
 
-class Tag(ModelWithRequiredID):
+class Tag(ModelWithRequiredID, HasCompany):
     company_id: OptionalStr
     display_value: OptionalStr
     value: OptionalStr
@@ -124,7 +147,7 @@ class Tag(ModelWithRequiredID):
     updated_at: OptionalInt
 
 
-class Webhook(ModelWithRequiredID):
+class Webhook(ModelWithRequiredID, HasCompany):
     company_id: OptionalStr
     url: OptionalStr
     scopes: list[str] | None = None
@@ -137,7 +160,7 @@ class Webhook(ModelWithRequiredID):
 # Components which reference other components, alphabetical
 
 
-class User(ModelWithRequiredID):
+class User(ModelWithRequiredID, HasCompany):
     company_id: OptionalStr
     email_address: OptionalStr
     status: Literal["active", "deleted"] | None = None
@@ -160,7 +183,7 @@ class Company(ModelWithRequiredID):
     logo: list[ImageURI] | None = None
 
 
-class Group(ModelWithRequiredID):
+class Group(ModelWithRequiredID, HasCompany):
     company_id: OptionalStr
     name: OptionalStr
     users: list[User] | None = None
@@ -170,7 +193,7 @@ class Group(ModelWithRequiredID):
     updated_at: OptionalInt
 
 
-class Photo(ModelWithRequiredID):
+class Photo(ModelWithRequiredID, HasCompany, HasCreator, HasProject):
     company_id: OptionalStr
     creator_id: OptionalStr
     creator_type: OptionalStr
@@ -197,7 +220,7 @@ class Photo(ModelWithRequiredID):
         super().__init__(*args, **kwargs)
 
 
-class Project(ModelWithRequiredID):
+class Project(ModelWithRequiredID, HasCompany, HasCreator):
     company_id: OptionalStr
     creator_id: OptionalStr
     creator_type: OptionalStr
@@ -0,0 +1,150 @@
+"""
+Resolve the ids which models reference (e.g. `Photo.creator_id`) to the objects they
+reference, for a batch of models at once rather than with a request per model:
+
+```py
+resolver = Resolver(api)
+photos = resolver.resolve(api.photos.list())
+for photo in photos:
+    print(photo.creator.first_name, photo.project.name)
+```
+
+Resolved objects are cached by the resolver, so models resolved later (e.g. the next
+page of photos) only need requests for ids which haven't been seen before. If more
+ids of one kind are missing than `sweep_threshold`, every page of users or projects
+is listed once, instead of retrieving each of them. Ids which are still missing are
+then retrieved with concurrent requests.
+"""
+
+import functools
+import threading
+import typing
+from collections.abc import Callable, Iterable
+
+from companycam.exceptions import NotFound
+from companycam.models import Model
+from companycam.pagination import PER_PAGE, list_all
+from companycam.utils import gather
+from companycam.v2.models import (
+    Company,
+    HasCompany,
+    HasCreator,
+    HasProject,
+    Project,
+    User,
+)
+
+if typing.TYPE_CHECKING:
+    from companycam.api import API
+
+M = typing.TypeVar("M", bound=Model)
+
+
+def creator_id(model: HasCreator) -> str | None:
+    # creators are usually users, but could be e.g. integrations
+    if getattr(model, "creator_type", None) in (None, "User"):
+        return getattr(model, "creator_id", None)
+    return None
+
+
+# relation -> (class of models with the relation, function which returns the id,
+# manager which the referenced objects are fetched from)
+RELATIONS: dict[str, tuple[type[Model], Callable[[typing.Any], str | None], str]] = {
+    "company": (HasCompany, lambda m: getattr(m, "company_id", None), "company"),
+    "creator": (HasCreator, creator_id, "users"),
+    "project": (HasProject, lambda m: getattr(m, "project_id", None), "projects"),
+}
+
+
+class Resolver(object):
+    """
+    **Parameters:**
+
+    * **api** - A `companycam.API` object.
+    * **sweep_threshold** - *(optional)* If more than this many users (or projects)
+    are missing from the cache, list all of them rather than retrieving each one. Each
+    kind is only listed once by a resolver.
+    * **per_page** - *(optional)* Number of users or projects per page when listing.
+    * **max_workers** - *(optional)* Maximum number of concurrent requests when
+    retrieving.
+    """
+
+    def __init__(
+        self,
+        api: "API",
+        sweep_threshold: int = PER_PAGE,
+        per_page: int = PER_PAGE,
+        max_workers: int = 8,
+    ) -> None:
+        self.api = api
+        self.sweep_threshold = sweep_threshold
+        self.per_page = per_page
+        self.max_workers = max_workers
+        # objects by id, by manager name. `None` is cached for ids which aren't found
+        self.cache: dict[str, dict[str, Model | None]] = {
+            manager: {} for _, _, manager in RELATIONS.values()
+        }
+        self.swept: set[str] = set()
+        self._lock = threading.RLock()
+
+    def add(self, *objects: Company | Project | User) -> None:
+        """Add objects which have already been fetched to the cache."""
+        managers = {Company: "company", Project: "projects", User: "users"}
+        with self._lock:
+            for obj in objects:
+                if obj.id is not None:
+                    self.cache[managers[type(obj)]][obj.id] = obj
+
+    def resolve(
+        self, models: Iterable[M], relations: Iterable[str] | None = None
+    ) -> list[M]:
+        """Fetch the objects referenced by `models` (by default for every relation
+        in `RELATIONS`) and attach them e.g. as `photo.creator`. Returns the models as
+        a list.
+        """
+        models = list(models)
+        relations = list(RELATIONS if relations is None else relations)
+        if unknown := set(relations) - RELATIONS.keys():
+            raise ValueError(f"Cannot resolve: {', '.join(sorted(unknown))}")
+        with self._lock:
+            for relation in relations:
+                self._resolve(models, relation)
+        return models
+
+    def _resolve(self, models: list[M], relation: str) -> None:
+        cls, get_id, manager = RELATIONS[relation]
+        ids = [(m, get_id(m)) for m in models if isinstance(m, cls)]
+        cache = self.cache[manager]
+        self._fetch(manager, {i for _, i in ids if i is not None} - cache.keys())
+        for model, id_ in ids:
+            if model._relations is None:
+                model._relations = {}
+            model._relations[relation] = cache.get(id_) if id_ is not None else None
+
+    def _fetch(self, manager: str, ids: set[str]) -> None:
+        if not ids:
+            return
+        cache = self.cache[manager]
+        if manager == "company":
+            # only the company the access token belongs to can be retrieved
+            cache.update(dict.fromkeys(ids))
+            if manager not in self.swept:
+                self.add(self.api.company.retrieve())
+                self.swept.add(manager)
+            return
+        if len(ids) > self.sweep_threshold and manager not in self.swept:
+            self.add(*list_all(getattr(self.api, manager).list, per_page=self.per_page))
+            self.swept.add(manager)
+            ids -= cache.keys()
+        calls = {
+            id_: functools.partial(self._retrieve, getattr(self.api, manager), id_)
+            for id_ in ids
+        }
+        cache.update(gather(calls, max_workers=self.max_workers))
+
+    @staticmethod
+    def _retrieve(manager: typing.Any, id_: str) -> Model | None:
+        try:
+            return manager.retrieve(id_)
+        except NotFound:
+            return None
@@ -0,0 +1,694 @@
+"""
+A local stand-in for the CompanyCam v2 API, for load and concurrency testing without
+touching the real service. It implements every path defined by the managers in
+`companycam.v2.managers`, keeping state in memory so creates, updates and deletes are
+visible to later requests.
+
+```py
+server = StandInServer(
+    Store.generate(projects=10_000, photos_per_project=50),
+    latency=0.05,  # seconds added to every response
+    error_rate=0.01,  # fraction of requests which fail with a 500
+    rate_limit=100,  # requests per second before responding with 429s
+)
+
+# in-process, without a network
+api = companycam.API(
+    token="ANY_TOKEN",
+    server_url="http://stand-in",
+    transport=httpx.WSGITransport(app=server.wsgi),
+)
+```
+
+`StandInServer` is also an ASGI app, so it can be served with e.g.
+`uvicorn --factory companycam.v2.server:create_app`. Without extra dependencies it can
+be served (with one thread per connection) by:
+
+```sh
+python -m companycam.v2.server --port 8000 --projects 10000
+```
+
+and driven with `companycam.API(token="ANY_TOKEN", server_url="http://localhost:8000")`.
+Any bearer token is accepted.
+"""
+
+import argparse
+import asyncio
+import inspect
+import itertools
+import json
+import math
+import random
+import re
+import threading
+import time
+from collections import defaultdict
+from collections.abc import Callable, Iterable, Iterator
+from http import HTTPStatus
+from os import PathLike
+from socketserver import ThreadingMixIn
+from typing import Any
+from urllib.parse import parse_qsl
+from wsgiref.simple_server import WSGIRequestHandler, WSGIServer, make_server
+
+from companycam.manager import BaseManager
+from companycam.pagination import PER_PAGE
+from companycam.pool import TokenBucket
+from companycam.v2 import managers
+
+MAX_PER_PAGE = 100
+PROJECT_PHOTOS = re.compile(r"/projects/[^/]+/photos")
+
+Item = dict[str, Any]
+Params = dict[str, str]
+Result = tuple[int, Any]
+Headers = list[tuple[str, str]]
+
+
+class Route(object):
+    """A manager path e.g. "PUT /projects/{project}/assigned_users/{user}"."""
+
+    def __init__(self, method: str, template: str) -> None:
+        self.method = method.upper()
+        self.template = template
+        self.pattern = re.compile(
+            "^" + re.sub(r"\{(\w+)\}", r"(?P<\1>[^/]+)", template) + "$"
+        )
+        # paths ending with a parameter refer to one item of a collection
+        self.is_item = template.endswith("}")
+
+    def match(self, method: str, path: str) -> Params | None:
+        if method != self.method:
+            return None
+        match = self.pattern.match(path)
+        return match.groupdict() if match else None
+
+    def collection(self, path: str) -> str:
+        return path.rsplit("/", 1)[0] if self.is_item else path
+
+
+def manager_routes() -> list[Route]:
+    routes = [
+        Route(func._decorated_by.method, func._decorated_by.url)
+        for manager in BaseManager.__subclasses__()
+        if manager.__module__ == managers.__name__
+        for _, func in inspect.getmembers(
+            manager, lambda m: hasattr(m, "_decorated_by")
+        )
+    ]
+    # literal paths e.g. "/users/current" take precedence over "/users/{user}"
+    return sorted(routes, key=lambda r: r.template.count("{"))
+
+
+class Store(object):
+    """In-memory state: items by ID for each collection path e.g. "/projects" or
+    "/projects/123/labels". Photos are listed both in "/photos" and under their project.
+    """
+
+    def __init__(self, company: Item | None = None) -> None:
+        self.company = company or {"id": "1", "name": "Stand-in", "status": "active"}
+        self.collections: dict[str, dict[str, Item]] = defaultdict(dict)
+        self.lock = threading.RLock()
+        self._ids = itertools.count(10_000_000)
+
+    def new_id(self) -> str:
+        return str(next(self._ids))
+
+    def linked_collections(self, collection: str, item: Item) -> list[str]:
+        if collection != "/photos" and not PROJECT_PHOTOS.fullmatch(collection):
+            return [collection]
+        if project_id := item.get("project_id"):
+            return ["/photos", f"/projects/{project_id}/photos"]
+        return ["/photos"]
+
+    def add(self, collection: str, item: Item) -> Item:
+        now = int(time.time())
+        item.setdefault("id", self.new_id())
+        item.setdefault("company_id", self.company["id"])
+        item.setdefault("created_at", now)
+        item.setdefault("updated_at", now)
+        for name in self.linked_collections(collection, item):
+            self.collections[name][item["id"]] = item
+        return item
+
+    def get(self, collection: str, id: str) -> Item | None:
+        return self.collections[collection].get(id)
+
+    def remove(self, collection: str, id: str) -> Item | None:
+        if (item := self.get(collection, id)) is not None:
+            for name in self.linked_collections(collection, item):
+                self.collections[name].pop(id, None)
+        return item
+
+    def items(self, collection: str) -> Iterable[Item]:
+        return self.collections[collection].values()
+
+    @classmethod
+    def from_fixture(cls, path: str | PathLike) -> "Store":
+        """Seed a store from a file of responses by path template and method, e.g.
+        `tests/fixtures/v2_2xx_responses.json`. Sub-lists (e.g. "/projects/{}/labels")
+        are seeded for every project or photo.
+        """
+        with open(path) as f:
+            responses = json.load(f)
+        lists = {
+            template: json.loads(methods["get"]["content"])
+            for template, methods in responses.items()
+            if "get" in methods
+        }
+        store = cls(company=lists.pop("/company", None))
+        for template, items in sorted(lists.items(), key=lambda t: "{}" in t[0]):
+            if isinstance(items, list):
+                store._seed(template, items)
+        return store
+
+    def _seed(self, template: str, items: list[Item]) -> None:
+        if "{}" not in template:
+            collections = [template]
+        elif template != "/projects/{}/photos":
+            parent = template.split("/{}")[0]
+            collections = [
+                template.replace("{}", id) for id in self.collections[parent]
+            ]
+        else:
+            # already listed under their projects by "/photos"
+            collections = []
+        for collection, item in itertools.product(collections, items):
+            self.add(collection, dict(item))
+
+    @classmethod
+    def generate(
+        cls,
+        projects: int = 100,
+        photos_per_project: int = 10,
+        users: int = 10,
+        tags: int = 20,
+        seed: int | None = 0,
+    ) -> "Store":
+        """Generate a synthetic dataset, e.g. to load test against large lists."""
+        rng = random.Random(seed)
+        store = cls()
+        now = int(time.time())
+        for i in range(users):
+            store.add("/users", generate_user(i))
+        creators = list(store.items("/users")) or [generate_user(0)]
+        for i in range(tags):
+            store.add("/tags", {"display_value": f"Tag {i}", "value": f"tag {i}"})
+        photos = []
+        for i in range(projects):
+            project = store.add("/projects", generate_project(i, rng, creators, now))
+            photos += [
+                generate_photo(project, rng, creators, now)
+                for _ in range(photos_per_project)
+            ]
+        # newest first, like the API's lists of photos (photos created later are
+        # listed last)
+        for photo in sorted(photos, key=lambda p: -p["captured_at"]):
+            store.add("/photos", photo)
+        return store
+
+
+def generate_user(i: int) -> Item:
+    return {
+        "first_name": "User",
+        "last_name": str(i),
+        "email_address": f"user{i}@example.com",
+        "status": "active",
+    }
+
+
+def creator_fields(creator: Item) -> Item:
+    return {
+        "creator_id": creator.get("id"),
+        "creator_type": "User",
+        "creator_name": f"{creator.get('first_name')} {creator.get('last_name')}",
+    }
+
+
+def generate_project(
+    i: int, rng: random.Random, creators: list[Item], now: int
+) -> Item:
+    created_at = now - rng.randrange(365 * 24 * 3600)
+    return {
+        **creator_fields(rng.choice(creators)),
+        "name": f"Project {i}",
+        "status": "active",
+        "address": {"street_address_1": f"{i} Main St", "country": "US"},
+        "coordinates": {"lat": rng.uniform(25, 49), "lon": rng.uniform(-124, -67)},
+        "created_at": created_at,
+        "updated_at": created_at,
+    }
+
+
+def generate_photo(
+    project: Item, rng: random.Random, creators: list[Item], now: int
+) -> Item:
+    captured_at = rng.randrange(project["created_at"], now + 1)
+    coordinates = project["coordinates"]
+    return {
+        **creator_fields(rng.choice(creators)),
+        "project_id": project["id"],
+        "processing_status": "processed",
+        "coordinates": [
+            {
+                "lat": coordinates["lat"] + rng.uniform(-0.001, 0.001),
+                "lon": coordinates["lon"] + rng.uniform(-0.001, 0.001),
+            }
+        ],
+        "hash": "%032x" % rng.getrandbits(128),
+        "internal": False,
+        "captured_at": captured_at,
+        "created_at": captured_at,
+        "updated_at": captured_at,
+    }
+
+
+# Handlers: `(store, route, path, params, query, body) -> (status code, data)`
+
+Handler = Callable[[Store, Route, str, Params, Params, Any], Result]
+
+ENVELOPES = {"photo", "tag", "group", "comment", "document"}
+NOT_FOUND: Result = (404, {"errors": ["Not found"]})
+INTEGER_PARAMS = ("page", "per_page", "start_date", "end_date")
+
+
+def unwrap(body: Any) -> Item:
+    """Remove envelopes e.g. `{"tag": {...}}`."""
+    if isinstance(body, dict) and len(body) == 1 and ENVELOPES & body.keys():
+        body = next(iter(body.values()))
+    return dict(body) if isinstance(body, dict) else {}
+
+
+def in_time_range(item: Item, query: Params) -> bool:
+    timestamp = item.get("captured_at", item.get("created_at")) or 0
+    start, end = query.get("start_date"), query.get("end_date")
+    return (start is None or timestamp >= int(start)) and (
+        end is None or timestamp <= int(end)
+    )
+
+
+def is_integer(value: str) -> bool:
+    try:
+        int(value)
+    except ValueError:
+        return False
+    return True
+
+
+def invalid_query(query: Params) -> Result | None:
+    """A 400 response if any of the query's integer parameters aren't integers."""
+    invalid = [p for p in INTEGER_PARAMS if p in query and not is_integer(query[p])]
+    if invalid:
+        return 400, {"errors": [f"{p} must be an integer" for p in invalid]}
+    return None
+
+
+def list_items(
+    store: Store, route: Route, path: str, params: Params, query: Params, body: Any
+) -> Result:
+    if error := invalid_query(query):
+        return error
+    page = max(1, int(query.get("page", 1)))
+    per_page = min(MAX_PER_PAGE, max(1, int(query.get("per_page", PER_PAGE))))
+    items: Iterator[Item] = iter(store.items(path))
+    if "start_date" in query or "end_date" in query:
+        items = (i for i in items if in_time_range(i, query))
+    start = (page - 1) * per_page
+    return 200, list(itertools.islice(items, start, start + per_page))
+
+
+def retrieve_item(
+    store: Store, route: Route, path: str, params: Params, query: Params, body: Any
+) -> Result:
+    item = store.get(route.collection(path), path.rsplit("/", 1)[1])
+    return (200, item) if item is not None else NOT_FOUND
+
+
+def prepare_photo(store: Store, params: Params, item: Item) -> Item:
+    item["project_id"] = params["project"]
+    item.setdefault("processing_status", "processed")
+    if uri := item.pop("uri", None):
+        item["urls"] = [{"type": "original", "uri": uri}]
+    return item
+
+
+def prepare_comment(store: Store, params: Params, item: Item) -> Item:
+    item["commentable_id"] = params.get("project") or params.get("photo")
+    item["commentable_type"] = "Project" if "project" in params else "Photo"
+    return item
+
+
+def prepare_document(store: Store, params: Params, item: Item) -> Item:
+    item["byte_size"] = len(item.pop("attachment", "")) * 3 // 4
+    item["project_id"] = params["project"]
+    return item
+
+
+def prepare_group(store: Store, params: Params, item: Item) -> Item:
+    if "users" in item:
+        users = (store.get("/users", id) for id in item["users"] or [])
+        item["users"] = [user for user in users if user is not None]
+    return item
+
+
+# fill in fields the API derives from the path and request body
+PREPARERS: dict[str, Callable[[Store, Params, Item], Item]] = {
+    "/projects/{project}/photos": prepare_photo,
+    "/projects/{project}/comments": prepare_comment,
+    "/photos/{photo}/comments": prepare_comment,
+    "/projects/{project}/documents": prepare_document,
+    "/groups": prepare_group,
+    "/groups/{group}": prepare_group,
+}
+
+
+def prepare_item(store: Store, route: Route, params: Params, item: Item) -> Item:
+    item.pop("id", None)
+    if preparer := PREPARERS.get(route.template):
+        return preparer(store, params, item)
+    return item
+
+
+def create_item(
+    store: Store, route: Route, path: str, params: Params, query: Params, body: Any
+) -> Result:
+    item = prepare_item(store, route, params, unwrap(body))
+    return 201, store.add(path, item)
+
+
+def update_item(
+    store: Store, route: Route, path: str, params: Params, query: Params, body: Any
+) -> Result:
+    item = store.get(route.collection(path), path.rsplit("/", 1)[1])
+    if item is None:
+        return NOT_FOUND
+    changes = prepare_item(store, route, params, unwrap(body))
+    item.update(changes, updated_at=int(time.time()))
+    return 200, item
+
+
+def delete_item(
+    store: Store, route: Route, path: str, params: Params, query: Params, body: Any
+) -> Result:
+    item = store.remove(route.collection(path), path.rsplit("/", 1)[1])
+    return (204, None) if item is not None else NOT_FOUND
+
+
+def retrieve_company(
+    store: Store, route: Route, path: str, params: Params, query: Params, body: Any
+) -> Result:
+    return 200, store.company
+
+
+def retrieve_current_user(
+    store: Store, route: Route, path: str, params: Params, query: Params, body: Any
+) -> Result:
+    user = next(iter(store.items("/users")), None)
+    return (200, user) if user is not None else NOT_FOUND
+
+
+def set_project_status(status: str) -> Handler:
+    def handler(
+        store: Store, route: Route, path: str, params: Params, query: Params, body: Any
+    ) -> Result:
+        project = store.get("/projects", params["project"])
+        if project is None:
+            return NOT_FOUND
+        project.update(status=status, updated_at=int(time.time()))
+        return (204, None) if status == "deleted" else (200, project)
+
+    return handler
+
+
+def update_notepad(
+    store: Store, route: Route, path: str, params: Params, query: Params, body: Any
+) -> Result:
+    project = store.get("/projects", params["project"])
+    if project is None:
+        return NOT_FOUND
+    project["notepad"] = unwrap(body).get("notepad", "")
+    return 200, {"notepad": project["notepad"]}
+
+
+def assign_user(
+    store: Store, route: Route, path: str, params: Params, query: Params, body: Any
+) -> Result:
+    user = store.get("/users", params["user"])
+    if user is None or store.get("/projects", params["project"]) is None:
+        return NOT_FOUND
+    store.collections[route.collection(path)][user["id"]] = user
+    return 201, user
+
+
+def create_invitation(
+    store: Store, route: Route, path: str, params: Params, query: Params, body: Any
+) -> Result:
+    invitation = {"project_id": params["project"], "status": "pending"}
+    invitation = store.add(path, invitation)
+    invitation["invite_url"] = f"https://stand-in.invalid/{invitation['id']}"
+    return 201, invitation
+
+
+def create_tags(
+    store: Store, route: Route, path: str, params: Params, query: Params, body: Any
+) -> Result:
+    if "photo" in params:
+        names = body.get("tags", []) if isinstance(body, dict) else []
+    else:
+        names = (body.get("project") or {}).get("labels", [])
+    tags = [
+        store.add(path, {"display_value": name, "value": name.lower()})
+        for name in names
+    ]
+    return 201, tags
+
+
+HANDLERS: dict[str, Handler] = {
+    "GET /company": retrieve_company,
+    "GET /users/current": retrieve_current_user,
+    "DELETE /projects/{project}": set_project_status("deleted"),
+    "PUT /projects/{project}/restore": set_project_status("active"),
+    "PUT /projects/{project}/notepad": update_notepad,
+    "PUT /projects/{project}/assigned_users/{user}": assign_user,
+    "POST /projects/{project}/invitations": create_invitation,
+    "POST /projects/{project}/labels": create_tags,
+    "POST /photos/{photo}/tags": create_tags,
+}
+
+
+def default_handler(route: Route) -> Handler:
+    if route.method == "GET":
+        return retrieve_item if route.is_item else list_items
+    return {"POST": create_item, "PUT": update_item, "DELETE": delete_item}[
+        route.method
+    ]
+
+
+class StandInServer(object):
+    """
+    **Parameters:**
+
+    * **store** - *(optional)* State to serve, e.g. from `Store.generate()` or
+    `Store.from_fixture()`. Defaults to an empty store.
+    * **latency** - *(optional)* Seconds added to every response.
+    * **latency_jitter** - *(optional)* Up to this many seconds are added to `latency`
+    at random.
+    * **error_rate** - *(optional)* Fraction of requests (between 0 and 1) which fail
+    with a 500 Internal Server Error.
+    * **rate_limit** - *(optional)* Requests per second allowed before responding with
+    429 Too Many Requests (with a `Retry-After` header).
+    * **burst** - *(optional)* Number of requests allowed at once before `rate_limit`
+    applies.
+    * **seed** - *(optional)* Seed for latency jitter and errors.
+    """
+
+    def __init__(
+        self,
+        store: Store | None = None,
+        latency: float = 0.0,
+        latency_jitter: float = 0.0,
+        error_rate: float = 0.0,
+        rate_limit: float | None = None,
+        burst: float | None = None,
+        seed: int | None = None,
+    ) -> None:
+        self.store = store if store is not None else Store()
+        self.latency = latency
+        self.latency_jitter = latency_jitter
+        self.error_rate = error_rate
+        self.bucket = TokenBucket(rate_limit, burst) if rate_limit else None
+        self.routes = manager_routes()
+        self._random = random.Random(seed)
+
+    def delay(self) -> float:
+        return self.latency + self._random.uniform(0, self.latency_jitter)
+
+    def find_route(self, method: str, path: str) -> tuple[Route, Params] | None:
+        for route in self.routes:
+            if (params := route.match(method, path)) is not None:
+                return route, params
+        return None
+
+    def reject(self, authorization: str) -> tuple[int, Any, Headers] | None:
+        """Reject unauthenticated, throttled and (at random) failed requests."""
+        if not authorization.startswith("Bearer "):
+            return 401, {"errors": ["Unauthorized"]}, []
+        if self.bucket and (wait := self.bucket.try_acquire()):
+            retry_after = str(max(1, math.ceil(wait)))
+            return (
+                429,
+                {"errors": ["Too many requests"]},
+                [("retry-after", retry_after)],
+            )
+        if self.error_rate and self._random.random() < self.error_rate:
+            return 500, {"errors": ["Internal server error"]}, []
+        return None
+
+    def dispatch(
+        self, method: str, path: str, query_string: str, body: bytes
+    ) -> tuple[int, bytes]:
+        if (found := self.find_route(method, path.rstrip("/") or "/")) is None:
+            return NOT_FOUND[0], encode(NOT_FOUND[1])
+        route, params = found
+        handler = HANDLERS.get(f"{route.method} {route.template}")
+        handler = handler or default_handler(route)
+        data = json.loads(body) if body else None
+        with self.store.lock:
+            status, result = handler(
+                self.store, route, path, params, dict(parse_qsl(query_string)), data
+            )
+            # serialize while locked, since items may be updated by other requests
+            return status, encode(result) if status != 204 else b""
+
+    def respond(
+        self, method: str, path: str, query_string: str, authorization: str, body: bytes
+    ) -> tuple[int, Headers, bytes]:
+        """Respond to a request with a status code, headers and content."""
+        headers: Headers = []
+        if rejected := self.reject(authorization):
+            status, data, headers = rejected
+            content = encode(data)
+        else:
+            status, content = self.dispatch(method, path, query_string, body)
+        return (
+            status,
+            [
+                ("content-type", "application/json"),
+                ("content-length", str(len(content))),
+                *headers,
+            ],
+            content,
+        )
+
+    async def __call__(self, scope: dict, receive: Callable, send: Callable) -> None:
+        """ASGI interface."""
+        if scope["type"] == "lifespan":
+            while (message := await receive())["type"] != "lifespan.shutdown":
+                await send({"type": "lifespan.startup.complete"})
+            await send({"type": "lifespan.shutdown.complete"})
+            return
+        body = b""
+        more_body = True
+        while more_body:
+            message = await receive()
+            body += message.get("body", b"")
+            more_body = message.get("more_body", False)
+        headers = dict(scope["headers"])
+        status, response_headers, content = self.respond(
+            scope["method"],
+            scope["path"],
+            scope["query_string"].decode("latin-1"),
+            headers.get(b"authorization", b"").decode("latin-1"),
+            body,
+        )
+        if delay := self.delay():
+            await asyncio.sleep(delay)
+        await send(
+            {
+                "type": "http.response.start",
+                "status": status,
+                "headers": [(k.encode(), v.encode()) for k, v in response_headers],
+            }
+        )
+        await send({"type": "http.response.body", "body": content})
+
+    def wsgi(self, environ: dict, start_response: Callable) -> list[bytes]:
+        """WSGI interface, e.g. for `httpx.WSGITransport(app=server.wsgi)`."""
+        length = int(environ.get("CONTENT_LENGTH") or 0)
+        status, headers, content = self.respond(
+            environ["REQUEST_METHOD"],
+            environ["PATH_INFO"],
+            environ.get("QUERY_STRING", ""),
+            environ.get("HTTP_AUTHORIZATION", ""),
+            environ["wsgi.input"].read(length) if length else b"",
+        )
+        if delay := self.delay():
+            time.sleep(delay)
+        start_response(f"{status} {HTTPStatus(status).phrase}", headers)
+        return [content]
+
+
+def encode(data: Any) -> bytes:
+    return json.dumps(data, separators=(",", ":")).encode()
+
+
+def create_app(**kwargs: Any) -> StandInServer:
+    """ASGI app factory serving a generated dataset, see `Store.generate()`."""
+    return StandInServer(Store.generate(**kwargs))
+
+
+class ThreadingWSGIServer(ThreadingMixIn, WSGIServer):
+    daemon_threads = True
+
+
+class QuietRequestHandler(WSGIRequestHandler):
+    # logging every request slows down load tests
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(
+        prog="python -m companycam.v2.server",
+        description="Serve a local stand-in for the CompanyCam v2 API.",
+    )
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--fixture", help="seed from a fixture file of responses")
+    parser.add_argument("--projects", type=int, default=100)
+    parser.add_argument("--photos-per-project", type=int, default=10)
+    parser.add_argument("--users", type=int, default=10)
+    parser.add_argument("--tags", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--latency-jitter", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--rate-limit", type=float)
+    parser.add_argument("--burst", type=float)
+    args = parser.parse_args(argv)
+    if args.fixture:
+        store = Store.from_fixture(args.fixture)
+    else:
+        store = Store.generate(
+            args.projects, args.photos_per_project, args.users, args.tags
+        )
+    server = StandInServer(
+        store,
+        latency=args.latency,
+        latency_jitter=args.latency_jitter,
+        error_rate=args.error_rate,
+        rate_limit=args.rate_limit,
+        burst=args.burst,
+    )
+    with make_server(
+        args.host,
+        args.port,
+        server.wsgi,
+        server_class=ThreadingWSGIServer,
+        handler_class=QuietRequestHandler,
+    ) as httpd:
+        print(f"Serving on http://{args.host}:{args.port}")
+        httpd.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+from collections import Counter
+
+import pytest
+from pytest_mock import MockerFixture
+
+import companycam
+from companycam.aggregation import Aggregator, iter_json_pages
+from companycam.pagination import list_all
+from companycam.v2.server import StandInServer, Store
+
+from . import utils
+
+DAY = 86400
+
+
+@pytest.fixture
+def api() -> companycam.API:
+    server = StandInServer(Store.generate(projects=5, photos_per_project=23))
+    return utils.stand_in_api(server)
+
+
+def test_aggregator_buckets() -> None:
+    aggregator = Aggregator(["project_id"], bucket="day", bucket_field="captured_at")
+    aggregator.add(
+        [
+            {"project_id": "1", "captured_at": 0},
+            {"project_id": "1", "captured_at": DAY - 1},
+            {"project_id": "1", "captured_at": DAY},
+            {"project_id": "2", "captured_at": None},
+            {"captured_at": 0},
+        ]
+    )
+    assert aggregator.rows() == [
+        {"project_id": "1", "day": "1970-01-01", "count": 2},
+        {"project_id": "1", "day": "1970-01-02", "count": 1},
+        {"project_id": "2", "day": None, "count": 1},
+        {"project_id": None, "day": "1970-01-01", "count": 1},
+    ]
+    assert aggregator.total == 5
+
+
+@pytest.mark.parametrize(
+    "bucket,label",
+    [
+        ("hour", "1970-01-05T01:00"),
+        ("week", "1970-W02"),
+        ("month", "1970-01"),
+        ("year", "1970"),
+    ],
+)
+def test_aggregator_bucket_labels(bucket: str, label: str) -> None:
+    aggregator = Aggregator(bucket=bucket)
+    aggregator.add([{"created_at": 4 * DAY + 3600}])
+    assert aggregator.rows() == [{bucket: label, "count": 1}]
+
+
+def test_aggregator_unknown_bucket() -> None:
+    with pytest.raises(ValueError):
+        Aggregator(bucket="fortnight")
+
+
+def test_aggregate_photos(api: companycam.API, mocker: MockerFixture) -> None:
+    photos = list_all(api.photos.list)
+    parse = mocker.patch("companycam.manager.parse_obj_as")
+    counts = api.photos.aggregate(group_by=["project_id"], per_page=10)
+    # no models were created
+    parse.assert_not_called()
+    assert counts.total == 115
+    assert dict(counts.counts) == Counter((p.project_id,) for p in photos)
+
+
+def test_aggregate_projects(api: companycam.API) -> None:
+    assert api.projects.aggregate(group_by=["status"]).rows() == [
+        {"status": "active", "count": 5}
+    ]
+
+
+def test_iter_json_pages(api: companycam.API) -> None:
+    pages = list(iter_json_pages(api.projects.list, per_page=2))
+    assert [len(page) for page in pages] == [2, 2, 1]
+    assert isinstance(pages[0][0], dict)
@@ -0,0 +1,94 @@
+import itertools
+from datetime import datetime, timezone
+
+import pytest
+
+import companycam
+from companycam.backfill import Backfill, Window
+from companycam.pagination import list_all
+from companycam.v2.server import StandInServer, Store
+
+from . import utils
+
+
+@pytest.fixture
+def api() -> companycam.API:
+    return utils.stand_in_api(
+        StandInServer(Store.generate(projects=20, photos_per_project=30))
+    )
+
+
+def test_backfill_everything(api: companycam.API) -> None:
+    backfill = api.photos.backfill(0, per_page=20, max_workers=4)
+    ids = [photo.id for photo in backfill]
+    assert len(ids) == len(set(ids)) == 600
+    assert set(ids) == {photo.id for photo in list_all(api.photos.list)}
+
+
+def test_backfill_time_range(api: companycam.API) -> None:
+    photos = list_all(api.photos.list)
+    captured = sorted(photo.captured_at or 0 for photo in photos)
+    start, end = captured[100], captured[400]
+    expected = {p.id for p in photos if start <= (p.captured_at or 0) <= end}
+    backfill = api.photos.backfill(
+        datetime.fromtimestamp(start, timezone.utc), end, per_page=10
+    )
+    ids = [photo.id for photo in backfill]
+    assert len(ids) == len(expected)
+    assert set(ids) == expected
+
+
+def test_dense_window_is_split() -> None:
+    # every photo is in the newest of the initial windows, many at the same second
+    store = Store.generate(projects=1, photos_per_project=0)
+    project = next(iter(store.items("/projects")))
+    for i in range(300):
+        photo = {"project_id": project["id"], "captured_at": 1_000_000 - i // 7}
+        store.add("/photos", photo)
+    api = utils.stand_in_api(StandInServer(store))
+    backfill = Backfill(api.photos.list, 0, 1_000_000, per_page=10, max_workers=4)
+    ids = [photo.id for photo in backfill]
+    assert len(ids) == len(set(ids)) == 300
+    assert backfill.splits > 0
+    # the initial windows, pages of the dense window and of the windows split from
+    # it, and the last (partial) page of each window
+    assert backfill.pages_fetched < 4 + 30 + 2 * backfill.splits + 1
+
+
+def test_split_skips_boundary_items() -> None:
+    window = Window(100, 200)
+    for timestamp, id in [(200, "a"), (180, "b"), (150, "c"), (150, "d")]:
+        window.observe(timestamp, id)
+    halves = window.split()
+    assert halves is not None
+    newer, older = halves
+    assert (newer.start, newer.end, newer.skip) == (125, 150, {"c", "d"})
+    assert (older.start, older.end) == (100, 124)
+    # a page of skipped items at the end of the split window makes no progress, so
+    # the window is paginated rather than split again
+    for id in ["c", "d"]:
+        newer.observe(150, id)
+    assert newer.split() is None
+    one_second = Window(100, 100)
+    one_second.observe(100, "a")
+    assert one_second.split() is None
+
+
+def test_more_than_a_page_at_the_boundary() -> None:
+    # 25 photos share the second at which the newest window can be split
+    store = Store.generate(projects=1, photos_per_project=0)
+    project = next(iter(store.items("/projects")))
+    for timestamp in [7] * 5 + [6] * 25 + [5] * 5:
+        store.add("/photos", {"project_id": project["id"], "captured_at": timestamp})
+    api = utils.stand_in_api(StandInServer(store))
+    for _ in range(20):
+        backfill = Backfill(api.photos.list, 0, 7, per_page=10, max_workers=3)
+        ids = [photo.id for photo in backfill]
+        assert len(ids) == len(set(ids)) == 35
+
+
+def test_project_photos_stop_early(api: companycam.API) -> None:
+    project = list_all(api.projects.list)[0]
+    backfill = Backfill(api.projects.list_photos, 0, 2**31, args=(project,), per_page=5)
+    assert len(list(itertools.islice(backfill, 3))) == 3
+    assert len(list(backfill)) == 30
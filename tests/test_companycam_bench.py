@@ -0,0 +1,75 @@
+import json
+
+import pytest
+
+from companycam.__main__ import main
+from companycam.bench import OPERATIONS, Sample, Workload, parse_mix, percentile
+from companycam.v2.server import StandInServer, Store
+
+from . import utils
+
+
+def test_parse_mix() -> None:
+    assert parse_mix("list_photos=70, retrieve_photo=30,create_tag") == {
+        "list_photos": 70.0,
+        "retrieve_photo": 30.0,
+        "create_tag": 1.0,
+    }
+    with pytest.raises(ValueError, match="Unknown operation 'nope'"):
+        parse_mix("nope=1")
+    with pytest.raises(ValueError):
+        parse_mix("list_photos=0")
+
+
+def test_percentile() -> None:
+    values = [float(v) for v in range(1, 101)]
+    assert percentile(values, 50) == 50
+    assert percentile(values, 99) == 99
+    assert percentile(values, 0) == 1
+    assert percentile([2.0], 95) == 2
+
+
+@pytest.mark.parametrize("client", ["sync", "async"])
+def test_workload_run(client: str) -> None:
+    api = utils.stand_in_api(
+        StandInServer(Store.generate(projects=3, photos_per_project=2))
+    )
+    report = Workload(api, dict.fromkeys(OPERATIONS, 1.0)).run(
+        concurrency=3, duration=0.2, client=client
+    )
+    summary = report.summary()
+    assert summary["total"]["requests"] > len(OPERATIONS)
+    assert summary["total"]["errors"] == {}
+    assert summary["total"]["p50_ms"] <= summary["total"]["p99_ms"]
+    assert set(summary["operations"]) <= set(OPERATIONS)
+    assert "total" in report.table()
+
+
+def test_workload_counts_errors() -> None:
+    api = utils.stand_in_api(StandInServer(error_rate=1.0))
+    sample = Sample(project_ids=["1"], photo_ids=["1"])
+    report = Workload(api, {"retrieve_photo": 1}, sample=sample).run(
+        concurrency=1, duration=0.05
+    )
+    stats = report.operations["retrieve_photo"]
+    assert stats.latencies == []
+    assert stats.errors["InternalServerError"] == stats.requests > 0
+    assert "x InternalServerError" in report.table()
+
+
+def test_main_json(capsys: pytest.CaptureFixture) -> None:
+    main(["bench", "--stand-in", "--duration", "0.1", "--format", "json"])
+    summary = json.loads(capsys.readouterr().out)
+    assert summary["client"] == "sync"
+    assert summary["total"]["requests"] > 0
+
+
+def test_main_profile(capsys: pytest.CaptureFixture) -> None:
+    main(["bench", "--stand-in", "--duration", "0.1", "--profile"])
+    out = capsys.readouterr().out
+    assert "PhotosManager.list" in out and "validate" in out
+
+
+def test_main_requires_server_url() -> None:
+    with pytest.raises(SystemExit):
+        main(["bench", "--token", "ANY_TOKEN"])
@@ -0,0 +1,127 @@
+from pathlib import Path
+
+import httpx
+import pytest
+
+import companycam
+from companycam.cache import SQLiteCache, parent_paths, token_scope
+
+PROJECT = {"id": "1", "name": "Project"}
+
+
+class Server(object):
+    def __init__(self) -> None:
+        self.requests: list[httpx.Request] = []
+
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        self.requests.append(request)
+        if request.method == "DELETE":
+            return httpx.Response(204)
+        if request.url.path.endswith("/projects"):
+            return httpx.Response(200, json=[PROJECT])
+        return httpx.Response(200, json=PROJECT)
+
+
+@pytest.fixture
+def server() -> Server:
+    return Server()
+
+
+@pytest.fixture
+def cache(tmp_path: Path) -> SQLiteCache:
+    return SQLiteCache(tmp_path / "cache.sqlite")
+
+
+def make_api(
+    server: Server, cache: SQLiteCache, token: str = "token"
+) -> companycam.API:
+    return companycam.API(
+        token=token, transport=httpx.MockTransport(server), cache=cache
+    )
+
+
+def test_parent_paths() -> None:
+    assert parent_paths("/v2/projects/1/notepad") == [
+        "/v2/projects/1/notepad",
+        "/v2/projects/1",
+        "/v2/projects",
+        "/v2",
+    ]
+
+
+def test_token_scope_does_not_contain_token() -> None:
+    assert "secret" not in token_scope(companycam.api.BasicTokenAuth("secret"))
+
+
+def test_SQLiteCache_serves_repeated_GET_requests_from_cache(
+    server: Server, cache: SQLiteCache
+) -> None:
+    api = make_api(server, cache)
+    first = api.projects.retrieve("1")
+    second = api.projects.retrieve("1")
+    assert first == second
+    assert len(server.requests) == 1
+
+
+def test_SQLiteCache_keys_include_query(server: Server, cache: SQLiteCache) -> None:
+    api = make_api(server, cache)
+    api.projects.list({"page": 1})
+    api.projects.list({"page": 2})
+    assert len(server.requests) == 2
+
+
+def test_SQLiteCache_entries_are_scoped_to_access_token(
+    server: Server, cache: SQLiteCache
+) -> None:
+    make_api(server, cache, token="a").projects.retrieve("1")
+    make_api(server, cache, token="b").projects.retrieve("1")
+    assert len(server.requests) == 2
+
+
+def test_SQLiteCache_persists_between_instances(server: Server, tmp_path: Path) -> None:
+    make_api(server, SQLiteCache(tmp_path / "cache.sqlite")).projects.retrieve("1")
+    make_api(server, SQLiteCache(tmp_path / "cache.sqlite")).projects.retrieve("1")
+    assert len(server.requests) == 1
+
+
+def test_SQLiteCache_writes_invalidate_retrieve_and_list_entries(
+    server: Server, cache: SQLiteCache
+) -> None:
+    api = make_api(server, cache)
+    api.projects.retrieve("1")
+    api.projects.list()
+    api.projects.delete("1")
+    api.projects.retrieve("1")
+    api.projects.list()
+    assert [r.method for r in server.requests] == ["GET", "GET", "DELETE", "GET", "GET"]
+
+
+def test_SQLiteCache_endpoint_ttl_of_0_disables_caching(
+    server: Server, tmp_path: Path
+) -> None:
+    cache = SQLiteCache(tmp_path / "cache.sqlite", ttls={"/projects/{project}": 0})
+    api = make_api(server, cache)
+    api.projects.retrieve("1")
+    api.projects.retrieve("1")
+    assert len(server.requests) == 2
+
+
+def test_SQLiteCache_does_not_serve_expired_entries(
+    server: Server, tmp_path: Path
+) -> None:
+    cache = SQLiteCache(tmp_path / "cache.sqlite", ttl=-1)
+    api = make_api(server, cache)
+    api.projects.list()
+    api.projects.list()
+    assert len(server.requests) == 2
+
+
+def test_SQLiteCache_evicts_least_recently_used_entries(
+    server: Server, tmp_path: Path
+) -> None:
+    cache = SQLiteCache(tmp_path / "cache.sqlite", max_size=1)
+    api = make_api(server, cache)
+    api.projects.retrieve("1")
+    api.projects.retrieve("2")
+    api.projects.retrieve("1")
+    assert len(server.requests) == 3
@@ -0,0 +1,108 @@
+import gzip
+import time
+from pathlib import Path
+
+import httpx
+import pytest
+
+import companycam
+from companycam.cassette import (
+    CassetteMiss,
+    RecordingTransport,
+    ReplayTransport,
+    read_cassette,
+)
+
+NEW_PROJECT = companycam.v2.models.Project(**{"name": "New"})
+
+
+def server(request: httpx.Request) -> httpx.Response:
+    if request.url.path.endswith("/missing"):
+        return httpx.Response(404, json={"errors": ["Not found"]})
+    if request.method == "POST":
+        return httpx.Response(201, json={"id": "2", "name": "New"})
+    return httpx.Response(200, json={"id": "1", "name": "Project"})
+
+
+@pytest.fixture
+def cassette(tmp_path: Path) -> Path:
+    path = tmp_path / "session.ndjson.gz"
+    with RecordingTransport(path, httpx.MockTransport(server)) as transport:
+        api = companycam.API(token="SECRET_TOKEN", transport=transport)
+        api.projects.retrieve("1")
+        api.projects.create(NEW_PROJECT)
+        with pytest.raises(companycam.NotFound):
+            api.projects.retrieve("missing")
+    return path
+
+
+def test_RecordingTransport_records_requests_without_auth(cassette: Path) -> None:
+    entries = list(read_cassette(cassette))
+    assert [e["method"] for e in entries] == ["GET", "POST", "GET"]
+    assert all("authorization" not in e["request_headers"] for e in entries)
+    assert b"SECRET_TOKEN" not in cassette.read_bytes()
+
+
+def test_ReplayTransport_serves_recorded_responses(cassette: Path) -> None:
+    api = companycam.API(
+        token="other", transport=ReplayTransport(cassette, latency_scale=0)
+    )
+    assert api.projects.retrieve("1").name == "Project"
+    assert api.projects.create(NEW_PROJECT).id == "2"
+
+
+def test_compressed_responses_round_trip(tmp_path: Path) -> None:
+    def gzip_server(request: httpx.Request) -> httpx.Response:
+        content = gzip.compress(b'{"id": "1", "name": "Project"}')
+        return httpx.Response(
+            200, headers={"content-encoding": "gzip"}, content=content
+        )
+
+    path = tmp_path / "session.ndjson.gz"
+    with RecordingTransport(path, httpx.MockTransport(gzip_server)) as transport:
+        api = companycam.API(token="ANY_TOKEN", transport=transport)
+        assert api.projects.retrieve("1").name == "Project"
+    api = companycam.API(
+        token="other", transport=ReplayTransport(path, latency_scale=0)
+    )
+    assert api.projects.retrieve("1").name == "Project"
+
+
+def test_ReplayTransport_runs_response_hooks(cassette: Path) -> None:
+    api = companycam.API(
+        token="other", transport=ReplayTransport(cassette, latency_scale=0)
+    )
+    with pytest.raises(companycam.NotFound):
+        api.projects.retrieve("missing")
+
+
+def test_ReplayTransport_raises_CassetteMiss_for_unrecorded_requests(
+    cassette: Path,
+) -> None:
+    api = companycam.API(token="other", transport=ReplayTransport(cassette))
+    with pytest.raises(CassetteMiss):
+        api.projects.retrieve("3")
+
+
+def test_ReplayTransport_loops_by_default(cassette: Path) -> None:
+    replay = ReplayTransport(cassette, latency_scale=0, loop=False)
+    api = companycam.API(token="other", transport=replay)
+    api.projects.retrieve("1")
+    with pytest.raises(CassetteMiss):
+        api.projects.retrieve("1")
+    api = companycam.API(
+        token="other", transport=ReplayTransport(cassette, latency_scale=0)
+    )
+    api.projects.retrieve("1")
+    api.projects.retrieve("1")
+
+
+def test_ReplayTransport_scales_recorded_latency(cassette: Path) -> None:
+    replay = ReplayTransport(cassette, latency_scale=1)
+    for entries in replay.entries.values():
+        for entry in entries:
+            entry["elapsed"] = 0.05
+    api = companycam.API(token="other", transport=replay)
+    start = time.monotonic()
+    api.projects.retrieve("1")
+    assert time.monotonic() - start >= 0.05
@@ -0,0 +1,98 @@
+import time
+
+import httpx
+import pytest
+
+import companycam
+from companycam.deadlines import DeadlineExceeded, deadline, remaining
+from companycam.pagination import list_all
+
+
+class Server(object):
+    """Records each request's timeouts, and takes `delay` seconds to respond. Times out
+    like a real transport if the read timeout is shorter than the delay.
+    """
+
+    def __init__(self, delay: float = 0, json: object = None) -> None:
+        self.delay = delay
+        self.json = {"id": "1", "name": "Psych"} if json is None else json
+        self.timeouts: list[dict] = []
+
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        timeout = request.extensions["timeout"]
+        self.timeouts.append(timeout)
+        if timeout["read"] is not None and timeout["read"] < self.delay:
+            time.sleep(timeout["read"])
+            raise httpx.ReadTimeout("Timed out", request=request)
+        time.sleep(self.delay)
+        return httpx.Response(200, json=self.json)
+
+
+def make_api(server: Server, **kwargs) -> companycam.API:
+    return companycam.API(
+        token="ANY_TOKEN", transport=httpx.MockTransport(server), **kwargs
+    )
+
+
+def test_default_timeout() -> None:
+    server = Server()
+    make_api(server).company.retrieve()
+    make_api(server, timeout=10).company.retrieve()
+    assert [t["read"] for t in server.timeouts] == [5.0, 10.0]
+
+
+def test_per_call_timeout() -> None:
+    server = Server()
+    make_api(server).company.retrieve(timeout=httpx.Timeout(2.0, connect=1.0))
+    assert server.timeouts == [{"connect": 1.0, "read": 2.0, "write": 2.0, "pool": 2.0}]
+
+
+def test_deadline_caps_timeouts() -> None:
+    server = Server()
+    api = make_api(server, timeout=None)
+    with deadline(1):
+        api.company.retrieve()
+        api.company.retrieve(timeout=0.5)
+    assert 0.9 < server.timeouts[0]["read"] <= 1
+    assert server.timeouts[1]["read"] == 0.5
+
+
+def test_nested_deadlines() -> None:
+    assert remaining() is None
+    with deadline(1) as outer:
+        with deadline(10) as inner:
+            assert inner == outer
+        with deadline(0.5) as inner:
+            assert inner < outer
+    assert remaining() is None
+
+
+def test_requests_are_not_sent_after_deadline() -> None:
+    server = Server()
+    with deadline(0), pytest.raises(DeadlineExceeded):
+        make_api(server).company.retrieve()
+    assert server.timeouts == []
+
+
+def test_timeout_within_deadline_is_not_deadline_exceeded() -> None:
+    api = make_api(Server(delay=0.2))
+    with deadline(5), pytest.raises(httpx.ReadTimeout) as exc_info:
+        api.company.retrieve(timeout=0.05)
+    assert not isinstance(exc_info.value, DeadlineExceeded)
+
+
+def test_deadline_across_concurrent_requests() -> None:
+    server = Server(delay=0.5, json={"id": "1"})
+    start = time.monotonic()
+    with deadline(0.1), pytest.raises(DeadlineExceeded):
+        make_api(server).projects.hydrate("1")
+    assert time.monotonic() - start < 0.4
+    assert len(server.timeouts) == 8
+
+
+def test_deadline_across_pages() -> None:
+    server = Server(delay=0.05, json=[{"id": "1"}])
+    with deadline(0.3), pytest.raises(DeadlineExceeded):
+        list_all(make_api(server).projects.list, per_page=1)
+    # the crawl stops at the deadline
+    assert 3 <= len(server.timeouts) < 10
@@ -0,0 +1,194 @@
+import gzip
+import json
+import subprocess
+import sys
+from collections.abc import Callable, Iterable
+from pathlib import Path
+
+import pytest
+
+import companycam
+from companycam.__main__ import main
+from companycam.export import Checkpoint, Exporter, PagedList
+from companycam.parallel import ParallelDecoder
+from companycam.v2.server import StandInServer, Store
+
+from . import utils
+
+
+class CountingApp(object):
+    """Counts requests to a WSGI app, and fails every request after `fail_after`."""
+
+    def __init__(self, app: Callable, fail_after: int | None = None) -> None:
+        self.app = app
+        self.fail_after = fail_after
+        self.requests = 0
+
+    def __call__(self, environ: dict, start_response: Callable) -> Iterable[bytes]:
+        self.requests += 1
+        if self.fail_after is not None and self.requests > self.fail_after:
+            start_response("500 Internal Server Error", [])
+            return [b""]
+        return self.app(environ, start_response)
+
+
+def read_ndjson(path: Path) -> list[dict]:
+    with gzip.open(path, "rt") as f:
+        return [json.loads(line) for line in f]
+
+
+@pytest.fixture
+def server() -> StandInServer:
+    return StandInServer(Store.generate(projects=45, photos_per_project=7))
+
+
+def test_paged_list() -> None:
+    paged_list = PagedList("projects", "projects", list, skip_pages={2})
+    assert paged_list.take_page() == 1
+    # one page at a time until a full page is fetched
+    assert paged_list.take_page() is None
+    assert paged_list.page_fetched(1, full=True, window=2)
+    assert [paged_list.take_page(), paged_list.take_page()] == [3, 4]
+    assert paged_list.page_fetched(4, full=False, window=2)
+    assert paged_list.page_fetched(3, full=False, window=2)
+    assert paged_list.last_page == 3
+    assert paged_list.finished
+
+
+def test_export(tmp_path: Path, server: StandInServer) -> None:
+    counts = Exporter(
+        utils.stand_in_api(server),
+        tmp_path,
+        include=["photos", "assigned_users"],
+        per_page=10,
+        max_workers=4,
+    ).run()
+    assert counts == {"projects": 45, "photos": 315, "assigned_users": 0}
+    photos = read_ndjson(tmp_path / "photos.ndjson.gz")
+    assert len({p["id"] for p in photos}) == 315
+    projects = read_ndjson(tmp_path / "projects.ndjson.gz")
+    assert {p["project_id"] for p in photos} == {p["id"] for p in projects}
+    checkpoint = json.loads((tmp_path / "checkpoint.json").read_text())
+    # sub-lists of complete pages of projects are forgotten
+    assert list(checkpoint["lists"]) == ["projects"]
+    assert checkpoint["complete_project_pages"][:5] == [1, 2, 3, 4, 5]
+
+
+def test_export_with_decoder(tmp_path: Path, server: StandInServer) -> None:
+    with ParallelDecoder(max_workers=2) as decoder:
+        counts = Exporter(
+            utils.stand_in_api(server),
+            tmp_path,
+            include=["photos"],
+            per_page=10,
+            decoder=decoder,
+        ).run()
+    assert counts == {"projects": 45, "photos": 315}
+    photos = read_ndjson(tmp_path / "photos.ndjson.gz")
+    assert len({p["id"] for p in photos}) == 315
+    assert all(p["project_id"] for p in photos)
+
+
+def test_export_resumes(tmp_path: Path, server: StandInServer) -> None:
+    app = CountingApp(server.wsgi, fail_after=40)
+    exporter = Exporter(
+        utils.stand_in_api(app),
+        tmp_path,
+        include=["photos"],
+        per_page=10,
+        max_workers=4,
+    )
+    with pytest.raises(companycam.InternalServerError):
+        exporter.run()
+
+    app.fail_after = None
+    app.requests = 0
+    counts = exporter.run()
+    assert 0 < counts["photos"] < 315
+    # 5 pages of projects, 45 pages of photos and a few speculative pages
+    assert app.requests < 40
+    photos = read_ndjson(tmp_path / "photos.ndjson.gz")
+    assert len(photos) == len({p["id"] for p in photos}) == 315
+    assert len(read_ndjson(tmp_path / "projects.ndjson.gz")) == 45
+
+    app.requests = 0
+    assert exporter.run() == {"projects": 0, "photos": 0}
+    assert app.requests == 0
+
+
+KILLED_EXPORT = """
+import os, sys
+from companycam.export import Exporter
+from companycam.v2.server import StandInServer, Store
+from tests.test_companycam_export import CountingApp
+from tests.utils import stand_in_api
+
+class KillingApp(CountingApp):
+    def __call__(self, environ, start_response):
+        if self.requests == self.fail_after:
+            os._exit(1)
+        return super().__call__(environ, start_response)
+
+server = StandInServer(Store.generate(projects=45, photos_per_project=7))
+app = KillingApp(server.wsgi, fail_after=30)
+Exporter(
+    stand_in_api(app), sys.argv[1], include=["photos"], per_page=10, max_workers=1,
+    checkpoint_interval=0,
+).run()
+"""
+
+
+def test_export_resumes_after_process_is_killed(
+    tmp_path: Path, server: StandInServer
+) -> None:
+    process = subprocess.run(
+        [sys.executable, "-c", KILLED_EXPORT, str(tmp_path)],
+        cwd=Path(__file__).parent.parent,
+    )
+    assert process.returncode == 1
+    checkpoint = json.loads((tmp_path / "checkpoint.json").read_text())
+    assert 0 < checkpoint["sizes"]["photos"]
+
+    counts = Exporter(
+        utils.stand_in_api(server), tmp_path, include=["photos"], per_page=10
+    ).run()
+    assert 0 < counts["photos"] < 315
+    photos = read_ndjson(tmp_path / "photos.ndjson.gz")
+    assert len(photos) == len({p["id"] for p in photos}) == 315
+    assert len(read_ndjson(tmp_path / "projects.ndjson.gz")) == 45
+
+
+def test_checkpoint_settings_must_match(tmp_path: Path) -> None:
+    Checkpoint(tmp_path / "checkpoint.json", {"per_page": 10}).save()
+    with pytest.raises(ValueError, match="different settings"):
+        Checkpoint(tmp_path / "checkpoint.json", {"per_page": 50})
+
+
+def test_unknown_include(tmp_path: Path, server: StandInServer) -> None:
+    with pytest.raises(ValueError, match="Cannot include: nope"):
+        Exporter(utils.stand_in_api(server), tmp_path, include=["nope"])
+
+
+def test_export_parquet(tmp_path: Path, server: StandInServer) -> None:
+    ds = pytest.importorskip("pyarrow.dataset")
+    Exporter(
+        utils.stand_in_api(server),
+        tmp_path,
+        include=["photos"],
+        format="parquet",
+        per_page=10,
+        checkpoint_interval=0,
+    ).run()
+    assert not list(tmp_path.glob("*.tmp"))
+    table = ds.dataset(sorted(tmp_path.glob("photos-*.parquet"))).to_table()
+    assert table.num_rows == 315
+    assert str(table.schema.field("captured_at").type) == "int64"
+    # nested fields are stored as JSON
+    coordinates = table.column("coordinates")[0].as_py()
+    assert json.loads(coordinates)[0].keys() == {"lat", "lon"}
+
+
+def test_main_requires_token(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> None:
+    monkeypatch.delenv("COMPANYCAM_TOKEN", raising=False)
+    with pytest.raises(SystemExit):
+        main(["export", str(tmp_path), "--token", ""])
@@ -0,0 +1,81 @@
+import gc
+
+import httpx
+
+import companycam
+from companycam.identity import IdentityMap, should_intern
+from companycam.v2.models import Group, Photo, User
+
+PHOTO = {"id": "1", "company_id": "8292212", "creator_type": "User", "updated_at": 1}
+USER = {"id": "2", "company_id": "8292212", "updated_at": 1}
+
+
+def make_api(json: object, identity_map: IdentityMap) -> companycam.API:
+    transport = httpx.MockTransport(lambda request: httpx.Response(200, json=json))
+    return companycam.API(token="token", transport=transport, identity_map=identity_map)
+
+
+def test_should_intern_reference_and_enum_fields() -> None:
+    assert not should_intern("id")
+    assert should_intern("company_id")
+    assert should_intern("creator_type")
+    assert should_intern("status")
+    assert not should_intern("name")
+
+
+def test_IdentityMap_returns_same_instance_for_same_id_and_updated_at() -> None:
+    identity_map = IdentityMap()
+    first = identity_map.apply(Photo(**PHOTO))
+    second = identity_map.apply(Photo(**PHOTO))
+    assert first is second
+
+
+def test_IdentityMap_returns_new_instance_when_updated_at_changes() -> None:
+    identity_map = IdentityMap()
+    first = identity_map.apply(Photo(**PHOTO))
+    second = identity_map.apply(Photo(**{**PHOTO, "updated_at": 2}))
+    assert first is not second
+
+
+def test_IdentityMap_interns_strings() -> None:
+    identity_map = IdentityMap()
+    photos = identity_map.apply([Photo(**{**PHOTO, "id": str(i)}) for i in range(1, 3)])
+    assert photos[0].company_id is photos[1].company_id
+    assert photos[0].creator_type is photos[1].creator_type
+
+
+def test_IdentityMap_deduplicates_nested_models() -> None:
+    identity_map = IdentityMap()
+    groups = identity_map.apply(
+        [Group(**{"id": "1", "users": [USER]}), Group(**{"id": "2", "users": [USER]})]
+    )
+    assert groups[0].users[0] is groups[1].users[0]
+
+
+def test_IdentityMap_does_not_keep_unreferenced_instances() -> None:
+    identity_map = IdentityMap()
+    identity_map.apply(User(**USER))
+    gc.collect()
+    assert len(identity_map.instances) == 0
+
+
+def test_API_with_identity_map_returns_same_instances_across_responses() -> None:
+    identity_map = IdentityMap()
+    api = make_api([PHOTO], identity_map)
+    first = api.photos.list()
+    second = api.photos.list()
+    assert first[0] is second[0]
+
+
+def test_API_with_identity_map_tracks_changes_against_interned_strings() -> None:
+    api = make_api([PHOTO, {**PHOTO, "id": "3"}], IdentityMap())
+    photos = api.photos.list()
+    photos[1].company_id = "1"
+    assert photos[1].dirty_fields == {"company_id"}
+    assert (photos[1]._snapshot or {})["company_id"] is photos[0].company_id
+
+
+def test_API_without_identity_map_returns_new_instances() -> None:
+    transport = httpx.MockTransport(lambda request: httpx.Response(200, json=[PHOTO]))
+    api = companycam.API(token="token", transport=transport)
+    assert api.photos.list()[0] is not api.photos.list()[0]
@@ -96,3 +96,85 @@ def test_Model_dict_exclude_none_can_be_overridden() -> None:
     obj = ExampleModel(name="Name", address="Address")
     dict_ = obj.model_dump(exclude_none=False)
     assert "email" in dict_
+
+
+class ExampleModelWithNested(ExampleModel):
+    nested: ExampleModel | None = None
+    items: list[ExampleModel] = []
+
+
+def test_Model_constructed_has_set_fields_dirty() -> None:
+    obj = ExampleModelWithAlias(first_name="Name", address="Address")  # type: ignore
+    assert obj.dirty_fields == {"name", "address"}
+    obj.email = "a@b.com"
+    assert obj.dirty_fields == {"name", "address", "email"}
+
+
+def test_Model_mark_clean_tracks_changed_fields() -> None:
+    obj = models.mark_clean(ExampleModelWithAlias(name="Name", address="Address"))
+    assert obj.dirty_fields == set()
+    # assigning the same value isn't a change
+    obj.name = "Name"
+    assert obj.dirty_fields == set()
+    obj.first_name = "New name"
+    assert obj.dirty_fields == {"name"}
+
+
+def test_Model_nested_changes_are_dirty() -> None:
+    obj = models.mark_clean(
+        ExampleModelWithNested(
+            name="Name",
+            address="Address",
+            nested=ExampleModel(name="Nested", address="Address"),
+            items=[ExampleModel(name="Item", address="Address")],
+        )
+    )
+    assert obj.dirty_fields == set()
+    assert obj.nested is not None
+    obj.nested.name = "New name"
+    obj.items.append(ExampleModel(name="New item", address="Address"))
+    assert obj.dirty_fields == {"nested", "items"}
+    obj.mark_clean()
+    assert obj.dirty_fields == set()
+
+
+def test_Model_changes_in_place_are_dirty() -> None:
+    obj = models.mark_clean(
+        ExampleModelWithNested(
+            name="Name",
+            address="Address",
+            items=[ExampleModel(name="Item", address="Address")],
+        )
+    )
+    obj.items.pop()
+    assert obj.dirty_fields == {"items"}
+    obj.mark_clean()
+    obj.name = None
+    assert obj.dirty_fields == {"name"}
+    # changing a field back to its value when marked clean isn't a change
+    obj.name = "Name"
+    assert obj.dirty_fields == set()
+
+
+def test_Model_records_fields_when_first_read_or_assigned() -> None:
+    obj = models.mark_clean(
+        ExampleModelWithNested(
+            name="Name",
+            address="Address",
+            items=[ExampleModel(name="Item", address="Address")],
+        )
+    )
+    # nothing is copied when the model is marked clean
+    assert obj._snapshot == {}
+    assert obj.address == "Address"
+    item = obj.items[0]
+    obj.name = "New name"
+    assert obj._snapshot == {"items": [item], "name": "Name"}
+    # nested models which have been read track their own changes
+    assert item.tracks_changes
+
+
+def test_Model_dirty_fields_do_not_affect_equality() -> None:
+    obj = ExampleModel(name="Name", address="Address")
+    assert models.mark_clean(ExampleModel(name="Name", address="Address")) == obj
+    assert models.mark_clean(ExampleModel(name="Other", address="Address")) != obj
@@ -0,0 +1,41 @@
+import pytest
+
+from companycam.pagination import iter_pages, list_all, page_query, paginate
+
+
+class ListPath(object):
+    """Fake list path which returns `total` items, split into pages."""
+
+    def __init__(self, total: int) -> None:
+        self.total = total
+        self.queries: list[dict] = []
+
+    def __call__(self, query: dict) -> list[int]:
+        self.queries.append(query)
+        start = (int(query["page"]) - 1) * int(query["per_page"])
+        return list(range(self.total))[start : start + int(query["per_page"])]
+
+
+def test_page_query_merges_page_into_query() -> None:
+    assert page_query({"status": "active"}, 2, 10) == {
+        "status": "active",
+        "page": "2",
+        "per_page": "10",
+    }
+    assert page_query(None, 1, 10) == {"page": "1", "per_page": "10"}
+
+
+@pytest.mark.parametrize("total,requests", [(0, 1), (3, 2), (4, 3), (5, 3)])
+def test_iter_pages_stops_after_first_short_page(total: int, requests: int) -> None:
+    method = ListPath(total)
+    pages = list(iter_pages(method, per_page=2))
+    assert sum(pages, []) == list(range(total))
+    assert len(method.queries) == requests
+
+
+def test_paginate_yields_items_from_start_page() -> None:
+    assert list(paginate(ListPath(5), per_page=2, start_page=2)) == [2, 3, 4]
+
+
+def test_list_all_returns_all_items() -> None:
+    assert list_all(ListPath(5), per_page=2) == [0, 1, 2, 3, 4]
@@ -0,0 +1,91 @@
+import pickle
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import httpx
+import pytest
+
+import companycam
+from companycam.cache import SQLiteCache
+from companycam.identity import IdentityMap
+from companycam.models import mark_clean
+from companycam.pagination import iter_pages, list_all
+from companycam.parallel import ParallelDecoder, is_empty_list
+from companycam.profiler import Profiler
+from companycam.v2.models import Photo, Project
+from companycam.v2.server import StandInServer, Store
+
+from . import utils
+
+
+@pytest.fixture
+def api() -> companycam.API:
+    server = StandInServer(Store.generate(projects=5, photos_per_project=23))
+    return utils.stand_in_api(server)
+
+
+def test_paginate_in_processes(api: companycam.API) -> None:
+    expected = list_all(api.photos.list, per_page=10)
+    with ParallelDecoder(max_workers=2) as decoder:
+        photos = list_all(api.photos.list, per_page=10, decoder=decoder)
+        assert photos == expected
+        assert len(photos) == 115
+        assert all(isinstance(p, Photo) and not p.dirty_fields for p in photos)
+        # a last page which is full
+        assert len(list_all(api.photos.list, per_page=23, decoder=decoder)) == 115
+
+
+def test_records_in_threads(api: companycam.API) -> None:
+    with ThreadPoolExecutor(2) as executor:
+        decoder = ParallelDecoder(executor=executor)
+        pages = list(decoder.iter_pages(api.projects.list, per_page=2, records=True))
+        decoder.close()
+        # the executor wasn't shut down
+        assert executor.submit(int).result() == 0
+    assert [len(page) for page in pages] == [2, 2, 1]
+    expected = [p.model_dump() for p in list_all(api.projects.list)]
+    assert [record for page in pages for record in page] == expected
+
+
+def test_call_applies_identity_map(api: companycam.API) -> None:
+    api.client.identity_map = IdentityMap()
+    with ParallelDecoder(executor=ThreadPoolExecutor(1)) as decoder:
+        project = decoder.call(api.projects.list)[0]
+        assert decoder.call(api.projects.list)[0] is project
+    assert list(iter_pages(api.projects.list, decoder=decoder))[0][0] is project
+
+
+def test_is_empty_list() -> None:
+    assert is_empty_list(b"[]")
+    assert is_empty_list(b" [ ]\n")
+    assert not is_empty_list(b'[{"id": "1"}]')
+
+
+def test_api_pickles(tmp_path: Path) -> None:
+    transport = httpx.MockTransport(lambda request: httpx.Response(200, json={}))
+    api = companycam.API(
+        token="ANY_TOKEN",
+        coalesce_requests=True,
+        transport=transport,
+        cache=SQLiteCache(tmp_path / "cache.sqlite"),
+        identity_map=IdentityMap(),
+        profiler=Profiler(trace_allocations=True),
+    )
+    unpickled = pickle.loads(pickle.dumps(api))
+    assert unpickled.client.auth.token == "ANY_TOKEN"
+    assert unpickled.projects.client is unpickled.client
+    # process-local state isn't shared
+    assert unpickled.client.transport is None
+    assert unpickled.client.single_flight is not None
+    assert unpickled.client.cache.path == tmp_path / "cache.sqlite"
+    assert unpickled.client.profiler.trace_allocations
+    # copies in the same process still share the transport
+    assert api.with_priority("interactive").client.transport is transport
+
+
+def test_models_pickle_with_dirty_fields() -> None:
+    project = mark_clean(Project(**{"id": "1", "name": "Psych"}))
+    project.name = "Pineapple"
+    unpickled = pickle.loads(pickle.dumps(project))
+    assert unpickled == project
+    assert unpickled.dirty_fields == {"name"}
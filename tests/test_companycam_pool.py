@@ -0,0 +1,255 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+import pytest
+
+import companycam
+from companycam.deadlines import DeadlineExceeded, deadline
+from companycam.pool import (
+    ClientPool,
+    FairScheduler,
+    PriorityClass,
+    PriorityScheduler,
+    PriorityTransport,
+    Tenant,
+    TokenBucket,
+)
+
+
+def company_response(request: httpx.Request) -> httpx.Response:
+    return httpx.Response(200, json={"id": "1", "name": "Company"})
+
+
+def wait_for(condition, timeout: float = 2.0) -> None:
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            raise TimeoutError()
+        time.sleep(0.001)
+
+
+def test_TokenBucket_allows_bursts_up_to_capacity() -> None:
+    bucket = TokenBucket(rate=1, capacity=3)
+    assert [bucket.try_acquire() for _ in range(3)] == [0, 0, 0]
+    assert bucket.try_acquire() > 0
+
+
+def test_TokenBucket_rate_must_be_positive() -> None:
+    with pytest.raises(ValueError):
+        TokenBucket(rate=0)
+
+
+def test_TokenBucket_acquire_times_out() -> None:
+    bucket = TokenBucket(rate=1, capacity=1)
+    assert bucket.acquire(timeout=0)
+    start = time.monotonic()
+    assert not bucket.acquire(timeout=0.5)
+    assert time.monotonic() - start < 0.5
+
+
+def test_FairScheduler_grants_slots_to_tenants_in_turn() -> None:
+    scheduler = FairScheduler(max_concurrency=1)
+    busy, quiet = Tenant("busy"), Tenant("quiet")
+    scheduler.acquire(busy)
+    order = []
+
+    def acquire(tenant: Tenant, label: str) -> None:
+        scheduler.acquire(tenant)
+        order.append(label)
+
+    threads = []
+    queued = [(busy, "busy-2"), (busy, "busy-3"), (quiet, "quiet-1")]
+    for n, (tenant, label) in enumerate(queued, start=1):
+        thread = threading.Thread(target=acquire, args=(tenant, label))
+        thread.start()
+        threads.append(thread)
+        wait_for(lambda n=n: len(busy.waiting) + len(quiet.waiting) == n)  # type: ignore[misc]
+    # release the slot held by whichever tenant was last granted it
+    for holder, expected in [(busy, "busy-2"), (busy, "quiet-1"), (quiet, "busy-3")]:
+        scheduler.release(holder)
+        wait_for(lambda e=expected: e in order)  # type: ignore[misc]
+    for thread in threads:
+        thread.join()
+    assert order == ["busy-2", "quiet-1", "busy-3"]
+
+
+def test_FairScheduler_respects_tenant_max_concurrency() -> None:
+    scheduler = FairScheduler(max_concurrency=10)
+    tenant = Tenant("tenant", max_concurrency=1)
+    scheduler.acquire(tenant)
+    thread = threading.Thread(target=scheduler.acquire, args=(tenant,))
+    thread.start()
+    wait_for(lambda: len(tenant.waiting) == 1)
+    assert tenant.in_flight == 1
+    scheduler.release(tenant)
+    thread.join(timeout=2)
+    assert tenant.in_flight == 1
+    assert scheduler.in_flight == 1
+
+
+def test_FairScheduler_removes_waiters_which_time_out() -> None:
+    scheduler = FairScheduler(max_concurrency=1)
+    busy, late = Tenant("busy"), Tenant("late")
+    assert scheduler.acquire(busy)
+    assert not scheduler.acquire(late, timeout=0.01)
+    assert not late.waiting
+    # the slot isn't granted to the request which timed out
+    scheduler.release(busy)
+    assert (scheduler.in_flight, late.in_flight) == (0, 0)
+    assert scheduler.acquire(late, timeout=0)
+
+
+def test_ClientPool_waits_at_most_until_deadline() -> None:
+    with ClientPool(
+        max_concurrency=1, transport=httpx.MockTransport(company_response)
+    ) as pool:
+        api = pool.api(token="a")
+        pool.scheduler.acquire(pool.tenants["tenant-1"])
+        with deadline(0.05), pytest.raises(DeadlineExceeded):
+            api.company.retrieve()
+        assert not pool.tenants["tenant-1"].waiting
+        rate_limited = pool.api(token="b", rate_limit=0.1, burst=1)
+        pool.scheduler.release(pool.tenants["tenant-1"])
+        rate_limited.company.retrieve()
+        with deadline(1), pytest.raises(DeadlineExceeded):
+            rate_limited.company.retrieve()
+
+
+def test_ClientPool_shares_transport_between_tokens() -> None:
+    tokens = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        tokens.append(request.headers["authorization"])
+        return company_response(request)
+
+    with ClientPool(transport=httpx.MockTransport(handler)) as pool:
+        pool.api(token="a").company.retrieve()
+        pool.api(token="b").company.retrieve()
+        pool.api(token="a").company.retrieve()
+    assert tokens == ["Bearer a", "Bearer b", "Bearer a"]
+    assert len(pool.tenants) == 2
+
+
+def test_ClientPool_returns_same_API_object_for_same_token() -> None:
+    pool = ClientPool(transport=httpx.MockTransport(company_response))
+    assert pool.api(token="a") is pool.api(token="a")
+
+
+def test_ClientPool_limits_tenant_concurrency() -> None:
+    lock = threading.Lock()
+    in_flight, peak = [0], [0]
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        with lock:
+            in_flight[0] += 1
+            peak[0] = max(peak[0], in_flight[0])
+        time.sleep(0.01)
+        with lock:
+            in_flight[0] -= 1
+        return company_response(request)
+
+    pool = ClientPool(transport=httpx.MockTransport(handler))
+    api = pool.api(token="a", max_concurrency=2)
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        list(executor.map(lambda _: api.company.retrieve(), range(16)))
+    assert peak[0] <= 2
+
+
+class Gate(object):
+    """Stands in for a token bucket which has no tokens until it is opened."""
+
+    def __init__(self) -> None:
+        self.opened = threading.Event()
+
+    def try_acquire(self, tokens: float = 1.0) -> float:
+        return 0.0 if self.opened.is_set() else 0.001
+
+
+class RecordingScheduler(PriorityScheduler):
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.bucket = Gate()  # type: ignore[assignment]
+        self.order: list[str] = []
+
+    def _grant(self, priority_class: PriorityClass, wait: float) -> None:
+        self.order.append(priority_class.name)
+        super()._grant(priority_class, wait)
+
+
+def run_waiting(scheduler: RecordingScheduler, waiting: dict[str, int]) -> None:
+    """Queue requests of each class, then open the gate and wait for all of them."""
+    with ThreadPoolExecutor(max_workers=sum(waiting.values())) as executor:
+        for name, n in waiting.items():
+            for _ in range(n):
+                executor.submit(scheduler.acquire, name)
+            wait_for(lambda: scheduler.classes[name].queue_depth == n)  # noqa: B023
+        assert scheduler.stats()["bulk"]["queue_depth"] == waiting["bulk"]
+        scheduler.bucket.opened.set()  # type: ignore[attr-defined]
+
+
+def test_PriorityScheduler_serves_interactive_requests_first() -> None:
+    scheduler = RecordingScheduler(rate_limit=1)
+    run_waiting(scheduler, {"bulk": 5, "interactive": 5})
+    assert scheduler.order == ["interactive"] * 5 + ["bulk"] * 5
+
+
+def test_PriorityScheduler_does_not_starve_bulk_requests() -> None:
+    scheduler = RecordingScheduler(rate_limit=1, weights={"interactive": 3, "bulk": 1})
+    run_waiting(scheduler, {"bulk": 8, "interactive": 24})
+    # bulk requests get a quarter of the grants while both classes are waiting
+    for i in range(0, 32, 4):
+        assert scheduler.order[i : i + 4].count("bulk") == 1
+    stats = scheduler.stats()
+    assert stats["bulk"]["granted"] == 8
+    assert stats["interactive"]["queue_depth"] == 0
+    assert stats["bulk"]["max_wait"] >= stats["bulk"]["average_wait"] > 0
+
+
+def test_PriorityScheduler_rejects_unknown_classes() -> None:
+    scheduler = PriorityScheduler(rate_limit=1)
+    with pytest.raises(ValueError, match="Unknown priority class 'urgent'"):
+        scheduler.acquire("urgent")
+    with pytest.raises(ValueError):
+        PriorityScheduler(rate_limit=1, weights={"interactive": 1})
+
+
+def test_PriorityScheduler_removes_waiters_which_time_out() -> None:
+    scheduler = RecordingScheduler(rate_limit=1)
+    assert not scheduler.acquire("interactive", timeout=0.01)
+    assert scheduler.stats()["interactive"]["queue_depth"] == 0
+    # the next grant goes to a waiter which is still waiting
+    scheduler.bucket.opened.set()  # type: ignore[attr-defined]
+    assert scheduler.acquire("bulk")
+    assert scheduler.order == ["bulk"]
+
+
+def test_PriorityTransport_waits_at_most_until_deadline() -> None:
+    scheduler = RecordingScheduler(rate_limit=1)
+    api = companycam.API(
+        token="token",
+        transport=PriorityTransport(httpx.MockTransport(company_response), scheduler),
+    )
+    start = time.monotonic()
+    with deadline(0.05), pytest.raises(DeadlineExceeded):
+        api.company.retrieve()
+    assert time.monotonic() - start < 1
+    assert scheduler.stats()["bulk"]["queue_depth"] == 0
+
+
+def test_PriorityTransport_schedules_requests_by_priority() -> None:
+    scheduler = PriorityScheduler(rate_limit=100)
+    api = companycam.API(
+        token="token",
+        transport=PriorityTransport(httpx.MockTransport(company_response), scheduler),
+    )
+    interactive_api = api.with_priority("interactive")
+    interactive_api.company.retrieve()
+    interactive_api.company.retrieve()
+    api.company.retrieve()
+    stats = scheduler.stats()
+    assert (stats["interactive"]["granted"], stats["bulk"]["granted"]) == (2, 1)
+    # the original object is unchanged
+    assert api.client.priority is None
+    assert interactive_api.client.transport is api.client.transport
@@ -0,0 +1,71 @@
+import json
+
+import httpx
+import pytest
+
+import companycam
+from companycam.profiler import PHASES, Profiler
+from companycam.v2.models import Tag
+
+PHOTOS = [{"id": str(i), "project_id": "1", "internal": False} for i in range(50)]
+
+
+def handler(request: httpx.Request) -> httpx.Response:
+    if request.url.path.endswith("/photos"):
+        return httpx.Response(200, json=PHOTOS)
+    return httpx.Response(201, json={"id": "1", "display_value": "Roof"})
+
+
+@pytest.fixture
+def profiler() -> Profiler:
+    return Profiler()
+
+
+@pytest.fixture
+def api(profiler: Profiler) -> companycam.API:
+    return companycam.API(
+        token="ANY_TOKEN", transport=httpx.MockTransport(handler), profiler=profiler
+    )
+
+
+def test_profiler_times_each_phase(api: companycam.API, profiler: Profiler) -> None:
+    for _ in range(3):
+        api.photos.list()
+    api.tags.create(Tag(**{"display_value": "Roof"}))
+    summary = profiler.summary()
+    # ranked by total time
+    assert list(summary) == ["PhotosManager.list", "TagsManager.create"]
+    photos = summary["PhotosManager.list"]
+    assert photos["calls"] == 3
+    assert list(photos["phases"]) == PHASES
+    assert all(phase["count"] == 3 for phase in photos["phases"].values())
+    # phases add up to the whole call
+    assert sum(p["total_ms"] for p in photos["phases"].values()) == pytest.approx(
+        photos["total_ms"]
+    )
+    assert summary["TagsManager.create"]["calls"] == 1
+
+
+def test_profiler_table_and_json(api: companycam.API, profiler: Profiler) -> None:
+    api.photos.list()
+    lines = profiler.table().splitlines()
+    assert lines[0].split()[:2] == ["method", "phase"]
+    assert len(lines) == 1 + len(PHASES)
+    assert json.loads(profiler.json()) == profiler.summary()
+    profiler.reset()
+    assert profiler.summary() == {}
+
+
+def test_profiler_traces_allocations(api: companycam.API) -> None:
+    profiler = api.client.profiler = Profiler(trace_allocations=True)
+    with profiler:
+        api.photos.list()
+    phases = profiler.summary()["PhotosManager.list"]["phases"]
+    assert phases["validate"]["allocated_kb_per_call"] > 0
+    assert phases["validate"]["retained_kb_per_call"] > 0
+    assert phases["other"]["allocated_kb_per_call"] == 0
+
+
+def test_profiler_is_optional() -> None:
+    api = companycam.API(token="ANY_TOKEN", transport=httpx.MockTransport(handler))
+    assert len(api.photos.list()) == 50
@@ -0,0 +1,241 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+import pytest
+
+import companycam
+from companycam.resilience import (
+    AdaptiveConcurrencyTransport,
+    AdaptiveLimiter,
+    CircuitBreaker,
+    CircuitBreakerTransport,
+    CircuitOpen,
+    Hedger,
+    HedgingTransport,
+)
+
+ENDPOINT = "GET /projects/{project}"
+
+
+def make_api(transport: httpx.BaseTransport) -> companycam.API:
+    return companycam.API(token="token", transport=transport)
+
+
+def test_AdaptiveLimiter_grows_limit_while_healthy() -> None:
+    limiter = AdaptiveLimiter(initial_limit=2, max_limit=3)
+    for _ in range(10):
+        limiter.acquire()
+        limiter.release(latency=0.01, overloaded=False)
+    assert limiter.limit == 3
+
+
+def test_AdaptiveLimiter_shrinks_limit_on_overload() -> None:
+    limiter = AdaptiveLimiter(initial_limit=8, backoff=0.5)
+    limiter.acquire()
+    limiter.release(latency=0.01, overloaded=True)
+    assert limiter.limit == 4
+
+
+def test_AdaptiveLimiter_shrinks_limit_on_latency_spike() -> None:
+    limiter = AdaptiveLimiter(initial_limit=8, backoff=0.5, latency_tolerance=2)
+    limiter.acquire()
+    limiter.release(latency=0.01, overloaded=False)
+    limiter.acquire()
+    limiter.release(latency=0.05, overloaded=False)
+    assert limiter.limit < 8
+
+
+def test_AdaptiveLimiter_grows_limit_after_latency_shifts() -> None:
+    limiter = AdaptiveLimiter(initial_limit=4, max_limit=4, latency_tolerance=2)
+    for latency in [0.05] * 10 + [0.2] * 100:
+        limiter.acquire()
+        limiter.release(latency=latency, overloaded=False)
+    assert limiter.limit == 4
+    assert limiter.average_latencies[None] == pytest.approx(0.2, rel=0.01)
+
+
+def test_AdaptiveLimiter_averages_latency_by_endpoint() -> None:
+    limiter = AdaptiveLimiter(initial_limit=8, max_limit=8, latency_tolerance=2)
+    for endpoint, latency in [(ENDPOINT, 0.01), ("GET /projects", 0.5)] * 5:
+        limiter.acquire()
+        limiter.release(latency=latency, overloaded=False, endpoint=endpoint)
+    assert limiter.limit == 8
+
+
+def test_AdaptiveLimiter_does_not_shrink_below_min_limit() -> None:
+    limiter = AdaptiveLimiter(initial_limit=2, min_limit=1, backoff=0.1)
+    limiter.acquire()
+    limiter.release(latency=0, overloaded=True)
+    assert limiter.limit == 1
+
+
+def test_AdaptiveConcurrencyTransport_limits_requests_in_flight() -> None:
+    lock = threading.Lock()
+    in_flight, peak = [0], [0]
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        with lock:
+            in_flight[0] += 1
+            peak[0] = max(peak[0], in_flight[0])
+        time.sleep(0.01)
+        with lock:
+            in_flight[0] -= 1
+        return httpx.Response(200, json={"id": "1"})
+
+    limiter = AdaptiveLimiter(initial_limit=2, max_limit=2)
+    api = make_api(AdaptiveConcurrencyTransport(httpx.MockTransport(handler), limiter))
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        list(executor.map(lambda _: api.projects.retrieve("1"), range(16)))
+    assert peak[0] <= 2
+    assert limiter.in_flight == 0
+
+
+def test_AdaptiveConcurrencyTransport_shrinks_limit_on_InternalServerError() -> None:
+    limiter = AdaptiveLimiter(initial_limit=8)
+    transport = AdaptiveConcurrencyTransport(
+        httpx.MockTransport(lambda request: httpx.Response(500)), limiter
+    )
+    with pytest.raises(companycam.InternalServerError):
+        make_api(transport).projects.retrieve("1")
+    assert limiter.limit == 4
+
+
+def test_CircuitBreaker_opens_after_consecutive_failures() -> None:
+    breaker = CircuitBreaker(failure_threshold=2)
+    breaker.record(ENDPOINT, failed=True)
+    assert breaker.state(ENDPOINT) == "closed"
+    breaker.record(ENDPOINT, failed=True)
+    assert breaker.state(ENDPOINT) == "open"
+    with pytest.raises(CircuitOpen):
+        breaker.before_request(ENDPOINT)
+
+
+def test_CircuitBreaker_closes_after_successful_trial_request() -> None:
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0)
+    breaker.record(ENDPOINT, failed=True)
+    assert breaker.state(ENDPOINT) == "half_open"
+    breaker.before_request(ENDPOINT)
+    # only one trial request is allowed at a time
+    with pytest.raises(CircuitOpen):
+        breaker.before_request(ENDPOINT)
+    breaker.record(ENDPOINT, failed=False)
+    assert breaker.state(ENDPOINT) == "closed"
+
+
+def test_CircuitBreakerTransport_fails_fast_per_endpoint() -> None:
+    requests = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request)
+        if request.url.path.endswith("/company"):
+            return httpx.Response(200, json={"id": "1", "name": "Company"})
+        return httpx.Response(500)
+
+    breaker = CircuitBreaker(failure_threshold=1)
+    api = make_api(CircuitBreakerTransport(httpx.MockTransport(handler), breaker))
+    with pytest.raises(companycam.InternalServerError):
+        api.projects.retrieve("1")
+    with pytest.raises(CircuitOpen):
+        api.projects.retrieve("2")
+    assert api.company.retrieve()
+    assert len(requests) == 2
+    assert breaker.states() == {ENDPOINT: "open", "GET /company": "closed"}
+
+
+def test_CircuitBreakerTransport_ends_interrupted_trial_request() -> None:
+    def handler(request: httpx.Request) -> httpx.Response:
+        raise KeyboardInterrupt()
+
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout=0)
+    breaker.record(ENDPOINT, failed=True)
+    api = make_api(CircuitBreakerTransport(httpx.MockTransport(handler), breaker))
+    with pytest.raises(KeyboardInterrupt):
+        api.projects.retrieve("1")
+    # still half open, and another trial request is allowed
+    assert breaker.state(ENDPOINT) == "half_open"
+    breaker.before_request(ENDPOINT)
+
+
+def make_hedger(**kwargs) -> Hedger:
+    hedger = Hedger(**{"min_samples": 10, "budget": 1.0, **kwargs})
+    for i in range(10):
+        hedger.record(ENDPOINT, latency=0.01 * (i + 1))
+    return hedger
+
+
+class SlowFirstRequest(object):
+    """Takes `delay` seconds to respond to the first request, and then responds
+    immediately.
+    """
+
+    def __init__(self, delay: float, status_code: int = 200) -> None:
+        self.delay = delay
+        self.status_code = status_code
+        self.requests = 0
+        self._lock = threading.Lock()
+
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        with self._lock:
+            self.requests += 1
+            first = self.requests == 1
+        if first:
+            time.sleep(self.delay)
+        return httpx.Response(self.status_code, json={"id": str(self.requests)})
+
+
+def test_Hedger_delay_is_percentile_of_latencies() -> None:
+    assert Hedger().delay(ENDPOINT) is None
+    assert make_hedger(percentile=0.9).delay(ENDPOINT) == pytest.approx(0.09)
+    assert make_hedger(min_delay=0.5).delay(ENDPOINT) == 0.5
+
+
+def test_Hedger_limits_hedges_to_budget() -> None:
+    hedger = make_hedger(budget=0.5)
+    sent = 0
+    for _ in range(10):
+        if hedger.delay(ENDPOINT) is not None and hedger.acquire_hedge():
+            sent += 1
+    assert sent == hedger.hedges_sent == 5
+
+
+def test_HedgingTransport_uses_first_response() -> None:
+    server = SlowFirstRequest(delay=1)
+    hedger = make_hedger(percentile=0.5)
+    api = make_api(HedgingTransport(httpx.MockTransport(server), hedger))
+    start = time.monotonic()
+    assert api.projects.retrieve("1").id == "2"
+    assert time.monotonic() - start < 0.5
+    assert (hedger.requests, hedger.hedges_sent, hedger.hedges_won) == (1, 1, 1)
+
+
+def test_HedgingTransport_does_not_hedge_fast_responses() -> None:
+    server = SlowFirstRequest(delay=0)
+    hedger = make_hedger()
+    api = make_api(HedgingTransport(httpx.MockTransport(server), hedger))
+    assert api.projects.retrieve("1").id == "1"
+    assert server.requests == 1
+    assert hedger.hedges_sent == 0
+    # the latency is measured
+    assert len(hedger.latencies[ENDPOINT]) == 11
+
+
+def test_HedgingTransport_only_hedges_GET_requests() -> None:
+    server = SlowFirstRequest(delay=0.2)
+    hedger = make_hedger(endpoints={"DELETE /projects/{project}"})
+    api = make_api(HedgingTransport(httpx.MockTransport(server), hedger))
+    assert api.projects.delete("1")
+    assert server.requests == 1
+
+
+def test_HedgingTransport_raises_if_both_requests_fail() -> None:
+    def handler(request: httpx.Request) -> httpx.Response:
+        time.sleep(0.1)
+        raise httpx.ConnectError("Connection refused", request=request)
+
+    hedger = make_hedger(percentile=0.5)
+    api = make_api(HedgingTransport(httpx.MockTransport(handler), hedger))
+    with pytest.raises(httpx.ConnectError):
+        api.projects.retrieve("1")
+    assert (hedger.hedges_sent, hedger.hedges_won) == (1, 0)
@@ -0,0 +1,204 @@
+import json
+from collections.abc import Callable
+from typing import Any
+
+import httpx
+import pytest
+
+import companycam
+from companycam.models import mark_clean
+from companycam.serializers import Serializer, dump
+from companycam.v2.models import (
+    Address,
+    Comment,
+    Coordinate,
+    Group,
+    Photo,
+    Project,
+    Tag,
+    User,
+    Webhook,
+)
+
+USER = User(**{"id": "1", "first_name": "Shawn", "email_address": "shawn@psych.com"})
+PROJECT = Project(
+    **{
+        "id": "2",
+        "name": "Pineapple",
+        "status": "active",
+        "address": {"street_address_1": "1 Main St", "city": None},
+        "coordinates": {"lat": 1.5, "lon": 2.5},
+        "geofence": [{"lat": 1, "lon": 2}, {"lat": 3, "lon": 4}],
+        "primary_contact": {"name": "Gus"},
+        "notepad": "notes",
+    }
+)
+
+
+@pytest.fixture
+def bodies() -> list[Any]:
+    return []
+
+
+@pytest.fixture
+def api(bodies: list[Any]) -> companycam.API:
+    def handler(request: httpx.Request) -> httpx.Response:
+        bodies.append(json.loads(request.content) if request.content else None)
+        return httpx.Response(200, json={"id": "1"})
+
+    return companycam.API(token="ANY_TOKEN", transport=httpx.MockTransport(handler))
+
+
+def group_body(group: Group) -> dict:
+    """The body as it was built before serializers."""
+    group_dict = group.model_dump(include={"name", "users"})
+    if users := group_dict.pop("users", None):
+        group_dict["users"] = [u["id"] for u in users if "id" in u]
+    return {"group": group_dict}
+
+
+WRITE_PATHS: list[tuple[str, Callable, Any]] = [
+    (
+        "users.create",
+        lambda api: api.users.create(USER),
+        USER.model_dump(include=companycam.v2.managers.UsersManager.include),
+    ),
+    (
+        "projects.create",
+        lambda api: api.projects.create(PROJECT),
+        PROJECT.model_dump(include=companycam.v2.managers.ProjectsManager.include),
+    ),
+    (
+        "projects.update",
+        lambda api: api.projects.update(PROJECT),
+        PROJECT.model_dump(
+            include={"name", "address", "coordinates", "geofence"},
+        ),
+    ),
+    (
+        "projects.update_notepad",
+        lambda api: api.projects.update_notepad(PROJECT),
+        {"notepad": "notes"},
+    ),
+    (
+        "projects.create_comment",
+        lambda api: api.projects.create_comment(
+            PROJECT, Comment(**{"id": "3", "content": "Hi", "status": "active"})
+        ),
+        {"comment": {"content": "Hi"}},
+    ),
+    (
+        "photos.update",
+        lambda api: api.photos.update(Photo(**{"id": "4", "internal": False})),
+        {"photo": {"internal": False}},
+    ),
+    (
+        "tags.create",
+        lambda api: api.tags.create(Tag(**{"id": "5", "display_value": "Roof"})),
+        {"tag": {"display_value": "Roof"}},
+    ),
+    (
+        "groups.update",
+        lambda api: api.groups.update(
+            Group(**{"id": "6", "name": "Crew", "users": [USER, User(**{"id": None})]})
+        ),
+        group_body(
+            Group(**{"id": "6", "name": "Crew", "users": [USER, User(**{"id": None})]})
+        ),
+    ),
+    (
+        "groups.create",
+        lambda api: api.groups.create(Group(**{"id": "7", "users": []})),
+        group_body(Group(**{"id": "7", "users": []})),
+    ),
+    (
+        "webhooks.create",
+        lambda api: api.webhooks.create(
+            Webhook(**{"id": "8", "url": "https://x", "scopes": ["a"], "enabled": True})
+        ),
+        {"url": "https://x", "scopes": ["a"], "enabled": True},
+    ),
+]
+
+
+@pytest.mark.parametrize(
+    "call,expected",
+    [(c, e) for _, c, e in WRITE_PATHS],
+    ids=[n for n, _, _ in WRITE_PATHS],
+)
+def test_write_path_bodies(
+    api: companycam.API, bodies: list[Any], call: Callable, expected: Any
+) -> None:
+    call(api)
+    assert bodies == [expected]
+    # the same order as `model_dump()`, so bodies are byte for byte the same
+    assert list(bodies[0]) == list(expected)
+
+
+def test_dump_matches_model_dump() -> None:
+    assert dump(PROJECT) == PROJECT.model_dump()
+    assert dump([Coordinate(lat=1, lon=2)]) == [{"lat": 1.0, "lon": 2.0}]
+    assert dump(Address(**{"city": None})) == {}
+
+
+def test_serializer() -> None:
+    serializer = Serializer(
+        Project,
+        {"notepad", "name", "unknown"},
+        envelope="project",
+        transforms={"name": str.upper},
+    )
+    assert serializer.include == ("name", "notepad")
+    assert serializer(PROJECT) == {"project": {"name": "PINEAPPLE", "notepad": "notes"}}
+    assert serializer(Project(**{"id": "9"})) == {"project": {}}
+
+
+def test_transform_returning_none_leaves_field_out() -> None:
+    serializer = Serializer(Project, {"name"}, transforms={"name": lambda _: None})
+    assert serializer(PROJECT) == {}
+
+
+def test_serializer_changes() -> None:
+    serializer = Serializer(Project, {"name", "notepad"}, envelope="project")
+    project = mark_clean(Project(**PROJECT.model_dump()))
+    assert serializer.changes(project) is None
+    project.status = "archived"
+    assert serializer.changes(project) is None
+    project.name = "Mango"
+    assert serializer.changes(project) == {"project": {"name": "Mango"}}
+
+
+def test_update_sends_only_changed_fields(
+    api: companycam.API, bodies: list[Any]
+) -> None:
+    project = api.projects.retrieve("1")
+    assert api.projects.update(project) is project
+    assert bodies == [None]
+    project.name = "Mango"
+    api.projects.update(project)
+    assert bodies == [None, {"name": "Mango"}]
+    tag = api.tags.retrieve("1")
+    tag.display_value = "Roof"
+    api.tags.update(tag)
+    assert bodies[-1] == {"tag": {"display_value": "Roof"}}
+
+
+def test_update_sends_lists_changed_in_place(
+    api: companycam.API, bodies: list[Any]
+) -> None:
+    webhook = mark_clean(Webhook(**{"id": "1", "url": "u", "scopes": ["a"]}))
+    webhook.scopes.append("b")  # type: ignore[union-attr]
+    api.webhooks.update(webhook)
+    assert bodies == [{"scopes": ["a", "b"]}]
+
+
+def test_update_sends_null_to_clear_field(
+    api: companycam.API, bodies: list[Any]
+) -> None:
+    project = mark_clean(Project(**{"id": "1", "name": "Mango"}))
+    project.name = None
+    api.projects.update(project)
+    assert bodies[-1] == {"name": None}
+    # models which aren't tracked leave None fields out, as before
+    api.projects.update(Project(**{"id": "1", "name": None, "coordinates": None}))
+    assert bodies[-1] == {}
@@ -0,0 +1,89 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import httpx
+import pytest
+from pytest_mock import MockerFixture
+
+import companycam
+from companycam.singleflight import SingleFlight
+
+
+def slow_company_response(request: httpx.Request) -> httpx.Response:
+    time.sleep(0.05)
+    return httpx.Response(200, json={"id": "1", "name": "Company"}, request=request)
+
+
+def test_SingleFlight_runs_function_once_for_concurrent_calls_with_same_key() -> None:
+    single_flight = SingleFlight()
+    calls = []
+    barrier = threading.Barrier(5)
+
+    def fn() -> int:
+        calls.append(1)
+        time.sleep(0.05)
+        return 42
+
+    def call() -> int:
+        barrier.wait()
+        return single_flight.do("key", fn)
+
+    with ThreadPoolExecutor(max_workers=5) as executor:
+        results = list(executor.map(lambda _: call(), range(5)))
+    assert results == [42] * 5
+    assert len(calls) == 1
+    assert single_flight.in_flight() == 0
+
+
+def test_SingleFlight_does_not_coalesce_different_keys() -> None:
+    single_flight = SingleFlight()
+    assert single_flight.do("a", lambda: 1) == 1
+    assert single_flight.do("b", lambda: 2) == 2
+
+
+def test_SingleFlight_shares_exceptions_and_forgets_key() -> None:
+    single_flight = SingleFlight()
+
+    def fn() -> None:
+        raise RuntimeError("failed")
+
+    with pytest.raises(RuntimeError):
+        single_flight.do("key", fn)
+    assert single_flight.do("key", lambda: "ok") == "ok"
+
+
+def test_API_coalesces_identical_GET_requests_across_threads(
+    mocker: MockerFixture,
+) -> None:
+    mock = mocker.patch("httpx.Client.send", side_effect=slow_company_response)
+    api = companycam.API(token="token", coalesce_requests=True)
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        results = list(executor.map(lambda _: api.company.retrieve(), range(4)))
+    assert mock.call_count == 1
+    assert all(r is results[0] for r in results)
+
+
+def test_API_coalesces_identical_GET_requests_across_async_tasks(
+    mocker: MockerFixture,
+) -> None:
+    mock = mocker.patch("httpx.Client.send", side_effect=slow_company_response)
+    api = companycam.API(token="token", coalesce_requests=True)
+
+    async def main() -> list:
+        return await asyncio.gather(
+            *(asyncio.to_thread(api.company.retrieve) for _ in range(4))
+        )
+
+    results = asyncio.run(main())
+    assert mock.call_count == 1
+    assert len(results) == 4
+
+
+def test_API_does_not_coalesce_requests_by_default(mocker: MockerFixture) -> None:
+    mock = mocker.patch("httpx.Client.send", side_effect=slow_company_response)
+    api = companycam.API(token="token")
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        list(executor.map(lambda _: api.company.retrieve(), range(2)))
+    assert mock.call_count == 2
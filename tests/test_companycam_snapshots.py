@@ -0,0 +1,76 @@
+from pathlib import Path
+
+import pytest
+
+from companycam.snapshots import SnapshotStore
+from companycam.v2.models import Photo
+
+
+def make_photos(ids: range, project_id: str = "1") -> list[Photo]:
+    return [
+        Photo(**{"id": str(i), "project_id": project_id, "internal": False})
+        for i in ids
+    ]
+
+
+def test_get_and_iterate(tmp_path: Path) -> None:
+    with SnapshotStore(tmp_path / "photos.ndjson", Photo) as store:
+        assert store.get("1") is None
+        assert list(store) == []
+        assert store.extend(make_photos(range(100))) == 100
+        photo = store.get("42")
+        assert isinstance(photo, Photo)
+        assert photo.id == "42"
+        assert store["7"].id == "7"
+        with pytest.raises(KeyError):
+            store["100"]
+        assert "99" in store
+        assert len(store) == 100
+        assert [p.id for p in store] == [str(i) for i in range(100)]
+
+
+def test_latest_copy_wins(tmp_path: Path) -> None:
+    with SnapshotStore(tmp_path / "photos.ndjson", Photo) as store:
+        store.extend(make_photos(range(3)))
+        store.add(make_photos(range(1, 2), project_id="2")[0])
+        assert store["1"].project_id == "2"
+        assert [p.id for p in store] == ["0", "2", "1"]
+        assert len(store) == 3
+
+
+def test_reopen_uses_index(tmp_path: Path) -> None:
+    path = tmp_path / "photos.ndjson"
+    with SnapshotStore(path, Photo) as store:
+        store.extend(make_photos(range(10)))
+    index = Path(f"{path}.idx").read_text()
+    with SnapshotStore(path, Photo) as store:
+        assert store["9"].id == "9"
+        assert len(store) == 10
+    # the index wasn't rewritten
+    assert Path(f"{path}.idx").read_text() == index
+
+
+def test_recovers_from_interrupted_write(tmp_path: Path) -> None:
+    path = tmp_path / "photos.ndjson"
+    with SnapshotStore(path, Photo) as store:
+        store.extend(make_photos(range(5)))
+    # records which were written but not indexed, then a partly written record
+    with path.open("ab") as f:
+        f.write(b'{"id":"5","project_id":"1"}\n{"id":"6","proj')
+    with SnapshotStore(path, Photo) as store:
+        assert len(store) == 6
+        assert store["5"].id == "5"
+        assert "6" not in store
+        store.extend(make_photos(range(6, 8)))
+        assert [p.id for p in store] == [str(i) for i in range(8)]
+
+
+def test_recovers_from_missing_index(tmp_path: Path) -> None:
+    path = tmp_path / "photos.ndjson"
+    with SnapshotStore(path, Photo) as store:
+        store.extend(make_photos(range(5)))
+    Path(f"{path}.idx").unlink()
+    with SnapshotStore(path, Photo) as store:
+        assert len(store) == 5
+        assert store["4"].id == "4"
+    assert len(Path(f"{path}.idx").read_text().splitlines()) == 5
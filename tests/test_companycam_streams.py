@@ -0,0 +1,69 @@
+import itertools
+from datetime import datetime, timezone
+
+import pytest
+
+import companycam
+from companycam.pagination import list_all
+from companycam.streams import Descending, MergedStream
+from companycam.v2.models import Photo
+from companycam.v2.server import StandInServer, Store
+
+from . import utils
+
+
+@pytest.fixture
+def api() -> companycam.API:
+    server = StandInServer(Store.generate(projects=20, photos_per_project=30))
+    return utils.stand_in_api(server)
+
+
+@pytest.fixture
+def projects(api: companycam.API) -> list[str]:
+    return [str(project.id) for project in list_all(api.projects.list)]
+
+
+def newest_first(photos: list[Photo]) -> list[str | None]:
+    return [p.id for p in sorted(photos, key=lambda p: -(p.captured_at or 0))]
+
+
+def test_top_n_fetches_head_pages(api: companycam.API, projects: list[str]) -> None:
+    stream = api.projects.stream_photos(projects, per_page=10)
+    top = list(itertools.islice(stream, 15))
+    assert [p.id for p in top] == newest_first(list_all(api.photos.list))[:15]
+    # one page of every project, and a few more pages of the projects with the
+    # newest photos
+    assert len(projects) <= stream.pages_fetched < 2 * len(projects)
+
+
+def test_merges_everything_in_order(api: companycam.API, projects: list[str]) -> None:
+    stream = api.projects.stream_photos(projects, per_page=7, max_workers=4)
+    photos = list(stream)
+    assert len(photos) == 600
+    assert [p.id for p in photos] == newest_first(photos)
+
+
+def test_without_prefetch(api: companycam.API, projects: list[str]) -> None:
+    stream = MergedStream(
+        api.projects.list_photos,
+        [(project,) for project in projects[:2]],
+        # any comparable key, not only numbers
+        key=lambda photo: datetime.fromtimestamp(photo.captured_at, timezone.utc),
+        per_page=30,
+        prefetch=False,
+    )
+    assert len(list(itertools.islice(stream, 30))) == 30
+    # only the head page of each project
+    assert stream.pages_fetched == 2
+    assert len(list(stream)) == 60
+    assert stream.pages_fetched == 2 + 4
+
+
+def test_Descending() -> None:
+    keys = [Descending(v) for v in ["b", None, "c", "a"]]
+    assert [k.value[1] for k in sorted(keys)] == ["c", "b", "a", None]
+    assert Descending("a") == Descending("a")
+
+
+def test_empty_sources(api: companycam.API) -> None:
+    assert list(api.projects.stream_photos([])) == []
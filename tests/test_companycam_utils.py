@@ -0,0 +1,43 @@
+import contextvars
+import threading
+
+import pytest
+
+from companycam.utils import gather, gather_outcomes
+
+VAR: contextvars.ContextVar[str] = contextvars.ContextVar("VAR", default="unset")
+
+
+def test_gather_returns_results_by_key() -> None:
+    assert gather({"a": lambda: 1, "b": lambda: 2}) == {"a": 1, "b": 2}
+
+
+def test_gather_runs_calls_concurrently() -> None:
+    barrier = threading.Barrier(3, timeout=2)
+    assert gather(dict.fromkeys(range(3), barrier.wait), max_workers=3)
+
+
+def test_gather_copies_context_into_threads() -> None:
+    VAR.set("set")
+    assert gather({"a": VAR.get}) == {"a": "set"}
+
+
+def test_gather_raises_exceptions() -> None:
+    def fail() -> None:
+        raise RuntimeError()
+
+    with pytest.raises(RuntimeError):
+        gather({"a": lambda: 1, "b": fail})
+
+
+def test_gather_outcomes_returns_exceptions() -> None:
+    error = RuntimeError()
+
+    def fail() -> None:
+        raise error
+
+    assert gather_outcomes({"a": lambda: 1, "b": fail}) == {"a": 1, "b": error}
+
+
+def test_gather_accepts_no_calls() -> None:
+    assert gather({}) == {}
@@ -0,0 +1,72 @@
+import threading
+import time
+
+import pytest
+from pytest_mock import MockerFixture
+
+import companycam
+from companycam.v2.aggregates import ProjectGraph
+
+from . import utils
+
+
+def make_api() -> companycam.API:
+    return companycam.API(token="TEST_TOKEN", server_url="http://testserver")
+
+
+def test_ProjectsManager_hydrate_includes_all_sub_lists_by_default(
+    mocker: MockerFixture,
+) -> None:
+    utils.ClientSendPatcher(mocker)
+    graph = make_api().projects.hydrate("12345")
+    assert isinstance(graph, ProjectGraph)
+    assert graph.project.id
+    for name in companycam.v2.managers.ProjectsManager.hydrate_include:
+        assert isinstance(getattr(graph, name), list)
+
+
+def test_ProjectsManager_hydrate_only_requests_included_sub_lists(
+    mocker: MockerFixture,
+) -> None:
+    patch = utils.ClientSendPatcher(mocker)
+    graph = make_api().projects.hydrate("12345", include=["photos"])
+    assert graph.photos
+    assert graph.comments is None
+    assert patch.mock.call_count == 2
+
+
+def test_ProjectsManager_hydrate_sends_requests_concurrently(
+    mocker: MockerFixture,
+) -> None:
+    patch = utils.ClientSendPatcher(mocker)
+    lock = threading.Lock()
+    in_flight, peak = [0], [0]
+    get_response = patch.get_response
+
+    def slow_response(request):  # type: ignore[no-untyped-def]
+        with lock:
+            in_flight[0] += 1
+            peak[0] = max(peak[0], in_flight[0])
+        time.sleep(0.02)
+        with lock:
+            in_flight[0] -= 1
+        return get_response(request)
+
+    patch.mock.side_effect = slow_response
+    make_api().projects.hydrate("12345")
+    assert peak[0] > 1
+
+
+def test_ProjectsManager_hydrate_paginates_sub_lists(mocker: MockerFixture) -> None:
+    patch = utils.ClientSendPatcher(mocker)
+    make_api().projects.hydrate("12345", include=["photos"], paginate=True)
+    urls = [str(c.args[0].url) for c in patch.mock.call_args_list]
+    # the fixture page is shorter than `per_page`, so there is only one page
+    assert [u for u in urls if "/photos" in u] == [
+        "http://testserver/projects/12345/photos?page=1&per_page=50"
+    ]
+
+
+def test_ProjectsManager_hydrate_rejects_unknown_sub_lists() -> None:
+    with pytest.raises(ValueError):
+        make_api().projects.hydrate("12345", include=["nope"])
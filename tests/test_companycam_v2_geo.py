@@ -0,0 +1,88 @@
+import random
+
+import httpx
+import pytest
+
+import companycam
+from companycam.v2.models import Coordinate, Photo, Project
+
+np = pytest.importorskip("numpy")
+geo = pytest.importorskip("companycam.v2.geo")
+
+SQUARE = [
+    Coordinate(lat=0, lon=0),
+    Coordinate(lat=0, lon=1),
+    Coordinate(lat=1, lon=1),
+    Coordinate(lat=1, lon=0),
+]
+
+
+def make_project(id: str, lat: float, lon: float, **kwargs) -> Project:  # type: ignore[no-untyped-def]
+    return Project(**{"id": id, "coordinates": {"lat": lat, "lon": lon}, **kwargs})
+
+
+def test_haversine_distance_of_one_degree_of_latitude() -> None:
+    distances = geo.haversine(0, 0, np.array([1.0, 0.0]), np.array([0.0, 0.0]))
+    assert distances[0] == pytest.approx(111_195, rel=1e-3)
+    assert distances[1] == 0
+
+
+@pytest.mark.parametrize(
+    "lat,lon,expected", [(0.5, 0.5, True), (1.5, 0.5, False), (0.5, -0.1, False)]
+)
+def test_polygon_contains(lat: float, lon: float, expected: bool) -> None:
+    lats, lons = geo.coordinate_arrays(SQUARE)
+    assert geo.polygon_contains(lats, lons, lat, lon) is expected
+
+
+@pytest.mark.parametrize("ring,cells", [(0, 1), (1, 8), (2, 16)])
+def test_ring_cells(ring: int, cells: int) -> None:
+    assert len(set(geo.ring_cells(0, 0, ring))) == cells
+
+
+def test_SpatialIndex_nearest_matches_brute_force() -> None:
+    rng = random.Random(0)
+    projects = [
+        make_project(str(i), rng.uniform(40, 42), rng.uniform(-75, -73))
+        for i in range(2000)
+    ]
+    index = geo.SpatialIndex(projects, cell_size=0.05)
+    for _ in range(20):
+        lat, lon = rng.uniform(39.5, 42.5), rng.uniform(-75.5, -72.5)
+        distances = geo.haversine(lat, lon, index.lats, index.lons)
+        expected = [index.projects[k].id for k in np.argsort(distances)[:5]]
+        assert [p.id for p, _ in index.nearest(lat, lon, n=5)] == expected
+
+
+def test_SpatialIndex_nearest_respects_max_distance() -> None:
+    index = geo.SpatialIndex([make_project("1", 0, 0), make_project("2", 1, 0)])
+    assert [p.id for p, _ in index.nearest(0, 0, n=2, max_distance=1000)] == ["1"]
+
+
+def test_SpatialIndex_nearest_with_no_projects() -> None:
+    assert geo.SpatialIndex([]).nearest(0, 0) == []
+
+
+def test_SpatialIndex_containing_and_assign() -> None:
+    fenced = make_project("fenced", 5, 5, geofence=SQUARE)
+    index = geo.SpatialIndex([fenced, make_project("near", 3, 3)])
+    assert index.containing(0.5, 0.5) == [fenced]
+    photos = [
+        Photo(**{"id": "in", "coordinates": {"lat": 0.5, "lon": 0.5}}),
+        Photo(**{"id": "out", "coordinates": {"lat": 3, "lon": 3.001}}),
+        Photo(**{"id": "none"}),
+    ]
+    assert {k: p and p.id for k, p in index.assign(photos).items()} == {
+        "in": "fenced",
+        "out": None,
+        "none": None,
+    }
+    assert index.assign(photos, max_distance=1000)["out"].id == "near"  # type: ignore[union-attr]
+
+
+def test_SpatialIndex_from_manager_paginates_projects() -> None:
+    project = {"id": "1", "coordinates": {"lat": 0, "lon": 0}}
+    transport = httpx.MockTransport(lambda request: httpx.Response(200, json=[project]))
+    api = companycam.API(token="token", transport=transport)
+    index = geo.SpatialIndex.from_manager(api.projects)
+    assert len(index.projects) == 1
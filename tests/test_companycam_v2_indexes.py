@@ -0,0 +1,209 @@
+import json
+from pathlib import Path
+
+import httpx
+import pytest
+
+import companycam
+from companycam.v2.indexes import PhotoHashIndex, TagIndex, hash_content, normalize_tag
+from companycam.v2.models import Photo
+
+FRONT = {
+    "id": "1",
+    "display_value": "Front Side",
+    "value": "front side",
+    "updated_at": 1,
+}
+ROOF = {"id": "2", "display_value": "Roof", "value": "roof", "updated_at": 1}
+
+
+class Server(object):
+    def __init__(self, tags: list[dict], photo_tags: dict[str, list[dict]]) -> None:
+        self.tags = tags
+        self.photo_tags = photo_tags
+        self.requests: list[httpx.Request] = []
+
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        self.requests.append(request)
+        path = request.url.path
+        if path == "/tags":
+            page = int(request.url.params.get("page", 1))
+            per_page = int(request.url.params.get("per_page", 50))
+            tags = self.tags[(page - 1) * per_page : page * per_page]
+            return httpx.Response(200, json=tags)
+        photo_id = path.split("/")[2]
+        if photo_id == "missing":
+            return httpx.Response(404, json={"errors": ["Not found"]})
+        if request.method == "GET":
+            return httpx.Response(200, json=self.photo_tags.get(photo_id, []))
+        names = json.loads(request.content)["tags"]
+        return httpx.Response(
+            201, json=[{"id": n, "display_value": n, "value": n.lower()} for n in names]
+        )
+
+
+@pytest.fixture
+def server() -> Server:
+    return Server(tags=[FRONT, ROOF], photo_tags={"10": [FRONT]})
+
+
+def make_api(server: Server) -> companycam.API:
+    return companycam.API(
+        token="token",
+        server_url="http://testserver",
+        transport=httpx.MockTransport(server),
+    )
+
+
+def test_normalize_tag() -> None:
+    assert normalize_tag("  Front   SIDE ") == "front side"
+
+
+def test_TagIndex_looks_up_tags_by_normalized_display_value_and_value(
+    server: Server,
+) -> None:
+    index = TagIndex(make_api(server).tags)
+    assert index.get("FRONT SIDE").id == "1"  # type: ignore[union-attr]
+    assert "roof" in index
+    assert len(index) == 2
+    assert len(server.requests) == 1
+
+
+def test_TagIndex_refreshes_on_miss_at_most_once_per_interval(server: Server) -> None:
+    index = TagIndex(make_api(server).tags, refresh_interval=3600)
+    assert index.get("Gutter") is None
+    assert index.get("Gutter") is None
+    assert len(server.requests) == 1
+
+
+def test_TagIndex_refresh_adds_new_tags(server: Server) -> None:
+    index = TagIndex(make_api(server).tags, refresh_interval=0)
+    index.refresh()
+    server.tags.append({"id": "3", "display_value": "Gutter", "value": "gutter"})
+    assert index.get("gutter").id == "3"  # type: ignore[union-attr]
+
+
+def test_TagIndex_refresh_resumes_from_last_page(server: Server) -> None:
+    server.tags += [{"id": str(i), "value": f"tag {i}"} for i in range(3, 6)]
+    index = TagIndex(make_api(server).tags, per_page=2)
+    index.refresh()
+    server.requests.clear()
+    server.tags.append({"id": "6", "display_value": "Gutter", "value": "gutter"})
+    index.refresh()
+    # the last page (which wasn't full) and the page after it, which is empty
+    assert [r.url.params["page"] for r in server.requests] == ["3", "4"]
+    assert index.get("gutter").id == "6"  # type: ignore[union-attr]
+    server.requests.clear()
+    index.refresh(full=True)
+    assert [r.url.params["page"] for r in server.requests] == ["1", "2", "3", "4"]
+
+
+def test_TagIndex_add_keeps_newer_tag() -> None:
+    index = TagIndex(companycam.API(token="token").tags)
+    index.add(companycam.v2.models.Tag(**{**FRONT, "id": "new", "updated_at": 2}))
+    index.add(companycam.v2.models.Tag(**FRONT))
+    assert index.tags["front side"].id == "new"
+
+
+def test_PhotosManager_bulk_tag_skips_tags_photos_already_have(server: Server) -> None:
+    result = make_api(server).photos.bulk_tag(["10", "11"], ["front side", "Roof"])
+    assert [t.display_value for t in result.created["10"]] == ["Roof"]
+    assert [t.display_value for t in result.created["11"]] == ["front side", "Roof"]
+    assert result.errors == {}
+    result.raise_for_errors()
+
+
+def test_PhotosManager_bulk_tag_returns_errors_by_photo(server: Server) -> None:
+    result = make_api(server).photos.bulk_tag(["10", "missing", "11"], ["Roof"])
+    assert list(result.created) == ["10", "11"]
+    assert isinstance(result.errors["missing"], companycam.NotFound)
+    with pytest.raises(companycam.NotFound):
+        result.raise_for_errors()
+
+
+def test_PhotosManager_bulk_tag_does_not_send_request_if_nothing_to_tag(
+    server: Server,
+) -> None:
+    result = make_api(server).photos.bulk_tag(["10"], ["Front Side"])
+    assert result.created == {"10": []}
+    assert [r.method for r in server.requests] == ["GET"]
+
+
+def test_PhotosManager_bulk_tag_uses_display_values_from_index(server: Server) -> None:
+    api = make_api(server)
+    index = TagIndex(api.tags)
+    result = api.photos.bulk_tag(["11"], ["front side", "Gutter"], index=index)
+    assert [t.display_value for t in result.created["11"]] == ["Front Side", "Gutter"]
+    assert index.tags["gutter"].id == "Gutter"
+
+
+def make_photo(id: str, content: bytes) -> Photo:
+    return Photo(**{"id": id, "project_id": "1", "hash": hash_content(content)})
+
+
+def test_hash_content_is_md5_hex_digest() -> None:
+    assert hash_content(b"") == "d41d8cd98f00b204e9800998ecf8427e"
+
+
+def test_PhotoHashIndex_adds_photos_by_hash() -> None:
+    index = PhotoHashIndex()
+    assert index.add(make_photo("1", b"a"))
+    assert not index.add(make_photo("2", b"a"))
+    assert index.update([make_photo("3", b"b"), Photo(**{"id": "4"})]) == 1
+    assert index.contains_content(b"a")
+    assert not index.contains_content(b"c")
+    assert index.get(hash_content(b"a")) == ("1", "1")
+    assert len(index) == 2
+
+
+def test_PhotoHashIndex_persists_between_instances(tmp_path: Path) -> None:
+    path = tmp_path / "hashes.ndjson"
+    PhotoHashIndex(path).add(make_photo("1", b"a"))
+    PhotoHashIndex(path).add(make_photo("2", b"b"))
+    index = PhotoHashIndex(path)
+    assert hash_content(b"a") in index
+    assert hash_content(b"b") in index
+    assert len(path.read_text().splitlines()) == 2
+
+
+def test_PhotoHashIndex_removes_partly_written_entry(tmp_path: Path) -> None:
+    path = tmp_path / "hashes.ndjson"
+    PhotoHashIndex(path).add(make_photo("1", b"a"))
+    with path.open("a") as f:
+        f.write('{"hash": "')
+    index = PhotoHashIndex(path)
+    assert len(index.photos) == 1
+    index.add(make_photo("2", b"b"))
+    assert len(PhotoHashIndex(path).photos) == 2
+
+
+def test_PhotoHashIndex_build_paginates_project_photos() -> None:
+    photo = {"id": "1", "project_id": "10", "hash": hash_content(b"a")}
+    transport = httpx.MockTransport(lambda request: httpx.Response(200, json=[photo]))
+    api = companycam.API(token="token", transport=transport)
+    index = PhotoHashIndex()
+    assert index.build(api.projects, ["10", "11"]) == 1
+    assert index.contains_content(b"a")
+
+
+def test_PhotoHashIndex_build_is_unchanged_if_crawl_fails(tmp_path: Path) -> None:
+    photo = {"id": "1", "project_id": "10", "hash": hash_content(b"a")}
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        if "/11/" in request.url.path:
+            return httpx.Response(500, json={"errors": ["Error"]})
+        # lookups aren't blocked while a project is being crawled
+        assert index._lock.acquire(blocking=False)
+        index._lock.release()
+        return httpx.Response(200, json=[photo])
+
+    api = companycam.API(token="token", transport=httpx.MockTransport(handler))
+    path = tmp_path / "hashes.ndjson"
+    index = PhotoHashIndex(path)
+    index.add(make_photo("2", b"b"))
+    with pytest.raises(httpx.HTTPStatusError):
+        index.build(api.projects, ["10", "11"])
+    assert not index.contains_content(b"a")
+    assert len(PhotoHashIndex(path)) == 1
+    assert index.build(api.projects, ["10"]) == 1
+    assert PhotoHashIndex(path).photos == index.photos
@@ -0,0 +1,97 @@
+from collections.abc import Callable, Iterable
+
+import pytest
+
+import companycam
+from companycam.pagination import list_all
+from companycam.v2.models import Comment, Photo, Tag, User
+from companycam.v2.relations import Resolver
+from companycam.v2.server import StandInServer, Store
+
+from . import utils
+
+
+class RecordingApp(object):
+    """Records the paths requested from a WSGI app."""
+
+    def __init__(self, app: Callable) -> None:
+        self.app = app
+        self.paths: list[str] = []
+
+    def __call__(self, environ: dict, start_response: Callable) -> Iterable[bytes]:
+        self.paths.append(environ["PATH_INFO"])
+        return self.app(environ, start_response)
+
+
+@pytest.fixture
+def app() -> RecordingApp:
+    store = Store.generate(projects=30, photos_per_project=2, users=5)
+    return RecordingApp(StandInServer(store).wsgi)
+
+
+@pytest.fixture
+def api(app: RecordingApp) -> companycam.API:
+    return utils.stand_in_api(app)
+
+
+def test_resolve(api: companycam.API, app: RecordingApp) -> None:
+    photos = list_all(api.photos.list)
+    app.paths.clear()
+    resolver = Resolver(api, sweep_threshold=10, per_page=20)
+    assert resolver.resolve(photos) == photos
+    for photo in photos:
+        assert photo.creator is not None and photo.creator.id == photo.creator_id
+        assert photo.project is not None and photo.project.id == photo.project_id
+        assert photo.company is not None and photo.company.id == photo.company_id
+        # not a field, so never sent in request bodies
+        assert "creator" not in photo.model_dump()
+    # 5 users are retrieved, all 30 projects are listed and the company is retrieved
+    assert sorted(app.paths) == sorted(
+        ["/company", "/projects", "/projects"]
+        + [f"/users/{i}" for i in {p.creator_id for p in photos}]
+    )
+
+    # every id is cached
+    app.paths.clear()
+    resolver.resolve(list_all(api.photos.list))
+    assert app.paths == ["/photos", "/photos"]
+
+
+def test_resolve_with_cached_objects(api: companycam.API, app: RecordingApp) -> None:
+    photos = list_all(api.photos.list)
+    resolver = Resolver(api)
+    resolver.add(*list_all(api.users.list))
+    app.paths.clear()
+    resolver.resolve(photos, relations=["creator"])
+    assert app.paths == []
+    assert all(p.creator is not None and p.project is None for p in photos)
+
+
+def test_resolved_equals_unresolved(api: companycam.API) -> None:
+    photos = list_all(api.photos.list)
+    unresolved = list_all(api.photos.list)
+    Resolver(api).resolve(photos)
+    assert photos[0].creator is not None and unresolved[0].creator is None
+    assert photos == unresolved
+
+
+def test_resolve_not_found(api: companycam.API) -> None:
+    models = [
+        Comment(**{"id": "1", "creator_id": "nope", "creator_type": "User"}),
+        Comment(**{"id": "2", "creator_id": "nope", "creator_type": "Integration"}),
+        Tag(**{"id": "3", "company_id": "another company"}),
+    ]
+    Resolver(api).resolve(models)
+    assert models[0].creator is None
+    assert models[2].company is None
+
+
+def test_unknown_relation(api: companycam.API) -> None:
+    with pytest.raises(ValueError, match="Cannot resolve: nope"):
+        Resolver(api).resolve([Photo(**{"id": "1"})], relations=["nope"])
+
+
+def test_add_user() -> None:
+    resolver = Resolver(companycam.API(token="ANY_TOKEN"))
+    resolver.add(User(**{"id": "1"}), User(**{"id": None}))
+    assert list(resolver.cache["users"]) == ["1"]
@@ -0,0 +1,179 @@
+import asyncio
+
+import httpx
+import pytest
+
+import companycam
+from companycam.pagination import list_all
+from companycam.v2.models import Group, Project, Tag
+from companycam.v2.server import StandInServer, Store, main, manager_routes
+
+from . import utils
+from .paths import FIXTURE_V2_RESPONSES
+
+
+@pytest.fixture
+def api() -> companycam.API:
+    return utils.stand_in_api(
+        StandInServer(Store.generate(projects=5, photos_per_project=3))
+    )
+
+
+def test_manager_routes_include_every_path() -> None:
+    routes = {f"{r.method} {r.template}" for r in manager_routes()}
+    assert "GET /company" in routes
+    assert "DELETE /projects/{project}/labels/{label}" in routes
+    assert len(routes) == 52
+
+
+def test_literal_routes_take_precedence(api: companycam.API) -> None:
+    assert api.users.retrieve_current().email_address == "user0@example.com"
+
+
+def test_generate() -> None:
+    store = Store.generate(projects=3, photos_per_project=2, users=1, tags=4)
+    assert len(store.collections["/projects"]) == 3
+    assert len(store.collections["/photos"]) == 6
+    assert len(store.collections["/tags"]) == 4
+    project_id = next(iter(store.collections["/projects"]))
+    assert len(store.collections[f"/projects/{project_id}/photos"]) == 2
+
+
+def test_from_fixture() -> None:
+    api = utils.stand_in_api(StandInServer(Store.from_fixture(FIXTURE_V2_RESPONSES)))
+    assert api.company.retrieve().name == "Psych"
+    project = api.projects.list()[0]
+    assert api.projects.list_labels(project)
+    assert api.projects.list_photos(project)
+
+
+def test_pagination(api: companycam.API) -> None:
+    assert len(api.photos.list(query={"per_page": 4})) == 4
+    assert len(api.photos.list(query={"per_page": 4, "page": 4})) == 3
+    photos = list_all(api.photos.list, per_page=4)
+    assert len({p.id for p in photos}) == 15
+
+
+def test_invalid_pagination(api: companycam.API) -> None:
+    with pytest.raises(companycam.BadRequest):
+        api.photos.list(query={"page": "two"})
+    server = StandInServer(Store.generate(projects=1))
+    with httpx.Client(
+        base_url="http://stand-in",
+        transport=httpx.WSGITransport(app=server.wsgi),
+        headers={"authorization": "Bearer ANY_TOKEN"},
+    ) as client:
+        response = client.get("/photos?page=two&per_page=4&end_date=soon")
+    assert response.status_code == 400
+    assert response.json() == {
+        "errors": ["page must be an integer", "end_date must be an integer"]
+    }
+
+
+def test_time_range_filter(api: companycam.API) -> None:
+    photos = list_all(api.photos.list, per_page=100)
+    captured_at = sorted(p.captured_at or 0 for p in photos)
+    query = {"start_date": captured_at[5], "end_date": captured_at[9]}
+    filtered = api.photos.list(query=query)
+    assert sorted(p.captured_at or 0 for p in filtered) == captured_at[5:10]
+
+
+def test_creates_and_updates_are_visible(api: companycam.API) -> None:
+    project = api.projects.list()[0]
+    photo = api.projects.create_photo(project, uri="https://x/y.jpg", captured_at=1)
+    assert photo.project_id == project.id
+    assert photo.id in {p.id for p in api.projects.list_photos(project)}
+    assert api.photos.retrieve(photo).urls
+
+    tag = api.tags.create(Tag(**{"id": "", "display_value": "Roof"}))
+    tag.display_value = "Roofing"
+    api.tags.update(tag)
+    assert api.tags.retrieve(tag).display_value == "Roofing"
+
+    assert [t.display_value for t in api.photos.create_tags(photo, "a", "b")] == [
+        "a",
+        "b",
+    ]
+    assert len(api.photos.list_tags(photo)) == 2
+
+    api.photos.delete(photo)
+    assert photo.id not in {p.id for p in api.projects.list_photos(project)}
+    with pytest.raises(companycam.NotFound):
+        api.photos.retrieve(photo)
+
+
+def test_project_sub_resources(api: companycam.API) -> None:
+    project = api.projects.list()[0]
+    user = api.users.list()[0]
+    assert api.projects.assign_user_to_project(project, user).id == user.id
+    assert [u.id for u in api.projects.list_assigned_users(project)] == [user.id]
+    api.projects.remove_user_from_project(project, user)
+    assert api.projects.list_assigned_users(project) == []
+
+    labels = api.projects.create_labels(project, "North")
+    api.projects.delete_label(project, labels[0])
+    assert api.projects.list_labels(project) == []
+
+    notepad = api.projects.update_notepad(Project(**{"id": project.id, "notepad": "x"}))
+    assert notepad.notepad == "x"
+    assert api.projects.create_invitation(project).status == "pending"
+
+    api.projects.delete(project)
+    assert api.projects.retrieve(project).status == "deleted"
+    assert api.projects.restore(project).status == "active"
+
+
+def test_group_users_are_expanded(api: companycam.API) -> None:
+    user = api.users.list()[0]
+    group = api.groups.create(Group(**{"id": "", "name": "Crew", "users": [user]}))
+    assert [u.id for u in api.groups.retrieve(group).users or []] == [user.id]
+
+
+def test_unauthorized() -> None:
+    server = StandInServer()
+    with httpx.Client(
+        base_url="http://stand-in", transport=httpx.WSGITransport(app=server.wsgi)
+    ) as client:
+        assert client.get("/company").status_code == 401
+
+
+def test_error_rate() -> None:
+    api = utils.stand_in_api(StandInServer(error_rate=1.0))
+    with pytest.raises(companycam.InternalServerError):
+        api.company.retrieve()
+
+
+def test_rate_limit() -> None:
+    server = StandInServer(rate_limit=0.1, burst=2)
+    with httpx.Client(
+        base_url="http://stand-in",
+        transport=httpx.WSGITransport(app=server.wsgi),
+        headers={"authorization": "Bearer ANY_TOKEN"},
+    ) as client:
+        responses = [client.get("/company") for _ in range(3)]
+    assert [r.status_code for r in responses] == [200, 200, 429]
+    assert int(responses[2].headers["retry-after"]) >= 1
+
+
+def test_asgi() -> None:
+    server = StandInServer(Store.generate(projects=2), latency=0.01)
+
+    async def list_projects() -> list[httpx.Response]:
+        async with httpx.AsyncClient(
+            base_url="http://stand-in",
+            transport=httpx.ASGITransport(app=server),  # type: ignore[arg-type]
+            headers={"authorization": "Bearer ANY_TOKEN"},
+        ) as client:
+            return await asyncio.gather(
+                *(client.get("/projects", params={"page": p}) for p in (1, 2))
+            )
+
+    first, second = asyncio.run(list_projects())
+    assert len(first.json()) == 2
+    assert second.json() == []
+    assert first.headers["content-type"] == "application/json"
+
+
+def test_main_rejects_unknown_arguments() -> None:
+    with pytest.raises(SystemExit):
+        main(["--unknown"])
@@ -14,6 +14,7 @@ import yaml
 from pytest_mock import MockerFixture
 
 import companycam
+from companycam.v2.server import StandInServer
 
 from . import paths
 
@@ -287,3 +288,18 @@ class ClientTestHelper(object):
             for manager in self.managers.values()
             for func_name, func in get_paths_from_manager_cls(manager).items()
         ]
+
+
+# Utils for testing against `companycam.v2.server.StandInServer`
+
+
+def stand_in_api(server: StandInServer | Callable) -> companycam.API:
+    """An `API` object which sends requests to a stand-in server, or to a WSGI app
+    (e.g. one wrapping a stand-in server's `wsgi` app).
+    """
+    app = server.wsgi if isinstance(server, StandInServer) else server
+    return companycam.API(
+        token="ANY_TOKEN",
+        server_url="http://stand-in",
+        transport=httpx.WSGITransport(app=app),
+    )